@@ -1,25 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from jose import JWTError, jwt
+from jose import jwt
 from datetime import datetime, timedelta
 from app.core.database import get_async_session
+from app.dependencies.auth import get_current_user, oauth2_scheme, SECRET_KEY, ALGORITHM
+from app.services.principal_cache import Principal
+from app.services.password_service import password_hasher
 from app.models.user import User
 from app.schemas.user import UserLogin
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, UserOut
+from app.schemas.pagination import Page
+from app.dependencies.pagination import PageParams, paginate
 from app.models.user import User, UserRole  # Rol enum'u ekle
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-# JWT ayarları
-SECRET_KEY = "supersecretkey"
-ALGORITHM = "HS256"
+# JWT ayarları (SECRET_KEY/ALGORITHM ve get_current_user app.dependencies.auth'tan gelir)
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-# FastAPI security
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -28,47 +27,37 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_session)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Geçersiz token.")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token çözümlenemedi.")
-
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise HTTPException(status_code=401, detail="Kullanıcı bulunamadı.")
-    return user
-
-
 @router.post("/login")
 async def login_user(payload: UserLogin, db: AsyncSession = Depends(get_async_session)):
     print("📥 Gelen email:", payload.email)
-    print("📥 Gelen şifre:", payload.password)
 
     result = await db.execute(select(User).where(User.email == payload.email))
     user = result.scalar_one_or_none()
 
     if user:
         print("✅ Veritabanı kullanıcı bulundu:", user.email)
-        print("🔐 Veritabanı şifresi:", user.password)
     else:
         print("❌ Kullanıcı bulunamadı.")
 
-    if not user or user.password != payload.password:
+    # Doğrulama thread havuzunda çalışır; event loop (ör. sipariş istekleri) bloklanmaz
+    password_ok, needs_rehash = await password_hasher.verify(payload.password, user.password if user else None)
+    if not password_ok:
         print("⛔ Şifre eşleşmedi. Giriş reddedildi.")
         raise HTTPException(status_code=401, detail="Geçersiz e-posta veya şifre.")
 
+    # Düz metin saklanmış eski şifreleri ilk başarılı girişte hashle
+    if needs_rehash:
+        user.password = await password_hasher.hash(payload.password)
+        await db.commit()
+
     print("✅ Giriş başarılı. JWT token oluşturuluyor...")
-    access_token = create_access_token(data={"sub": user.email})
+    # uid ve role claim'leri sayesinde sonraki istekler kullanıcıyı id ile (çoğunlukla cache'ten) çözer
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id, "role": user.role.value})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me")
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: Principal = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "email": current_user.email,
@@ -77,11 +66,17 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     }
 
 
-@router.get("/debug/users")
-async def list_users(db: AsyncSession = Depends(get_async_session)):
-    result = await db.execute(select(User))
-    users = result.scalars().all()
-    return [{"email": u.email, "password": u.password, "role": u.role.value} for u in users]
+# Şifre (hash) alanı artık döndürülmez
+@router.get("/debug/users", response_model=Page[UserOut])
+async def list_users(
+    role: UserRole | None = Query(None),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_session)
+):
+    stmt = select(User)
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    return await paginate(db, stmt, page, keys=(User.id,))
 
 @router.post("/register")
 async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_async_session)):
@@ -95,7 +90,7 @@ async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_asyn
     new_user = User(
         name=payload.name,
         email=payload.email,
-        password=payload.password,  # Not: Üretim ortamında hashlenmeli
+        password=await password_hasher.hash(payload.password),
         role=UserRole.CUSTOMER  # Otomatik olarak MÜŞTERİ olarak atanır
     )
     db.add(new_user)
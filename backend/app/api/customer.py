@@ -1,12 +1,18 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func, and_
 from app.models.table import DiningTable, TableStatus
 from app.core.database import get_async_session
 from app.dependencies.auth import get_current_user
 from app.models.user import User
+from app.services.principal_cache import Principal
 from app.models.order import Order, OrderItem, OrderStatus # OrderItem'ı da ekledik
 from app.models.menu_item import MenuItem # MenuItem'ı da ekledik
+from app.schemas.order import OrderPaymentUpdate
+from app.services.rollup_service import record_orders_paid
+from app.services.table_service import seat_customer, release_table, has_unpaid_orders, settle_session_orders
 
 from pydantic import BaseModel
 
@@ -20,7 +26,7 @@ router = APIRouter(prefix="/customer", tags=["Customer"])
 async def sit_at_table(
     table_number: int,
     session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # CUSTOMER rolü kontrolü
     if current_user.role.value != "CUSTOMER":
@@ -38,135 +44,118 @@ async def sit_at_table(
             detail=f"Zaten {existing_table.number} numaralı masada oturuyorsunuz."
         )
 
-    # 🔸 Masa var mı?
-    table_result = await session.execute(
-        select(DiningTable).where(DiningTable.number == table_number)
-    )
-    table = table_result.scalar_one_or_none()
-
-    if not table:
+    # 🔸 Masaya oturt: tek compare-and-set UPDATE, aynı anda oturan iki müşteriden biri kazanır
+    table, reason = await seat_customer(session, table_number, current_user.id)
+    if reason == "not_found":
         raise HTTPException(status_code=404, detail="Masa bulunamadı.")
-
-    # 🔸 Masa uygun mu?
-    if table.status == TableStatus.OCCUPIED and table.current_user_id != current_user.id:
+    if reason == "already_here":
+        return {"message": f"Zaten Masa {table_number} üzerinde oturuyorsunuz."}
+    if reason == "occupied":
         raise HTTPException(status_code=400, detail="Bu masa başka bir müşteri tarafından kullanılıyor.")
-
-    # 🔸 Eğer zaten bu masadaysa (çok nadir durum)
-    if table.current_user_id == current_user.id:
-        return {"message": f"Zaten Masa {table.number} üzerinde oturuyorsunuz."}
-
-    # 🔸 Masaya oturt
-    table.status = TableStatus.OCCUPIED
-    table.current_user_id = current_user.id
+    if reason == "already_seated":
+        raise HTTPException(status_code=400, detail="Zaten başka bir masada oturuyorsunuz.")
+    if reason:
+        raise HTTPException(status_code=400, detail="Masa şu anda uygun değil.")
 
     await session.commit()
-    await session.refresh(table)
 
-    return {"message": f"{table.number} numaralı masaya oturdunuz."}
+    return {"message": f"{table['number']} numaralı masaya oturdunuz."}
 
 
 @router.get("/my-orders")
 async def get_my_orders(
     session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    # Hangi masada oturduğunu bul
-    table_result = await session.execute(
-        select(DiningTable).where(DiningTable.current_user_id == current_user.id)
+    # Masa, ödenmemiş siparişler, satırlar ve ürün isimleri tek sorguda.
+    # Birim fiyat sipariş anında sabitlenen değerdir (eski satırlarda güncel menü fiyatı).
+    result = await session.execute(
+        select(
+            DiningTable.number,
+            Order.id, Order.status, Order.is_paid, Order.total_amount,
+            OrderItem.id, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.note,
+            MenuItem.name, func.coalesce(OrderItem.unit_price, MenuItem.price),
+        )
+        .select_from(DiningTable)
+        .outerjoin(Order, and_(
+            Order.table_id == DiningTable.id,
+            Order.customer_id == current_user.id, # Kendi siparişlerini alsın
+            Order.is_paid == False # Sadece ödenmemiş siparişleri filtrele
+        ))
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .where(DiningTable.current_user_id == current_user.id)
+        .order_by(Order.created_at, Order.id, OrderItem.id)
     )
-    table = table_result.scalar_one_or_none()
+    rows = result.all()
 
-    if not table:
+    if not rows:
         return {"table_number": None, "orders": []}
 
-    # O masadaki kullanıcının SADECE ÖDENMEMİŞ siparişlerini getir
-    orders_result = await session.execute(
-        select(Order)
-        .where(
-            Order.table_id == table.id,
-            Order.customer_id == current_user.id, # Kendi siparişlerini alsın
-            Order.is_paid == False # Sadece ödenmemiş siparişleri filtrele
-        )
-        .order_by(Order.created_at)
-    )
-    orders = orders_result.scalars().all()
-
-    # Siparişler ve detaylarını hazırlama
-    formatted_orders = []
-    for order in orders:
-        # Siparişin kalemlerini çek
-        order_items_result = await session.execute(
-            select(OrderItem, MenuItem.name, MenuItem.price)
-            .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)
-            .where(OrderItem.order_id == order.id)
-        )
-        items = order_items_result.all()
-
-        # Her bir OrderItem için toplam tutarı hesapla
-        total_order_amount = sum((item_obj.quantity * menu_item_price) for item_obj, menu_item_name, menu_item_price in items)
-
-        formatted_orders.append({
-            "id": order.id,
-            "status": order.status.value,
-            "is_paid": order.is_paid,
-            "total_amount": total_order_amount,
-            "items": [
-                {
-                    "id": item_obj.id,
-                    "menu_item_id": item_obj.menu_item_id,
-                    "quantity": item_obj.quantity,
-                    "note": item_obj.note,
-                    "name": menu_item_name
-                }
-                for item_obj, menu_item_name, menu_item_price in items
-            ]
+    # Satırları siparişlere grupla (sıralı geldikleri için sıra korunur)
+    orders = {}
+    for (table_number, order_id, order_status, is_paid, total_amount,
+         item_id, menu_item_id, quantity, note, name, unit_price) in rows:
+        if order_id is None:
+            continue
+        order = orders.get(order_id)
+        if order is None:
+            order = orders[order_id] = {
+                "id": order_id,
+                "status": order_status.value,
+                "is_paid": is_paid,
+                "total_amount": total_amount,
+                "items": []
+            }
+        if item_id is None:
+            continue
+        if total_amount is None:
+            order["line_total"] = order.get("line_total", 0) + quantity * unit_price
+        order["items"].append({
+            "id": item_id,
+            "menu_item_id": menu_item_id,
+            "quantity": quantity,
+            "note": note,
+            "name": name
         })
 
+    formatted_orders = list(orders.values())
+    for order in formatted_orders:
+        # Toplamı sabitlenmemiş eski siparişler
+        line_total = order.pop("line_total", 0)
+        if order["total_amount"] is None:
+            order["total_amount"] = line_total
+
     return {
-        "table_number": table.number,
-        "orders": formatted_orders
+        "table_number": rows[0][0],
+        "orders": formatted_orders,
+        "total_amount": sum(order["total_amount"] for order in formatted_orders)
     }
 
 @router.post("/leave")
 async def leave_table(
     session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    # Müşterinin oturduğu masayı bul
-    table_result = await session.execute(
-        select(DiningTable).where(DiningTable.current_user_id == current_user.id)
-    )
-    table = table_result.scalar_one_or_none()
-
-    if not table:
-        raise HTTPException(status_code=400, detail="Şu anda herhangi bir masada değilsiniz.")
-
-    # Sipariş kontrolü
-    orders_result = await session.execute(
-        select(Order).where(Order.table_id == table.id)
-    )
-    orders = orders_result.scalars().all()
-
-    has_unpaid_order = any(not o.is_paid for o in orders)
-    if has_unpaid_order:
+    # Ödenmemiş sipariş kontrolü masa oturumunun sayacından (tek satır); masa tek UPDATE ile boşaltılır
+    table, reason = await release_table(session, current_user.id)
+    if reason == "unpaid":
         raise HTTPException(status_code=400, detail="Ödenmemiş siparişiniz olduğu için kalkamazsınız.")
-
-    # Masayı güncelle
-    table.status = TableStatus.AVAILABLE
-    table.current_user_id = None
+    if reason:
+        raise HTTPException(status_code=400, detail="Şu anda herhangi bir masada değilsiniz.")
 
     await session.commit()
-    await session.refresh(table)
 
-    return {"message": f"{table.number} numaralı masadan kalktınız."}
+    return {"message": f"{table['number']} numaralı masadan kalktınız."}
 
 
 
 ### **Yeni Ödeme Endpoint'i: `/customer/pay-bill`**
 @router.post("/pay-bill", response_model=MessageResponse)
 async def pay_customer_bill(
+    payload: OrderPaymentUpdate | None = None,  # opsiyonel: {"payment_method": "cash"}
     session: AsyncSession = Depends(get_async_session), # AsyncSession olarak güncelledik
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # CUSTOMER rolü kontrolü
     if current_user.role.value != "CUSTOMER": # Enum değeri olduğu için .value kullandık
@@ -187,27 +176,41 @@ async def pay_customer_bill(
             detail="Ödeme yapmak için önce bir masada olmanız gerekmektedir."
         )
 
-    # O masadaki kullanıcının ödenmemiş siparişlerini çek
-    unpaid_orders_result = await session.execute(
-        select(Order).where(
+    if not await has_unpaid_orders(session, table.id, table.current_session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ödenecek aktif bir siparişiniz bulunmamaktadır."
+        )
+
+    # O masadaki kullanıcının ödenmemiş siparişlerini tek UPDATE ile ödendi olarak işaretle.
+    # RETURNING sadece gerçekten durumu değişen siparişleri döner (rollup'ta çift sayım olmaz)
+    paid_result = await session.execute(
+        update(Order)
+        .where(
             Order.table_id == table.id,
             # HATA BURADAYDI! Order.user_id yerine Order.customer_id kullanmalıyız.
             Order.customer_id == current_user.id, # DÜZELTME BURADA
             Order.is_paid == False
         )
+        .values(
+            is_paid=True,
+            paid_at=datetime.utcnow(),
+            payment_method=payload.payment_method if payload else None
+        )
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
     )
-    unpaid_orders = unpaid_orders_result.scalars().all()
+    paid_order_ids = paid_result.scalars().all()
 
-    if not unpaid_orders:
+    if not paid_order_ids:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ödenecek aktif bir siparişiniz bulunmamaktadır."
         )
 
-    # Tüm ödenmemiş siparişleri ödendi olarak işaretle
-    for order in unpaid_orders:
-        order.is_paid = True
-        session.add(order) # Değişikliği session'a ekle
+    # Önce oturum, sonra rollup (kilit sırası: table_service.release_table üstündeki not)
+    await settle_session_orders(session, paid_order_ids)
+    await record_orders_paid(session, paid_order_ids)
 
     await session.commit() # Commit et
     # await session.refresh(order) # refresh tek bir obje için geçerli, for döngüsünde kullanmaya gerek yok
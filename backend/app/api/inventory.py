@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.database import get_async_session
 from app.models.ingredient import Ingredient
-from app.models.menu_item_ingredient import MenuItemIngredient # Yeni import
 from app.dependencies.auth import role_required
-from app.schemas.inventory import LowStockItem, IngredientUpdate, IngredientOut
-from app.services.menu_service import check_and_update_menu_item_availability # Yeni import
+from app.schemas.inventory import (
+    LowStockItem, IngredientUpdate, IngredientOut, StockDelivery, StockDeliveryResult
+)
+from app.schemas.pagination import Page
+from app.dependencies.pagination import PageParams, paginate
+from app.services.menu_service import availability_engine
+from app.services.menu_cache import menu_names
+from app.services.stock_service import apply_stock_changes
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
@@ -28,6 +33,42 @@ async def get_low_stock_items(db: AsyncSession = Depends(get_async_session)):
     ]
 
 
+# Tedarikçi teslimatı / stok sayımı: tüm satırlar tek transaction'da, tek UPDATE ile.
+# Ardından etkilenen menü öğelerinin (birleşim kümesi) uygunluğu tek seferde yeniden hesaplanır.
+@router.post("/delivery", response_model=StockDeliveryResult,
+             dependencies=[Depends(role_required(["MANAGER", "KITCHEN"]))])
+async def receive_delivery(
+        payload: StockDelivery,
+        db: AsyncSession = Depends(get_async_session)
+):
+    changes = []
+    for item in payload.items:
+        if (item.delta is None) == (item.stock_quantity is None):
+            raise HTTPException(status_code=400, detail="Her satırda delta veya stock_quantity'den yalnızca biri verilmeli.")
+        changes.append((item.ingredient_id, item.delta, item.stock_quantity))
+    if len({ingredient_id for ingredient_id, _, _ in changes}) != len(changes):
+        raise HTTPException(status_code=400, detail="Aynı malzeme birden fazla kez verilmiş.")
+
+    updated, rejected = await apply_stock_changes(db, changes)
+    if rejected:
+        found = set((await db.execute(select(Ingredient.id).where(Ingredient.id.in_(rejected)))).scalars().all())
+        await db.rollback()
+        missing = sorted(set(rejected) - found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Malzeme bulunamadı: {missing}")
+        raise HTTPException(status_code=400, detail=f"Stok eksiye düşemez: {sorted(found)}")
+
+    flips = await availability_engine.recompute(db, ingredient_ids=[row.id for row in updated])
+    await db.commit()
+
+    names = await menu_names.get_many(db, flips)
+    return {
+        "updated": [dict(row._mapping) for row in updated],
+        "back_on_menu": [{"id": item_id, "name": names.get(item_id)} for item_id in sorted(flips) if flips[item_id]],
+        "off_menu": [{"id": item_id, "name": names.get(item_id)} for item_id in sorted(flips) if not flips[item_id]],
+    }
+
+
 @router.patch("/{ingredient_id}", response_model=IngredientOut,
               dependencies=[Depends(role_required(["MANAGER", "KITCHEN"]))])  # response_model ekledim
 async def update_ingredient(
@@ -47,36 +88,33 @@ async def update_ingredient(
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(ingredient, field, value)
 
-    # Değişiklikleri veritabanına kaydetmeden önce (veya sonra) ilgili menü öğelerini bulup güncellemeliyiz.
-    # Buradaki db.commit() çağrısı, ingredient değişikliğini commit eder.
-    await db.commit()
-    await db.refresh(ingredient)
-
-    # Stok miktarında bir değişiklik olduysa veya herhangi bir güncelleme varsa
-    # bu malzemeyi kullanan tüm menü öğelerinin uygunluğunu kontrol et
-    # (Sadece `stock_quantity` değiştiyse kontrol etmek daha verimli olabilir)
+    # Stok miktarı değiştiyse bu malzemeyi kullanan menü öğelerinin uygunluğu
+    # aynı işlem içinde, tek sorgu ve tek UPDATE ile güncellenir.
     if 'stock_quantity' in payload.dict(exclude_unset=True) and old_stock_quantity != ingredient.stock_quantity:
         print(
             f"DEBUG: Malzeme '{ingredient.name}' stoğu {old_stock_quantity} -> {ingredient.stock_quantity} olarak değişti. İlgili menü öğeleri kontrol ediliyor.")
+        await db.flush()
+        await availability_engine.recompute(db, ingredient_ids=[ingredient.id])
 
-        menu_items_using_this_ingredient_result = await db.execute(
-            select(MenuItemIngredient.menu_item_id)
-            .where(MenuItemIngredient.ingredient_id == ingredient.id)
-        )
-        menu_item_ids = menu_items_using_this_ingredient_result.scalars().all()
-
-        for mi_id in set(menu_item_ids):  # Tekrar eden ID'leri önlemek için set kullan
-            await check_and_update_menu_item_availability(db, mi_id)
-
-        # Not: check_and_update_menu_item_availability fonksiyonu kendi içinde commit yaptığı için
-        # burada tekrar db.commit() çağırmaya gerek yok.
+    await db.commit()
+    await db.refresh(ingredient)
 
     return ingredient
 
-@router.get("/", response_model=list[IngredientOut], dependencies=[Depends(role_required(["MANAGER", "KITCHEN"]))])
-async def get_all_ingredients(db: AsyncSession = Depends(get_async_session)):
-    result = await db.execute(select(Ingredient))
-    return result.scalars().all()
+@router.get("/", response_model=Page[IngredientOut], dependencies=[Depends(role_required(["MANAGER", "KITCHEN"]))])
+async def get_all_ingredients(
+    name: str | None = Query(None, min_length=1, description="İsimde geçen metin"),
+    low_stock: bool | None = Query(None),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_session)
+):
+    stmt = select(Ingredient)
+    if name:
+        stmt = stmt.where(Ingredient.name.ilike(f"%{name}%"))
+    if low_stock is not None:
+        is_low = Ingredient.stock_quantity < Ingredient.low_stock_threshold
+        stmt = stmt.where(is_low if low_stock else ~is_low)
+    return await paginate(db, stmt, page, keys=(Ingredient.id,))
 
 @router.get("/{ingredient_id}", response_model=IngredientOut, dependencies=[Depends(role_required(["MANAGER", "KITCHEN"]))])
 async def get_ingredient_by_id(
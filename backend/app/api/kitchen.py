@@ -1,50 +1,48 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.core.database import get_async_session
-from app.models.order import Order, OrderItem, OrderStatus
-from app.models.menu_item import MenuItem
-from app.schemas.order import OrderOut, OrderItemOut
+from app.schemas.order import OrderOut, KitchenQueueDelta
+from app.services.events import sse_stream
+from app.services.kitchen_broker import kitchen_broker
 
 router = APIRouter(prefix="/kitchen", tags=["kitchen"])
 
-@router.get("/queue", response_model=list[OrderOut])
-async def get_kitchen_queue(db: AsyncSession = Depends(get_async_session)):
-    # 1. RECEIVED durumundaki siparişleri getir
-    order_stmt = select(Order).where(Order.status == OrderStatus.RECEIVED)
-    orders_result = await db.execute(order_stmt)
-    orders = orders_result.scalars().all()
-
-    # 2. Sipariş ID'lerini topla
-    order_ids = [o.id for o in orders]
-
-    # 3. Tüm OrderItem'ları tek seferde çek
-    item_stmt = select(OrderItem).where(OrderItem.order_id.in_(order_ids))
-    item_result = await db.execute(item_stmt)
-    all_items = item_result.scalars().all()
-
-    # 4. Menü isimlerini getir
-    menu_result = await db.execute(select(MenuItem.id, MenuItem.name))
-    menu_map = {id: name for id, name in menu_result.all()}
-
-    # 5. Siparişleri birleştir
-    order_map = {order.id: order for order in orders}
-    for item in all_items:
-        if not hasattr(order_map[item.order_id], 'item_list'):
-            order_map[item.order_id].item_list = []
-        order_map[item.order_id].item_list.append(item)
-
-    # 6. JSON olarak dön
-    response = []
-    for order in orders:
-        response.append(OrderOut(
-            id=order.id,
-            table_id=order.table_id,
-            status=order.status.value,
-            items=[
-                OrderItemOut(name=menu_map[i.menu_item_id], quantity=i.quantity)
-                for i in getattr(order, 'item_list', [])
-            ]
-        ))
-
-    return response
+# Kuyruk bellekteki kopyadan verilir; güncel imleç X-Queue-Cursor başlığında döner.
+# ?since=<imleç> verilirse sadece o imleçten sonra eklenen/değişen siparişler döner,
+# hiçbir şey değişmediyse 304.
+@router.get("/queue", response_model=list[OrderOut] | KitchenQueueDelta)
+async def get_kitchen_queue(
+    response: Response,
+    since: str | None = Query(None, description="Önceki yanıttaki imleç"),
+    db: AsyncSession = Depends(get_async_session)
+):
+    await kitchen_broker.ensure_loaded(db)
+
+    if since is None:
+        response.headers["X-Queue-Cursor"] = kitchen_broker.cursor
+        return kitchen_broker.snapshot()
+
+    delta = kitchen_broker.changes_since(since)
+    if delta is None:
+        return Response(status_code=304, headers={"X-Queue-Cursor": kitchen_broker.cursor})
+    response.headers["X-Queue-Cursor"] = delta.cursor
+    return delta
+
+
+# Mutfak ekranları için push tabanlı kuyruk (Server-Sent Events).
+# Önce mevcut kuyruk "snapshot" olayı olarak gönderilir, ardından
+# "order_added" / "status_changed" olayları commit edildikçe iletilir.
+@router.get("/stream")
+async def stream_kitchen_queue(request: Request, db: AsyncSession = Depends(get_async_session)):
+    await kitchen_broker.ensure_loaded(db)
+
+    # Abone olma ve snapshot alma arasında await yok; hiçbir olay kaçmaz
+    queue = kitchen_broker.broadcaster.subscribe()
+    snapshot = {"type": "snapshot", "data": [o.model_dump() for o in kitchen_broker.snapshot()]}
+
+    return StreamingResponse(
+        sse_stream(request, kitchen_broker.broadcaster, queue, [snapshot]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,89 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.database import get_async_session
-from app.models.user import User
-from app.models.menu_item import MenuItem
-from app.models.ingredient import Ingredient
+from app.core.database import get_async_session, get_read_session, get_pool_metrics
+from app.services.principal_cache import Principal
 from app.models.table import DiningTable
-from app.models.schedule import Schedule
 from app.api.auth import get_current_user
+from app.dependencies.auth import role_required
+from app.services.menu_cache import menu_cache
+from app.services.floor_plan import floor_plan
+from app.dependencies.pagination import PageParams
+from app.services.dashboard_service import (
+    DASHBOARD_SECTIONS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, load_dashboard, section_page
+)
 
 router = APIRouter(prefix="/manager", tags=["Manager"])
 
 
 @router.get("/menu")
-async def get_menu(session: AsyncSession = Depends(get_async_session)):
-    result = await session.execute(select(MenuItem))
-    items = result.scalars().all()
-    return [
-        {
-            "id": item.id,
-            "name": item.name,
-            "price": float(item.price),  # Numeric ise float() ile dönüşüm yap
-            "is_available": item.is_available,
-            "img_url": item.img_url,
-            "tags": item.tags,
-            "allergens": item.allergens
-        }
-        for item in items
-    ]
+async def get_menu(request: Request, session: AsyncSession = Depends(get_async_session)):
+    # Fiyat float olarak dönen yönetici görünümü, menü snapshot cache'inden.
+    # Cache primary'den doldurulur: replika gecikmesi invalidasyon sonrası eski menüyü cache'lemesin
+    return await menu_cache.response(request, session, "manager")
 
 
 @router.get("/tables")
 async def get_tables(session: AsyncSession = Depends(get_async_session)):
-    tables = await session.execute(select(DiningTable))
-    table_objs = tables.scalars().all()
+    # Bellekteki kat planından (floor_plan), sorgu yok
+    await floor_plan.ensure_loaded(session)
 
     return [
         {
-            "id": t.id,
-            "number": t.number,
-            "status": t.status.value,
-            "current_user_id": t.current_user_id
+            "id": t["id"],
+            "number": t["number"],
+            "status": t["status"],
+            "current_user_id": t["current_user_id"]
         }
-        for t in table_objs
+        for t in floor_plan.snapshot()
     ]
 
 
 
+# Dashboard: her bölümün toplam sayısı + ilk sayfası (açık kolon listesiyle, şifresiz).
+# Bölümler ayrı session'larda eşzamanlı sorgulanır; devamı /dashboard/{section} ile sayfalanır.
 @router.get("/protected-dashboard")
 async def get_protected_dashboard(
-    session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role.value != "MANAGER":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    users = await session.execute(select(User))
-    ingredients = await session.execute(select(Ingredient))
-    schedules = await session.execute(select(Schedule))
-
-    return {
-        "users": [dict(row._mapping) for row in users.fetchall()],
-        "ingredients": [dict(row._mapping) for row in ingredients.fetchall()],
-        "schedules": [dict(row._mapping) for row in schedules.fetchall()],
-    }
+    return await load_dashboard(("users", "ingredients", "schedules"), limit)
 
 
 @router.get("/dashboard")
 async def get_dashboard_data(
-    session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role.value != "MANAGER":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    users = await session.execute(select(User))
-    menu_items = await session.execute(select(MenuItem))
-    ingredients = await session.execute(select(Ingredient))
-    tables = await session.execute(select(DiningTable))
-    schedules = await session.execute(select(Schedule))
-
-    return {
-        "users": [dict(row._mapping) for row in users.fetchall()],
-        "menu_items": [dict(row._mapping) for row in menu_items.fetchall()],
-        "ingredients": [dict(row._mapping) for row in ingredients.fetchall()],
-        "tables": [dict(row._mapping) for row in tables.fetchall()],
-        "schedules": [dict(row._mapping) for row in schedules.fetchall()],
-    }
+    return await load_dashboard(tuple(DASHBOARD_SECTIONS), limit)
+
+
+# Bölüm detayına inme: ?cursor=<önceki sayfanın next_cursor değeri>
+@router.get("/dashboard/{section}")
+async def get_dashboard_section(
+    section: str,
+    page: PageParams = Depends(),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role.value != "MANAGER":
+        raise HTTPException(status_code=403, detail="Access denied")
+    if section not in DASHBOARD_SECTIONS:
+        raise HTTPException(status_code=404, detail="Bölüm bulunamadı.")
+
+    return await section_page(session, section, page)
+
+
+# Bağlantı havuzu anlık metrikleri (havuz boyutunu worker sayısına göre ayarlamak için)
+@router.get("/db-pool", dependencies=[Depends(role_required(["MANAGER"]))])
+async def get_db_pool_metrics():
+    return get_pool_metrics()
@@ -1,22 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException # Tekrar eden importlar birleştirildi
+from fastapi import APIRouter, Depends, HTTPException, Request # Tekrar eden importlar birleştirildi
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.database import get_async_session
 from app.models.menu_item import MenuItem
 from app.schemas.menu import MenuItemOut, MenuItemCreate, MenuItemUpdate # Tüm şemalar tek yerden import edildi
+from app.services.menu_cache import menu_cache, menu_names
 
 router = APIRouter(prefix="/menu", tags=["menu"])
 
 # Menüdeki tüm ürünleri getir (sadece mevcut olanlar)
 @router.get("/", response_model=list[MenuItemOut])
-async def get_menu_items(db: AsyncSession = Depends(get_async_session)):
+async def get_menu_items(request: Request, db: AsyncSession = Depends(get_async_session)):
     # is_available flag'i, malzeme stok durumuna göre otomatik olarak güncelleniyor.
     # Bu endpoint sadece aktif/mevcut menü öğelerini döndürür.
-    menu_items_result = await db.execute(
-        select(MenuItem).where(MenuItem.is_available == True)
-    )
-    menu_items = menu_items_result.scalars().all()
-    return menu_items
+    # Yanıt önceden serileştirilmiş snapshot'tan gelir; If-None-Match eşleşirse 304 döner.
+    return await menu_cache.response(request, db, "available")
 
 # Yeni menü öğesi oluştur
 @router.post("/", response_model=MenuItemOut)
@@ -28,8 +26,10 @@ async def create_menu_item(
     # Malzeme eklenirse ve stok yetersizse, check_and_update_menu_item_availability daha sonra onu pasif yapabilir.
     item = MenuItem(**payload.dict())
     session.add(item)
+    menu_cache.invalidate_after_commit(session)
     await session.commit()
     await session.refresh(item)
+    menu_names.set(item.id, item.name)
     return item
 
 # Menü öğesi güncelle
@@ -48,8 +48,10 @@ async def update_menu_item(
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(item, field, value)
 
+    menu_cache.invalidate_after_commit(session)
     await session.commit()
     await session.refresh(item)
+    menu_names.set(item.id, item.name)
     return item
 
 # Menü öğesi silme (İsteğe bağlı olarak eklenebilir)
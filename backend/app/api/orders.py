@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from app.core.database import get_async_session
 from app.models.order import Order, OrderStatus, OrderItem
 from app.models.menu_item import MenuItem
 from app.models.table import DiningTable, TableStatus
 from app.schemas.order import (
     OrderCreate, OrderOut, OrderItemOut, OrderSummary,
-    OrderItemSummary, OrderPaymentUpdate, OrderUpdate
+    OrderItemSummary, OrderPaymentUpdate, OrderUpdate,
+    OrderStatusBulkUpdate, OrderTransitionResult, OrderHistoryPage, CustomerStatsOut
 )
 from app.schemas.order import OrderItemUpdate
+from app.dependencies.pagination import PageParams, paginate
 from app.dependencies.auth import get_current_user, role_required
 from app.models.user import User
-from app.models.ingredient import Ingredient
-from app.models.menu_item_ingredient import MenuItemIngredient
-from app.services.menu_service import check_and_update_menu_item_availability # Yeni import
+from app.services.principal_cache import Principal
+from app.services.menu_service import availability_engine
+from app.services.stock_service import deduct_stock_for_order
+from app.services.kitchen_broker import kitchen_broker
+from app.services.order_service import bulk_transition_orders
+from app.models.customer_stats import CustomerStats, CustomerItemStats
+from app.services.menu_cache import menu_names
+from app.services.rollup_service import record_order_placed
+from app.services.table_service import add_order_to_session
+from app.services.trending import trending
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -24,7 +35,7 @@ router = APIRouter(prefix="/orders", tags=["orders"])
 async def place_order(
     payload: OrderCreate,
     db: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     table_result = await db.execute(select(DiningTable).where(DiningTable.id == payload.table_id))
     table = table_result.scalar_one_or_none()
@@ -49,90 +60,175 @@ async def place_order(
         if not mi.is_available:
             raise HTTPException(status_code=400, detail=f"'{mi.name}' ürünü şu anda siparişe kapalı.")
 
-        # ✅ Yeni sipariş oluştur
-        order = Order(
-            table_id=payload.table_id,
-            customer_id=current_user.id
-        )
-        db.add(order)
-        await db.flush()  # order.id'ye erişmek için flush
-
-        # Sipariş ürünleri ekle
-        for item in payload.items:
-            db.add(OrderItem(
-                order_id=order.id,
-                menu_item_id=item.menu_item_id,
-                quantity=item.quantity,
-                note=item.note
-            ))
-
-        # Stok güncelle ve menü öğesi uygunluğunu kontrol et
-        menu_items_to_check_availability = set()  # Tekrar eden kontrolleri önlemek için set
-        for item in payload.items:
-            ingredient_result = await db.execute(
-                select(MenuItemIngredient).where(MenuItemIngredient.menu_item_id == item.menu_item_id)
-            )
-            used_ingredients = ingredient_result.scalars().all()
-
-            for usage in used_ingredients:
-                ingredient_result = await db.execute(
-                    select(Ingredient).where(Ingredient.id == usage.ingredient_id)
-                )
-                ingredient = ingredient_result.scalar_one_or_none()
-                if ingredient:
-                    ingredient.stock_quantity -= usage.amount_used * item.quantity
-                    db.add(ingredient)  # Değişikliği session'a ekle
-
-            menu_items_to_check_availability.add(item.menu_item_id)  # Bu menü öğesinin stok durumunu kontrol etmeliyiz
-
-        # Tüm stok güncellemeleri yapıldıktan sonra menü öğelerinin uygunluğunu kontrol et
-        for menu_item_id in menu_items_to_check_availability:
-            await check_and_update_menu_item_availability(db, menu_item_id)
+    # ✅ Yeni sipariş oluştur (fiyatlar ve toplam sipariş anında sabitlenir)
+    now = datetime.utcnow()
+    order = Order(
+        table_id=payload.table_id,
+        customer_id=current_user.id,
+        created_at=now,
+        received_at=now,
+        total_amount=sum(menu_items[i.menu_item_id].price * i.quantity for i in payload.items),
+        session_id=table.current_session_id
+    )
+    db.add(order)
+    await db.flush()  # order.id'ye erişmek için flush
+    if order.session_id is not None and not await add_order_to_session(db, order.session_id, order.total_amount):
+        # Müşteri sipariş sırasında masadan kalktı (oturum kapandı)
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Masa oturumu kapandı, sipariş alınamadı.")
+
+    # Sipariş ürünleri ekle
+    for item in payload.items:
+        db.add(OrderItem(
+            order_id=order.id,
+            menu_item_id=item.menu_item_id,
+            quantity=item.quantity,
+            note=item.note,
+            unit_price=menu_items[item.menu_item_id].price
+        ))
 
-        await db.commit()  # Tüm değişiklikleri (order, order_items, ingredient stock, menu_item availability) tek bir işlemde commit et
-        await db.refresh(order)
+    # Stok düşümü: tüm satırlar tek bir koşullu UPDATE ile düşülür.
+    # Herhangi bir malzeme eksiye düşecekse sipariş bütünüyle reddedilir.
+    deducted_ingredient_ids, short_ingredient_ids = await deduct_stock_for_order(
+        db, [(item.menu_item_id, item.quantity) for item in payload.items]
+    )
+    if short_ingredient_ids:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Yetersiz stok nedeniyle sipariş alınamadı.")
 
-    # Sipariş ürünlerini getir
-    item_stmt = select(OrderItem).where(OrderItem.order_id == order.id)
-    item_result = await db.execute(item_stmt)
-    items = item_result.scalars().all()
+    # Düşülen malzemeleri kullanan tüm menü öğelerinin uygunluğunu tek seferde güncelle
+    await availability_engine.recompute(db, ingredient_ids=deducted_ingredient_ids)
 
+    # Sipariş payload'dan oluşturulur; commit sonrası mutfak ekranlarına yayınlanır
     name_map = {id: m.name for id, m in menu_items.items()}
-
-    return OrderOut(
+    order_out = OrderOut(
         id=order.id,
         table_id=order.table_id,
-        status=order.status.value,
+        status=OrderStatus.RECEIVED.value,
         items=[
             OrderItemOut(name=name_map[i.menu_item_id], quantity=i.quantity)
-            for i in items
-        ]
+            for i in payload.items
+        ],
+        version=order.version
     )
+    kitchen_broker.order_added_after_commit(db, order_out)
+    trending.record_after_commit(db, [(i.menu_item_id, i.quantity) for i in payload.items])
 
+    # Rapor rollup'ları aynı transaction içinde güncellenir
+    await record_order_placed(db, order.created_at, [
+        (i.menu_item_id, i.quantity, menu_items[i.menu_item_id].price) for i in payload.items
+    ], customer_id=current_user.id)
 
-# ✅ GET MY ORDERS → CUSTOMER siparişleri (DÜZELTİLDİ)
-@router.get("/my-orders", response_model=list[OrderSummary], dependencies=[Depends(role_required(["CUSTOMER"]))])
-async def get_my_orders(db: AsyncSession = Depends(get_async_session), user: User = Depends(get_current_user)):
-    orders_result = await db.execute(select(Order).where(Order.customer_id == user.id))
-    orders = orders_result.scalars().all()
+    await db.commit()  # Tüm değişiklikleri (order, order_items, ingredient stock, menu_item availability) tek bir işlemde commit et
+
+    return order_out
+
+
+# ✅ GET MY ORDERS → CUSTOMER sipariş geçmişi
+# Sayfa başına iki sorgu: siparişler (keyset) + bu siparişlerin satırları ve ürün isimleri.
+# include_stats=true ise müşteri özeti önceden toplanmış customer_stats tablolarından eklenir.
+@router.get("/my-orders", response_model=OrderHistoryPage, dependencies=[Depends(role_required(["CUSTOMER"]))])
+async def get_my_orders(
+    status: OrderStatus | None = Query(None),
+    is_paid: bool | None = Query(None),
+    include_stats: bool = Query(False),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_current_user)
+):
+    # En yeni siparişler önce; ix_orders_customer_created üzerinden sayfalanır
+    stmt = select(
+        Order.id, Order.table_id, Order.status, Order.created_at, Order.total_amount
+    ).where(Order.customer_id == user.id)
+    if status is not None:
+        stmt = stmt.where(Order.status == status)
+    if is_paid is not None:
+        stmt = stmt.where(Order.is_paid == is_paid)
+    order_page = await paginate(db, stmt, page, keys=(Order.created_at, Order.id), descending=True)
+    orders = order_page["items"]
+
+    lines_by_order = {order["id"]: [] for order in orders}
+    if orders:
+        line_rows = await db.execute(
+            select(
+                OrderItem.order_id, MenuItem.name, OrderItem.quantity,
+                func.coalesce(OrderItem.unit_price, MenuItem.price)
+            )
+            .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            .where(OrderItem.order_id.in_(lines_by_order))
+            .order_by(OrderItem.id)
+        )
+        for order_id, name, quantity, unit_price in line_rows.all():
+            lines_by_order[order_id].append((name, quantity, unit_price))
 
     summaries = []
     for order in orders:
-        item_result = await db.execute(select(OrderItem).where(OrderItem.order_id == order.id))
-        order_items = item_result.scalars().all()
-
-        item_summary = [
-            OrderItemSummary(
-                name=(await db.execute(select(MenuItem.name).where(MenuItem.id == i.menu_item_id))).scalar_one(),
-                quantity=i.quantity
-            ) for i in order_items
-        ]
-
+        lines = lines_by_order[order["id"]]
+        total_amount = order["total_amount"]
+        if total_amount is None:  # toplamı sabitlenmemiş eski sipariş
+            total_amount = sum(quantity * unit_price for _, quantity, unit_price in lines)
         summaries.append(OrderSummary(
-            id=order.id,
-            table_id=order.table_id,
-            status=order.status.value,
-            items=item_summary
+            id=order["id"],
+            table_id=order["table_id"],
+            status=order["status"].value,
+            created_at=order["created_at"],
+            total_amount=total_amount,
+            items=[OrderItemSummary(name=name, quantity=quantity) for name, quantity, _ in lines]
         ))
 
-    return summaries
+    return {
+        "items": summaries,
+        "next_cursor": order_page["next_cursor"],
+        "stats": await _customer_stats(db, user.id) if include_stats else None
+    }
+
+
+FAVOURITE_ITEMS_LIMIT = 5
+
+
+async def _customer_stats(db: AsyncSession, customer_id: int) -> CustomerStatsOut:
+    stats = await db.get(CustomerStats, customer_id)
+    if stats is None:
+        return CustomerStatsOut()
+
+    favourites = (await db.execute(
+        select(CustomerItemStats.menu_item_id, CustomerItemStats.quantity)
+        .where(CustomerItemStats.customer_id == customer_id)
+        .order_by(CustomerItemStats.quantity.desc(), CustomerItemStats.menu_item_id)
+        .limit(FAVOURITE_ITEMS_LIMIT)
+    )).all()
+    names = await menu_names.get_many(db, [menu_item_id for menu_item_id, _ in favourites])
+
+    return CustomerStatsOut(
+        orders_count=stats.orders_count,
+        items_count=stats.items_count,
+        lifetime_spend=stats.lifetime_spend,
+        first_order_at=stats.first_order_at,
+        last_order_at=stats.last_order_at,
+        favourite_items=[
+            {"menu_item_id": menu_item_id, "name": names.get(menu_item_id), "quantity": quantity}
+            for menu_item_id, quantity in favourites
+        ]
+    )
+
+
+# ✅ TOPLU DURUM GEÇİŞİ (KITCHEN / WAITER / MANAGER)
+# Örn: {"status": "READY", "orders": [{"id": 12, "version": 1}, ...]}
+# Tek bir koşullu UPDATE çalışır; her sipariş için başarı veya çakışma nedeni döner.
+@router.post("/status", response_model=list[OrderTransitionResult],
+             dependencies=[Depends(role_required(["KITCHEN", "WAITER", "MANAGER"]))])
+async def bulk_update_order_status(
+    payload: OrderStatusBulkUpdate,
+    db: AsyncSession = Depends(get_async_session)
+):
+    target = OrderStatus(payload.status.value)
+    results = await bulk_transition_orders(
+        db, target, [(ref.id, ref.version) for ref in payload.orders]
+    )
+
+    for result in results:
+        if result.success:
+            kitchen_broker.status_changed_after_commit(db, result.id, result.status, result.version)
+
+    await db.commit()
+    return results
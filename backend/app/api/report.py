@@ -1,146 +1,222 @@
-from fastapi import APIRouter, Depends
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
-from app.schemas.report import PopularItem
+from app.core.database import get_read_session
 from app.dependencies.auth import role_required
-from sqlalchemy import func
-from app.schemas.report import ReportSummary
-from app.models.order import Order, OrderItem
+from app.schemas.report import (
+    PopularItem, ReportSummary, PaymentSummary, DailySummary, TrendingItem, PrepLatencyReport,
+    TableTurnoverReport, StaffingForecast
+)
 from app.models.menu_item import MenuItem
-
+from app.models.sales_rollup import HourlySales, DailyItemSales, DailyPaymentSales
+from app.models.order import OrderStatus
+from app.schemas.order import OrderStatusEnum
+from app.services.rollup_service import hour_bucket
+from app.services.export_service import order_lines_query, iter_csv, iter_ndjson
+from app.services.menu_cache import menu_names
+from app.services.trending import trending
+from app.services.latency_service import prep_latency_report
+from app.services.table_service import turnover_report
+from app.services.forecast_service import staffing_forecast, DEFAULT_HISTORY_WEEKS, DEFAULT_ALPHA
+
+# Tüm raporlar rollup tablolarından okunur (rollup_service): maliyet sipariş satırı
+# sayısıyla değil, aralıktaki saat/gün sayısıyla orantılıdır.
+# Tarih filtreleri saat hassasiyetindedir (başlangıç saat başına yuvarlanır).
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
-from datetime import datetime
-from fastapi import Query
+# Gecikme analizinde sipariş satırları belleğe alınır; pencereyi sınırlı tut
+MAX_LATENCY_WINDOW = timedelta(days=31)
+MAX_TURNOVER_WINDOW = timedelta(days=92)
+
+
+def _hour_range(stmt, start_date: datetime | None, end_date: datetime | None):
+    if start_date and end_date:
+        stmt = stmt.where(HourlySales.hour >= hour_bucket(start_date), HourlySales.hour <= end_date)
+    return stmt
+
 
 @router.get("/summary", response_model=ReportSummary, dependencies=[Depends(role_required(["MANAGER"]))])
 async def get_report_summary(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_session),
     start_date: datetime = Query(None),
     end_date: datetime = Query(None)
 ):
-    # Sipariş sorgusuna tarih aralığı filtresi uygula
-    order_query = select(Order)
-    item_query = (
+    result = await db.execute(_hour_range(
         select(
-            func.sum(OrderItem.quantity),
-            func.sum(OrderItem.quantity * MenuItem.price)
-        ).join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
-    )
-
-    if start_date and end_date:
-        order_query = order_query.where(Order.created_at >= start_date, Order.created_at <= end_date)
-        item_query = item_query.where(OrderItem.created_at >= start_date, OrderItem.created_at <= end_date)
-
-    # Sipariş sayısı
-    order_count_result = await db.execute(order_query.with_only_columns(func.count()))
-    total_orders = order_count_result.scalar()
-
-    # Ürün sayısı ve ciro
-    revenue_result = await db.execute(item_query)
-    total_items_sold, total_revenue = revenue_result.one()
+            func.sum(HourlySales.orders_count),
+            func.sum(HourlySales.items_sold),
+            func.sum(HourlySales.revenue),
+        ),
+        start_date, end_date
+    ))
+    total_orders, total_items_sold, total_revenue = result.one()
 
     return ReportSummary(
         total_orders=total_orders or 0,
         total_items_sold=total_items_sold or 0,
-        total_revenue=round(total_revenue or 0.0, 2)
+        total_revenue=round(float(total_revenue or 0), 2)
     )
 
+
 @router.get("/popular-items", response_model=list[PopularItem], dependencies=[Depends(role_required(["MANAGER"]))])
 async def get_popular_items(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_session),
     start_date: datetime = Query(None),
     end_date: datetime = Query(None)
 ):
+    total_quantity = func.sum(DailyItemSales.quantity)
     query = (
-        select(MenuItem.name, func.sum(OrderItem.quantity).label("total_quantity"))
-        .join(OrderItem, MenuItem.id == OrderItem.menu_item_id)
-        .join(Order, Order.id == OrderItem.order_id)
+        select(MenuItem.name, total_quantity.label("total_quantity"))
+        .join(MenuItem, MenuItem.id == DailyItemSales.menu_item_id)
         .group_by(MenuItem.name)
-        .order_by(func.sum(OrderItem.quantity).desc())
+        .order_by(total_quantity.desc())
     )
 
     if start_date and end_date:
-        query = query.where(Order.created_at >= start_date, Order.created_at <= end_date)
+        query = query.where(DailyItemSales.day >= start_date.date(), DailyItemSales.day <= end_date.date())
 
     result = await db.execute(query)
-    rows = result.all()
 
     return [
         PopularItem(name=name, total_quantity=qty)
-        for name, qty in rows
+        for name, qty in result.all()
     ]
 
-from app.schemas.report import PaymentSummary
-from app.models.order import Order
-from sqlalchemy import func
+
+# Son 15 dakika / 1 saat / bugün en çok satanlar (bellek içi sayaçtan, sorgusuz).
+# Misafir menüsünde de gösterildiği için rol gerektirmez.
+@router.get("/trending", response_model=list[TrendingItem])
+async def get_trending_items(
+    window: Literal["15m", "1h", "today"] = Query("1h"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_session)
+):
+    top = trending.top(window, limit)
+    names = await menu_names.get_many(db, {menu_item_id for menu_item_id, _ in top})
+    return [
+        TrendingItem(menu_item_id=menu_item_id, name=names.get(menu_item_id, ""), quantity=quantity)
+        for menu_item_id, quantity in top
+    ]
+
+
+# Mutfak hazırlama süresi (alındı → hazır) yüzdelikleri: saat, masa ve ürün bazında
+@router.get("/prep-latency", response_model=PrepLatencyReport, dependencies=[Depends(role_required(["MANAGER"]))])
+async def get_prep_latency(
+    db: AsyncSession = Depends(get_read_session),
+    start_date: datetime = Query(None),
+    end_date: datetime = Query(None)
+):
+    end_date = end_date or datetime.utcnow()
+    start_date = start_date or end_date - timedelta(days=7)
+    if end_date < start_date or end_date - start_date > MAX_LATENCY_WINDOW:
+        raise HTTPException(status_code=400, detail="Tarih aralığı en fazla 31 gün olabilir.")
+
+    return await prep_latency_report(db, start_date, end_date)
+
+
+# Masa devri ve oturma süresi: aralıkta kapanan masa oturumlarından (table_sessions)
+@router.get("/table-turnover", response_model=TableTurnoverReport, dependencies=[Depends(role_required(["MANAGER"]))])
+async def get_table_turnover(
+    db: AsyncSession = Depends(get_read_session),
+    start_date: datetime = Query(None),
+    end_date: datetime = Query(None)
+):
+    end_date = end_date or datetime.utcnow()
+    start_date = start_date or end_date - timedelta(days=7)
+    if end_date < start_date or end_date - start_date > MAX_TURNOVER_WINDOW:
+        raise HTTPException(status_code=400, detail="Tarih aralığı en fazla 92 gün olabilir.")
+
+    return await turnover_report(db, start_date, end_date)
+
+
+# Personel önerisi: saatlik sipariş rollup'ından gün × saat talep tahmini (forecast_service)
+@router.get("/staffing-forecast", response_model=StaffingForecast, dependencies=[Depends(role_required(["MANAGER"]))])
+async def get_staffing_forecast(
+    db: AsyncSession = Depends(get_read_session),
+    history_weeks: int = Query(DEFAULT_HISTORY_WEEKS, ge=1, le=156),
+    alpha: float = Query(DEFAULT_ALPHA, gt=0, le=1)
+):
+    return await staffing_forecast(db, datetime.utcnow(), history_weeks=history_weeks, alpha=alpha)
+
 
 @router.get("/payment-summary", response_model=PaymentSummary, dependencies=[Depends(role_required(["MANAGER"]))])
-async def get_payment_summary(db: AsyncSession = Depends(get_db)):
-    # Toplam ödenmiş sipariş
-    paid_orders_result = await db.execute(
-        select(func.count()).select_from(Order).where(Order.is_paid == True)
+async def get_payment_summary(db: AsyncSession = Depends(get_read_session)):
+    # Toplam ödenmiş sipariş ve gelir
+    totals_result = await db.execute(
+        select(func.sum(DailyPaymentSales.paid_orders), func.sum(DailyPaymentSales.revenue))
     )
-    total_paid_orders = paid_orders_result.scalar()
-
-    # Toplam gelir
-    revenue_result = await db.execute(
-        select(func.sum(OrderItem.quantity * MenuItem.price))
-        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
-        .join(Order, Order.id == OrderItem.order_id)
-        .where(Order.is_paid == True)
-    )
-    total_revenue = revenue_result.scalar() or 0.0
+    total_paid_orders, total_revenue = totals_result.one()
 
     # Ödeme yöntemine göre dağılım
     method_result = await db.execute(
-        select(Order.payment_method, func.count())
-        .where(Order.is_paid == True)
-        .group_by(Order.payment_method)
+        select(DailyPaymentSales.payment_method, func.sum(DailyPaymentSales.paid_orders))
+        .group_by(DailyPaymentSales.payment_method)
     )
     breakdown = {method: count for method, count in method_result.all()}
 
     return PaymentSummary(
         total_paid_orders=total_paid_orders or 0,
-        total_revenue=round(total_revenue, 2),
+        total_revenue=round(float(total_revenue or 0), 2),
         payment_method_breakdown=breakdown
     )
 
-from app.schemas.report import DailySummary
-from sqlalchemy import cast, Date
 
 @router.get("/daily-summary", response_model=list[DailySummary], dependencies=[Depends(role_required(["MANAGER"]))])
 async def get_daily_summary(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_session),
     start_date: datetime = Query(...),
     end_date: datetime = Query(...)
 ):
-    result = await db.execute(
-        select(
-            cast(Order.created_at, Date).label("order_date"),
-            func.count(Order.id),
-            func.sum(OrderItem.quantity * MenuItem.price)
-        )
-        .join(OrderItem, Order.id == OrderItem.order_id)
-        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
-        .where(
-            Order.is_paid == True,
-            Order.created_at >= start_date,
-            Order.created_at <= end_date
-        )
-        .group_by("order_date")
-        .order_by("order_date")
-    )
-
-    rows = result.all()
+    # Ödenmiş siparişlerin günlük toplamı; aralıktaki saatlik satırlar güne toplanır
+    result = await db.execute(_hour_range(
+        select(HourlySales.hour, HourlySales.paid_orders, HourlySales.paid_revenue)
+        .where(HourlySales.paid_orders > 0)
+        .order_by(HourlySales.hour),
+        start_date, end_date
+    ))
+
+    days = defaultdict(lambda: [0, 0.0])
+    for hour, paid_orders, paid_revenue in result.all():
+        day = days[hour.date()]
+        day[0] += paid_orders
+        day[1] += float(paid_revenue or 0)
 
     return [
-        DailySummary(
-            date=str(r[0]),
-            total_orders=r[1],
-            total_revenue=round(r[2] or 0.0, 2)
-        )
-        for r in rows
+        DailySummary(date=str(day), total_orders=orders, total_revenue=round(revenue, 2))
+        for day, (orders, revenue) in days.items()
     ]
+
+
+# Muhasebe dökümü: sipariş satırları CSV veya NDJSON olarak akıtılır (sabit bellek)
+@router.get("/export/order-lines", dependencies=[Depends(role_required(["MANAGER"]))])
+async def export_order_lines(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    start_date: datetime = Query(None),
+    end_date: datetime = Query(None),
+    status: OrderStatusEnum = Query(None),
+    is_paid: bool = Query(None)
+):
+    stmt = order_lines_query(
+        start_date=start_date,
+        end_date=end_date,
+        status=OrderStatus(status.value) if status else None,
+        is_paid=is_paid,
+    )
+    stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    if format == "ndjson":
+        body, media_type = iter_ndjson(stmt), "application/x-ndjson"
+    else:
+        body, media_type = iter_csv(stmt), "text/csv; charset=utf-8"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="order-lines-{stamp}.{format}"'}
+    )
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.core.database import get_async_session
+from app.models.reservation import Reservation
+from app.schemas.reservation import (
+    ReservationCreate, ReservationOut, AvailabilitySearch, SlotSuggestion, ReservationStatus
+)
+from app.schemas.pagination import Page
+from app.dependencies.pagination import PageParams, paginate
+from app.dependencies.auth import get_current_user, role_required
+from app.services.principal_cache import Principal
+from app.services.floor_plan import floor_plan
+from app.services.reservation_service import reservation_index, book, cancel, as_utc
+
+router = APIRouter(prefix="/reservations", tags=["reservations"])
+
+STAFF_ROLES = ("WAITER", "MANAGER")
+
+# Müsaitlik araması bellekteki indeks (reservation_index) ve kat planı üzerinden yapılır,
+# veritabanına sorgu atmaz. Rezervasyon oluştururken çakışma veritabanında tekrar kontrol edilir.
+
+
+async def _bookable_tables(db: AsyncSession) -> list[dict]:
+    await floor_plan.ensure_loaded(db)
+    await reservation_index.ensure_loaded(db)
+    return [table for table in floor_plan.snapshot() if table["status"] != "CLOSED"]
+
+
+def _validate_start(starts_at: datetime) -> datetime:
+    starts_at = as_utc(starts_at)
+    if starts_at < datetime.utcnow():
+        raise HTTPException(status_code=400, detail="Geçmiş bir saate rezervasyon yapılamaz.")
+    return starts_at
+
+
+# GET /reservations/search?party_size=6&starts_at=...&duration_minutes=120
+@router.get("/search", response_model=AvailabilitySearch)
+async def search_availability(
+    party_size: int = Query(..., ge=1),
+    starts_at: datetime = Query(...),
+    duration_minutes: int = Query(120, ge=15, le=480),
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_current_user)
+):
+    starts_at = _validate_start(starts_at)
+    duration = timedelta(minutes=duration_minutes)
+    tables = await _bookable_tables(db)
+
+    found = reservation_index.find_tables(tables, party_size, starts_at, starts_at + duration, limit=limit)
+    suggestions = []
+    if not found:
+        suggestions = [
+            SlotSuggestion(starts_at=start, ends_at=start + duration, table=table)
+            for start, table in reservation_index.suggest(tables, party_size, starts_at, duration, limit=limit)
+            if start >= datetime.utcnow()
+        ]
+    return {
+        "party_size": party_size,
+        "starts_at": starts_at,
+        "ends_at": starts_at + duration,
+        "tables": found,
+        "suggestions": suggestions,
+    }
+
+
+# POST /reservations
+@router.post("/", response_model=ReservationOut, status_code=201)
+async def create_reservation(
+    payload: ReservationCreate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_current_user)
+):
+    starts_at = _validate_start(payload.starts_at)
+    ends_at = starts_at + timedelta(minutes=payload.duration_minutes)
+    # Müşteri kendi adına, personel misafir adına rezervasyon yapar
+    customer_id = current_user.id if current_user.role.value == "CUSTOMER" else None
+
+    if payload.table_id is not None:
+        candidates = [payload.table_id]
+    else:
+        tables = await _bookable_tables(db)
+        candidates = [
+            table["id"] for table in reservation_index.find_tables(tables, payload.party_size, starts_at, ends_at)
+        ]
+        if not candidates:
+            raise HTTPException(status_code=409, detail="Bu saatte uygun masa yok.")
+
+    # İndeks eskiyse (ör. eşzamanlı rezervasyon) veritabanı çakışma bildirir; sıradaki masa denenir
+    for table_id in candidates:
+        reservation, reason = await book(
+            db, table_id, payload.party_size, starts_at, ends_at,
+            customer_id=customer_id, guest_name=payload.guest_name,
+        )
+        if reservation is not None:
+            await db.commit()
+            return reservation
+        if payload.table_id is None:
+            # Otomatik seçimde kat planı eskiyse (masa kapandı/silindi) sıradaki masa denenir
+            continue
+        if reason == "table_not_found":
+            raise HTTPException(status_code=404, detail="Masa bulunamadı.")
+        if reason == "closed":
+            raise HTTPException(status_code=400, detail="Masa kapalı, rezervasyon yapılamaz.")
+        if reason == "too_small":
+            raise HTTPException(status_code=400, detail="Masa bu kişi sayısı için yeterli değil.")
+
+    await db.rollback()
+    raise HTTPException(status_code=409, detail="Masa bu saat aralığında dolu.")
+
+
+# GET /reservations (personel): zaman aralığı ve masaya göre, başlangıca göre sıralı
+@router.get("/", response_model=Page[ReservationOut], dependencies=[Depends(role_required(list(STAFF_ROLES)))])
+async def list_reservations(
+    start: datetime | None = Query(None),
+    end: datetime | None = Query(None),
+    table_id: int | None = Query(None),
+    status: ReservationStatus | None = Query(ReservationStatus.BOOKED),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_session)
+):
+    stmt = select(Reservation)
+    if start is not None:
+        stmt = stmt.where(Reservation.ends_at > as_utc(start))
+    if end is not None:
+        stmt = stmt.where(Reservation.starts_at < as_utc(end))
+    if table_id is not None:
+        stmt = stmt.where(Reservation.table_id == table_id)
+    if status is not None:
+        stmt = stmt.where(Reservation.status == status.value)
+    return await paginate(db, stmt, page, keys=(Reservation.starts_at, Reservation.id))
+
+
+# DELETE /reservations/{id}: personel veya rezervasyonun sahibi iptal eder
+@router.delete("/{reservation_id}", status_code=204)
+async def cancel_reservation(
+    reservation_id: int,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(get_current_user)
+):
+    owner = (await db.execute(
+        select(Reservation.customer_id).where(Reservation.id == reservation_id)
+    )).first()
+    if owner is None:
+        raise HTTPException(status_code=404, detail="Rezervasyon bulunamadı.")
+    if current_user.role.value not in STAFF_ROLES and owner.customer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok.")
+
+    if not await cancel(db, reservation_id):
+        raise HTTPException(status_code=409, detail="Rezervasyon zaten iptal edilmiş.")
+    await db.commit()
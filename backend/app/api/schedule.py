@@ -1,34 +1,128 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.database import get_async_session  # düzeltildi
-from app.schemas.schedule import ScheduleCreate, ScheduleOut
+from app.schemas.schedule import ScheduleCreate, ScheduleOut, RosterCreate, RosterResult, ScheduleConflict
+from app.schemas.pagination import Page
+from app.dependencies.pagination import PageParams, paginate
 from app.models.schedule import Schedule
 from app.dependencies.auth import role_required, get_current_user
 from app.models.user import User
+from app.services.principal_cache import Principal
+from app.services.schedule_service import find_conflicts, create_roster
 
 router = APIRouter(prefix="/schedule", tags=["schedule"])
 
+# Liste sorguları her zaman bir tarih aralığıyla sınırlıdır (ix_schedules_user_date)
+MAX_SCHEDULE_WINDOW = timedelta(days=92)
+DEFAULT_LIST_WINDOW = timedelta(days=6)
+DEFAULT_MY_WINDOW = timedelta(days=13)
+
+
+def _date_range(start_date: date | None, end_date: date | None, default: timedelta) -> tuple[date, date]:
+    if start_date is None and end_date is None:
+        start_date = date.today()
+    start_date = start_date or end_date - default
+    end_date = end_date or start_date + default
+    if end_date < start_date or end_date - start_date > MAX_SCHEDULE_WINDOW:
+        raise HTTPException(status_code=400, detail="Tarih aralığı en fazla 92 gün olabilir.")
+    return start_date, end_date
+
+
+def _check_shift(shift: ScheduleCreate) -> None:
+    if shift.start_time == shift.end_time:
+        raise HTTPException(status_code=400, detail="Vardiya başlangıç ve bitiş saati aynı olamaz.")
+
+
+def _conflict_error(overlaps: list[tuple[dict, dict]]) -> HTTPException:
+    conflicts = [
+        ScheduleConflict(user_id=first["user_id"], first=first, second=second).model_dump(mode="json")
+        for first, second in overlaps
+    ]
+    return HTTPException(status_code=409, detail={"message": "Çakışan vardiyalar var.", "conflicts": conflicts})
+
+
 @router.post("/", response_model=ScheduleOut, dependencies=[Depends(role_required(["MANAGER"]))])
 async def create_schedule(
     payload: ScheduleCreate,
     db: AsyncSession = Depends(get_async_session)  # düzeltildi
 ):
+    _check_shift(payload)
+    # Personel satırı kilitlenir: aynı personele eşzamanlı vardiya/plan eklemeleri sırayla kontrol edilir
+    locked = (await db.execute(select(User.id).where(User.id == payload.user_id).with_for_update())).scalar()
+    if locked is None:
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    overlaps = await find_conflicts(db, [payload.dict()])
+    if overlaps:
+        await db.rollback()
+        raise _conflict_error(overlaps)
+
     schedule = Schedule(**payload.dict())
     db.add(schedule)
     await db.commit()
     await db.refresh(schedule)
     return schedule
 
-@router.get("/", response_model=list[ScheduleOut], dependencies=[Depends(role_required(["MANAGER"]))])
-async def list_all_schedules(db: AsyncSession = Depends(get_async_session)):  # düzeltildi
-    result = await db.execute(select(Schedule))
-    return result.scalars().all()
+# Haftalık plan: tüm personelin bir haftalık vardiyaları tek transaction'da.
+# Çakışma (kayıtlı vardiyalarla veya kendi içinde) varsa hiçbir vardiya eklenmez.
+@router.post("/roster", response_model=RosterResult, status_code=201, dependencies=[Depends(role_required(["MANAGER"]))])
+async def create_weekly_roster(
+    payload: RosterCreate,
+    db: AsyncSession = Depends(get_async_session)
+):
+    week_end = payload.week_start + timedelta(days=6)
+    for shift in payload.shifts:
+        _check_shift(shift)
+        if not payload.week_start <= shift.work_date <= week_end:
+            raise HTTPException(status_code=400, detail="Vardiya tarihi haftanın dışında.")
+
+    user_ids = {shift.user_id for shift in payload.shifts}
+    # Personel satırları id sırasıyla kilitlenir: çakışma kontrolü ile INSERT arasına
+    # aynı personel için başka bir plan veya vardiya giremez
+    found = set((await db.execute(
+        select(User.id).where(User.id.in_(user_ids)).order_by(User.id).with_for_update()
+    )).scalars().all())
+    if found != user_ids:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail=f"Kullanıcı bulunamadı: {sorted(user_ids - found)}")
+
+    created, replaced, overlaps = await create_roster(
+        db, payload.week_start, [shift.dict() for shift in payload.shifts], replace=payload.replace
+    )
+    if overlaps:
+        await db.rollback()
+        raise _conflict_error(overlaps)
+
+    await db.commit()
+    return {"week_start": payload.week_start, "created": created, "replaced": replaced}
+
+@router.get("/", response_model=Page[ScheduleOut], dependencies=[Depends(role_required(["MANAGER"]))])
+async def list_all_schedules(
+    user_id: int | None = Query(None),
+    start_date: date | None = Query(None, description="Varsayılan: bugün"),
+    end_date: date | None = Query(None, description="Varsayılan: başlangıçtan 6 gün sonra"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_session)  # düzeltildi
+):
+    start_date, end_date = _date_range(start_date, end_date, DEFAULT_LIST_WINDOW)
+    stmt = select(Schedule).where(Schedule.work_date.between(start_date, end_date))
+    if user_id is not None:
+        stmt = stmt.where(Schedule.user_id == user_id)
+    return await paginate(db, stmt, page, keys=(Schedule.work_date, Schedule.id))
 
 @router.get("/me", response_model=list[ScheduleOut])
 async def get_my_schedule(
+    start_date: date | None = Query(None, description="Varsayılan: bugün"),
+    end_date: date | None = Query(None, description="Varsayılan: başlangıçtan 13 gün sonra"),
     db: AsyncSession = Depends(get_async_session),  # düzeltildi
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ):
-    result = await db.execute(select(Schedule).where(Schedule.user_id == user.id))
+    start_date, end_date = _date_range(start_date, end_date, DEFAULT_MY_WINDOW)
+    result = await db.execute(
+        select(Schedule)
+        .where(Schedule.user_id == user.id, Schedule.work_date.between(start_date, end_date))
+        .order_by(Schedule.work_date, Schedule.start_time)
+    )
     return result.scalars().all()
@@ -1,25 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.database import get_async_session  # düzeltildi
-from app.models.table import DiningTable
+from app.models.table import DiningTable, TableStatus
 from app.schemas.table import TableCreate, TableOut, TableUpdate
-from app.dependencies.auth import get_current_user
+from app.schemas.table import TableStatus as TableStatusFilter
+from app.schemas.pagination import Page
+from app.dependencies.pagination import PageParams, paginate_list
+from app.dependencies.auth import get_current_user, role_required
 from app.models.user import User
+from app.services.principal_cache import Principal
+from app.services.events import sse_stream
+from app.services.floor_plan import floor_plan, table_state
+from app.services.table_service import seat_customer, release_table
 
 router = APIRouter(prefix="/tables", tags=["tables"])
 
+# Masa listeleri bellekteki kat planından okunur (floor_plan); masa yazan her işlem
+# commit sonrası kat planını günceller. Kat planı primary'den yüklenir (replika gecikmesi
+# eski durumu bellekte tutmasın).
+
 # GET /tables
-@router.get("/", response_model=list[TableOut])
-async def list_tables(db: AsyncSession = Depends(get_async_session)):
-    result = await db.execute(select(DiningTable))
-    return result.scalars().all()
+@router.get("/", response_model=Page[TableOut])
+async def list_tables(
+    status: TableStatusFilter | None = Query(None),
+    min_seats: int | None = Query(None, ge=1),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_session)
+):
+    await floor_plan.ensure_loaded(db)
+    tables = floor_plan.snapshot()
+    if status is not None:
+        tables = [table for table in tables if table["status"] == status.value]
+    if min_seats is not None:
+        tables = [table for table in tables if (table["seats"] or 0) >= min_seats]
+    return paginate_list(tables, page, key=lambda table: (table["id"],))
+
+# Garson ekranları için canlı kat planı (Server-Sent Events).
+# Önce tüm masalar "snapshot" olayı olarak gönderilir, ardından commit edildikçe
+# "table_changed" / "table_removed" olayları iletilir.
+@router.get("/stream", dependencies=[Depends(role_required(["WAITER", "MANAGER"]))])
+async def stream_floor_plan(request: Request, db: AsyncSession = Depends(get_async_session)):
+    await floor_plan.ensure_loaded(db)
+
+    # Abone olma ve snapshot alma arasında await yok; hiçbir olay kaçmaz
+    queue = floor_plan.broadcaster.subscribe()
+    snapshot = {"type": "snapshot", "data": floor_plan.snapshot()}
+
+    return StreamingResponse(
+        sse_stream(request, floor_plan.broadcaster, queue, [snapshot]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # GET /tables/{id}
 @router.get("/{table_id}", response_model=TableOut)
 async def get_table(table_id: int, db: AsyncSession = Depends(get_async_session)):
-    result = await db.execute(select(DiningTable).where(DiningTable.id == table_id))
-    table = result.scalar_one_or_none()
+    await floor_plan.ensure_loaded(db)
+    table = floor_plan.get(table_id)
     if not table:
         raise HTTPException(status_code=404, detail="Masa bulunamadı.")
     return table
@@ -29,6 +68,8 @@ async def get_table(table_id: int, db: AsyncSession = Depends(get_async_session)
 async def create_table(payload: TableCreate, db: AsyncSession = Depends(get_async_session)):
     table = DiningTable(**payload.dict())
     db.add(table)
+    await db.flush()
+    floor_plan.changed_after_commit(db, table_state(table))
     await db.commit()
     await db.refresh(table)
     return table
@@ -44,8 +85,9 @@ async def update_table(table_id: int, payload: TableUpdate, db: AsyncSession = D
     if payload.seats is not None:
         table.seats = payload.seats
     if payload.status is not None:
-        table.status = payload.status
+        table.status = TableStatus(payload.status.value)
 
+    floor_plan.changed_after_commit(db, table_state(table))
     await db.commit()
     await db.refresh(table)
     return table
@@ -58,67 +100,54 @@ async def delete_table(table_id: int, db: AsyncSession = Depends(get_async_sessi
     if not table:
         raise HTTPException(status_code=404, detail="Masa bulunamadı.")
     await db.delete(table)
+    floor_plan.removed_after_commit(db, table_id)
     await db.commit()
 
 @router.get("/me-test")
-async def test_login(user: User = Depends(get_current_user)):
+async def test_login(user: Principal = Depends(get_current_user)):
     return {
         "id": user.id,
         "email": user.email,
         "role": user.role.value
     }
 
+# Oturma/kalkma customer router'ı ile aynı servis fonksiyonlarını kullanır
 @router.post("/sit/{table_number}")
 async def sit_at_table(
     table_number: int,
     session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    table_result = await session.execute(
-        select(DiningTable).where(DiningTable.number == table_number)
-    )
-    table = table_result.scalar_one_or_none()
-
-    if not table:
+    table, reason = await seat_customer(session, table_number, current_user.id)
+    if reason == "not_found":
         raise HTTPException(status_code=404, detail="Masa bulunamadı.")
-
-    if table.status == TableStatus.OCCUPIED and table.current_user_id != current_user.id:
+    if reason == "already_here":
+        return {"message": f"Zaten Masa {table_number} üzerinde oturuyorsunuz."}
+    if reason == "occupied":
         raise HTTPException(status_code=400, detail="Bu masa başka bir müşteri tarafından kullanılıyor.")
-
-    # Eğer zaten bu kullanıcı bu masada oturuyorsa tekrar işleme gerek yok
-    if table.current_user_id == current_user.id:
-        return {"message": f"Zaten Masa {table.number} üzerinde oturuyorsunuz."}
-
-    # Masayı güncelle
-    table.status = TableStatus.OCCUPIED
-    table.current_user_id = current_user.id
+    if reason == "already_seated":
+        raise HTTPException(status_code=400, detail="Zaten başka bir masada oturuyorsunuz.")
+    if reason:
+        raise HTTPException(status_code=400, detail="Masa şu anda uygun değil.")
 
     await session.commit()
-    await session.refresh(table)
 
-    return {"message": f"Masa {table.number} üzerinde oturdunuz."}
+    return {"message": f"Masa {table['number']} üzerinde oturdunuz."}
 
 @router.post("/customer/leave/{table_number}")
 async def leave_table(
     table_number: int,
     session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    table_result = await session.execute(
-        select(DiningTable).where(DiningTable.number == table_number)
-    )
-    table = table_result.scalar_one_or_none()
-
-    if not table:
+    table, reason = await release_table(session, current_user.id, table_number)
+    if reason == "not_found":
         raise HTTPException(status_code=404, detail="Masa bulunamadı.")
-
-    if table.current_user_id != current_user.id:
+    if reason == "not_seated":
         raise HTTPException(status_code=403, detail="Bu masada siz oturmuyorsunuz.")
-
-    table.status = TableStatus.AVAILABLE
-    table.current_user_id = None
+    if reason == "unpaid":
+        raise HTTPException(status_code=400, detail="Ödenmemiş siparişiniz olduğu için kalkamazsınız.")
 
     await session.commit()
-    await session.refresh(table)
 
-    return {"message": f"Masa {table.number} boşaltıldı."}
\ No newline at end of file
+    return {"message": f"Masa {table['number']} boşaltıldı."}
@@ -6,6 +6,7 @@ from typing import List
 
 from app.core.database import get_async_session
 from app.models.user import User
+from app.services.principal_cache import Principal, principal_cache
 
 from jose import JWTError, jwt
 
@@ -18,7 +19,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_async_session)
-) -> User:
+) -> Principal:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email = payload.get("sub")
@@ -27,17 +28,29 @@ async def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Token çözümlenemedi.")
 
-    result = await db.execute(select(User).where(User.email == email))
+    # Token'daki uid ile cache'e bak; isabet olursa veritabanına hiç gidilmez.
+    user_id = payload.get("uid")
+    if user_id is not None:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+        result = await db.execute(select(User).where(User.id == user_id))
+    else:
+        # uid içermeyen eski token'lar
+        result = await db.execute(select(User).where(User.email == email))
+
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=401, detail="Kullanıcı bulunamadı.")
 
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.put(principal)
+    return principal
 
 
 # Rol kontrolü için bağımlılık
 def role_required(allowed_roles: List[str]):
-    def dependency(user: User = Depends(get_current_user)):
+    def dependency(user: Principal = Depends(get_current_user)):
         if user.role.value not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -47,6 +60,6 @@ def role_required(allowed_roles: List[str]):
     return dependency
 
 # Aktif kullanıcı kontrolü (örneğin hesabı pasifse engellemek için kullanabilirsin)
-async def get_current_active_user(user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(user: Principal = Depends(get_current_user)) -> Principal:
     # Eğer kullanıcı durum kontrolü eklenecekse buraya yazılır
     return user
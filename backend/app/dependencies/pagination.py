@@ -0,0 +1,124 @@
+import base64
+import json
+from bisect import bisect_right
+from datetime import date, datetime
+from enum import Enum
+
+from fastapi import HTTPException, Query
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PageParams:
+    """
+    Liste endpoint'leri için ortak sayfalama parametreleri.
+    `cursor` bir önceki yanıtın `next_cursor` değeridir; istemci içeriğini yorumlamaz.
+    """
+
+    def __init__(
+        self,
+        cursor: str | None = Query(None, description="Önceki sayfanın next_cursor değeri"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def encode_cursor(values: tuple) -> str:
+    raw = json.dumps([_plain(v) for v in values], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Geçersiz cursor.")
+    return values
+
+
+def _typed(column, value):
+    # JSON'dan gelen değeri kolonun Python tipine çevir (datetime/date ISO string olarak saklanır)
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type in (int, float, str):
+            return python_type(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor.")
+    return value
+
+
+def _key_of(item, keys) -> tuple:
+    if isinstance(item, dict):
+        return tuple(item[key.key] for key in keys)
+    return tuple(getattr(item, key.key) for key in keys)
+
+
+async def paginate(db: AsyncSession, stmt, params: PageParams, keys: tuple, descending: bool = False) -> dict:
+    """
+    Keyset sayfalama: sonuç `keys` kolonlarına göre (son kolon benzersiz olmalı, genelde id)
+    sıralanır ve cursor'daki anahtardan sonraki `limit` satır döner. OFFSET kullanılmadığı
+    için her sayfanın maliyeti sabittir.
+
+    Tek varlık seçen sorgularda (select(Model)) nesneler, diğerlerinde satır sözlükleri döner.
+    """
+    if params.cursor:
+        values = [_typed(key, value) for key, value in zip(keys, decode_cursor(params.cursor, len(keys)))]
+        after = tuple_(*keys) < tuple_(*values) if descending else tuple_(*keys) > tuple_(*values)
+        stmt = stmt.where(after)
+
+    stmt = stmt.order_by(*(key.desc() if descending else key for key in keys)).limit(params.limit + 1)
+    result = await db.execute(stmt)
+    if len(stmt.column_descriptions) == 1:
+        rows = result.scalars().all()
+    else:
+        rows = [dict(row._mapping) for row in result.all()]
+
+    items = rows[:params.limit]
+    has_more = len(rows) > params.limit
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(_key_of(items[-1], keys)) if has_more else None,
+    }
+
+
+def paginate_list(items: list, params: PageParams, key) -> dict:
+    """
+    Bellekteki (cache'lenmiş) ve `key`'e göre artan sıralı bir liste için aynı cursor sözleşmesi.
+    `key(item)` bir tuple döndürür.
+    """
+    start = 0
+    if params.cursor and items:
+        after = tuple(decode_cursor(params.cursor, len(key(items[0]))))
+        try:
+            start = bisect_right(items, after, key=key)
+        except TypeError:
+            raise HTTPException(status_code=400, detail="Geçersiz cursor.")
+
+    page = items[start:start + params.limit]
+    has_more = start + params.limit < len(items)
+    return {
+        "items": page,
+        "next_cursor": encode_cursor(key(page[-1])) if has_more else None,
+    }
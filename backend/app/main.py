@@ -1,12 +1,21 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from app.api import customer
-from app.core.database import engine, Base, get_async_session
+from app.core.database import (
+    engine, Base, get_async_session, AsyncSessionLocal, replica_router, create_missing_indexes
+)
 from app.schemas.menu import MenuItemOut
+from app.schemas.pagination import Page
+from app.dependencies.pagination import PageParams
 from app.models.menu_item import MenuItem
+from app.services.menu_service import availability_engine
+from app.services.menu_cache import menu_cache
+from app.services.trending import trending
+from app.services.floor_plan import floor_plan
+from app.services.reservation_service import reservation_index
 
 # FastAPI uygulaması
 app = FastAPI(
@@ -61,12 +70,35 @@ app.openapi = custom_openapi
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+
+    # Malzeme → menü öğesi ters indeksini kur
+    async with AsyncSessionLocal() as session:
+        await availability_engine.rebuild(session)
+        # Trend sayaçlarını bugünün siparişleriyle ısıt
+        await trending.warm(session)
+        # Masa durumları (kat planı) bellekte tutulur
+        await floor_plan.ensure_loaded(session)
+        # Yaklaşan rezervasyonların masa başına aralık indeksi
+        await reservation_index.ensure_loaded(session)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await replica_router.dispose()
+    await engine.dispose()
 
 # Test endpoint
-@app.get("/testmenu", response_model=list[MenuItemOut])
-async def get_menu_test(db: AsyncSession = Depends(get_async_session)):
-    result = await db.execute(select(MenuItem))
-    return result.scalars().all()
+@app.get("/testmenu", response_model=Page[MenuItemOut])
+async def get_menu_test(
+    request: Request,
+    is_available: bool | None = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_session)
+):
+    # Menü snapshot cache'i üzerinden (id sıralı), sorgu yok.
+    # ETag menü snapshot'ı + filtre + cursor'dan türetilir; If-None-Match eşleşirse 304 döner.
+    return await menu_cache.response(request, db, "all", page=page, is_available=is_available)
 
 # Tüm router'lar
 from app.api import (
@@ -77,7 +109,9 @@ from app.api import (
     table,
     inventory,
     schedule,
-    manager
+    manager,
+    report,
+    reservation
 )
 
 app.include_router(auth.router)
@@ -89,3 +123,5 @@ app.include_router(inventory.router)
 app.include_router(schedule.router)
 app.include_router(manager.router)
 app.include_router(customer.router)
+app.include_router(report.router)
+app.include_router(reservation.router)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, DateTime, Numeric, ForeignKey
+from app.core.database import Base
+
+# Müşteri bazında önceden toplanmış sipariş özetleri (rollup_service ile güncellenir).
+# Sipariş verildiği anda yazılır; sipariş geçmişi ekranındaki istatistikler buradan okunur.
+
+
+class CustomerStats(Base):
+    __tablename__ = "customer_stats"
+
+    customer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    items_count = Column(Integer, nullable=False, default=0)
+    lifetime_spend = Column(Numeric(12, 2), nullable=False, default=0)
+    first_order_at = Column(DateTime, nullable=True)
+    last_order_at = Column(DateTime, nullable=True)
+
+
+class CustomerItemStats(Base):
+    __tablename__ = "customer_item_stats"
+
+    customer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    spend = Column(Numeric(12, 2), nullable=False, default=0)
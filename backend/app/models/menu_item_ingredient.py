@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
 from app.core.database import Base
 
 class MenuItemIngredient(Base):
@@ -8,3 +8,10 @@ class MenuItemIngredient(Base):
     menu_item_id = Column(Integer, ForeignKey("menu_items.id"))
     ingredient_id = Column(Integer, ForeignKey("ingredients.id"))
     amount_used = Column(Float)  # bir ürün için gereken miktar
+
+    __table_args__ = (
+        # Stok değişiminde malzeme → menü öğesi (müsaitlik yeniden hesaplama)
+        Index("ix_menu_item_ingredients_ingredient_item", "ingredient_id", "menu_item_id"),
+        # Sipariş verilirken menü öğesi → malzemeler (stok düşme)
+        Index("ix_menu_item_ingredients_item_ingredient", "menu_item_id", "ingredient_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, String, Index, Numeric
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -13,34 +13,79 @@ class OrderStatus(PyEnum):
     PAID = "PAID"
 
 
+# İzin verilen durum geçişleri (mutfak akışı)
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.RECEIVED: {OrderStatus.PREPARING, OrderStatus.READY},
+    OrderStatus.PREPARING: {OrderStatus.READY},
+    OrderStatus.READY: {OrderStatus.PAID},
+    OrderStatus.PAID: set(),
+}
+
+# Her duruma girildiği anın yazıldığı kolon
+ORDER_STATUS_TIMESTAMPS = {
+    OrderStatus.RECEIVED: "received_at",
+    OrderStatus.PREPARING: "preparing_at",
+    OrderStatus.READY: "ready_at",
+    OrderStatus.PAID: "paid_at",
+}
+
+
 class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True)
     table_id = Column(Integer, nullable=False)
     status = Column(Enum(OrderStatus), default=OrderStatus.RECEIVED)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # rapor tarih aralıkları
     customer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     is_paid = Column(Boolean, default=False)  # 🚀 Bunu ekle !!!
+    payment_method = Column(String, nullable=True)  # "cash", "credit", "online"
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # iyimser eşzamanlılık kontrolü
+    session_id = Column(Integer, nullable=True, index=True)  # TableSession; eski siparişlerde NULL
+    # Sipariş anındaki fiyatlarla hesaplanan toplam; eski siparişlerde NULL (satırlardan hesaplanır)
+    total_amount = Column(Numeric(10, 2), nullable=True)
+
+    # Durum geçiş zamanları (UTC); mutfak hazırlama süresi analizi için
+    received_at = Column(DateTime, nullable=True)
+    preparing_at = Column(DateTime, nullable=True)
+    ready_at = Column(DateTime, nullable=True)
+    paid_at = Column(DateTime, nullable=True)
+
+
+# Masa/müşteri bazlı sipariş aramaları (hesap, masa geçmişi)
+Index("ix_orders_table_customer_paid", Order.table_id, Order.customer_id, Order.is_paid)
+# Müşterinin sipariş geçmişi (tarih sıralı)
+Index("ix_orders_customer_created", Order.customer_id, Order.created_at)
+# Açık hesap: ödenmemiş siparişler tablonun küçük bir kısmı, sadece onları indeksle
+Index(
+    "ix_orders_unpaid",
+    Order.customer_id, Order.table_id, Order.created_at,
+    postgresql_where=Order.is_paid == False,
+    sqlite_where=Order.is_paid == False,
+)
+# Mutfak kuyruğu: sadece RECEIVED siparişler
+Index(
+    "ix_orders_received",
+    Order.id,
+    postgresql_where=Order.status == OrderStatus.RECEIVED,
+    sqlite_where=Order.status == OrderStatus.RECEIVED,
+)
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     menu_item_id = Column(Integer, ForeignKey("menu_items.id"))
     quantity = Column(Integer, nullable=False)
     note = Column(String, nullable=True)
+    # Sipariş anındaki birim fiyat; sonraki menü fiyat değişiklikleri hesabı etkilemez
+    unit_price = Column(Numeric(10, 2), nullable=True)
 
     order = relationship("Order", back_populates="items")
 
-from sqlalchemy import Boolean, String
-
-payment_method = Column(String, nullable=True)       # "cash", "credit", "online"
-is_paid = Column(Boolean, default=False)
-
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import relationship
 
@@ -0,0 +1,29 @@
+from datetime import datetime
+from enum import Enum as PyEnum
+
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Index
+from app.core.database import Base
+
+
+class ReservationStatus(PyEnum):
+    BOOKED = "BOOKED"
+    CANCELLED = "CANCELLED"
+
+
+class Reservation(Base):
+    __tablename__ = "reservations"
+
+    id = Column(Integer, primary_key=True)
+    table_id = Column(Integer, ForeignKey("tables.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    guest_name = Column(String, nullable=True)
+    party_size = Column(Integer, nullable=False)
+    starts_at = Column(DateTime, nullable=False)  # UTC, [starts_at, ends_at)
+    ends_at = Column(DateTime, nullable=False)
+    status = Column(Enum(ReservationStatus), nullable=False, default=ReservationStatus.BOOKED)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Çakışma kontrolü (masa + zaman) ve başlangıçta yaklaşan rezervasyonların yüklenmesi
+Index("ix_reservations_table_starts", Reservation.table_id, Reservation.starts_at)
+Index("ix_reservations_ends", Reservation.ends_at)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey
+from app.core.database import Base
+
+# Raporlar için önceden toplanmış satış tabloları (rollup_service ile güncellenir).
+# Saat/gün sınırları siparişin created_at değerine (UTC) göredir.
+
+
+class HourlySales(Base):
+    __tablename__ = "sales_hourly"
+
+    hour = Column(DateTime, primary_key=True)  # saat başı, örn. 2026-01-01 12:00
+    orders_count = Column(Integer, nullable=False, default=0)
+    items_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+    paid_orders = Column(Integer, nullable=False, default=0)
+    paid_revenue = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+class DailyItemSales(Base):
+    __tablename__ = "sales_item_daily"
+
+    day = Column(Date, primary_key=True)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+class DailyPaymentSales(Base):
+    __tablename__ = "sales_payment_daily"
+
+    day = Column(Date, primary_key=True)
+    payment_method = Column(String, primary_key=True)  # "cash", "credit", "online", "unknown"
+    paid_orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
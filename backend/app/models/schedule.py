@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, Time, ForeignKey
+from sqlalchemy import Column, Integer, Date, Time, ForeignKey, Index
 from app.core.database import Base
 
 class Schedule(Base):
@@ -9,3 +9,7 @@ class Schedule(Base):
     work_date = Column(Date, nullable=False)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
+
+
+# Personel/tarih aralığı sorguları (/schedule/me, liste filtreleri, çakışma kontrolü)
+Index("ix_schedules_user_date", Schedule.user_id, Schedule.work_date)
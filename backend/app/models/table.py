@@ -2,7 +2,7 @@
 
 from app.core.database import Base
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, Enum, ForeignKey
+from sqlalchemy import Column, Integer, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 class TableStatus(PyEnum):
@@ -21,4 +21,9 @@ class DiningTable(Base):
 
     current_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     current_user = relationship("User")
+    current_session_id = Column(Integer, nullable=True)  # açık TableSession (table_sessions.id)
+
+
+# Bir müşteri aynı anda tek masada oturabilir (NULL'lar serbest)
+Index("uq_tables_current_user_id", DiningTable.current_user_id, unique=True)
 
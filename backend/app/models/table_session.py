@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, DateTime, Numeric, ForeignKey, Index
+from app.core.database import Base
+
+
+class TableSession(Base):
+    """
+    Bir masada oturulan süre: müşteri oturunca açılır, kalkınca kapanır.
+    Siparişler oturuma bağlanır; ödenmemiş sipariş sayısı ve açık bakiye burada
+    tutulduğu için kalk/öde kontrolleri sipariş geçmişini taramaz (table_service).
+    """
+    __tablename__ = "table_sessions"
+
+    id = Column(Integer, primary_key=True)
+    table_id = Column(Integer, ForeignKey("tables.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    opened_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    closed_at = Column(DateTime, nullable=True)
+
+    orders_count = Column(Integer, nullable=False, default=0)
+    unpaid_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    open_balance = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+# Devir/oturma süresi raporu: kapanış tarih aralığı
+Index("ix_table_sessions_closed", TableSession.closed_at, TableSession.table_id)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class LowStockItem(BaseModel):
     name: str
@@ -19,3 +19,29 @@ class IngredientOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Toplu teslimat/sayım: tek transaction, tek UPDATE
+MAX_STOCK_CHANGES = 1000
+
+class StockChange(BaseModel):
+    ingredient_id: int
+    delta: Optional[float] = None  # eklenecek miktar (fire için negatif)
+    stock_quantity: Optional[float] = Field(None, ge=0)  # sayım: mutlak miktar
+
+class StockDelivery(BaseModel):
+    items: List[StockChange] = Field(..., min_length=1, max_length=MAX_STOCK_CHANGES)
+
+class IngredientStock(BaseModel):
+    id: int
+    name: str
+    stock_quantity: float
+
+class MenuItemRef(BaseModel):
+    id: int
+    name: Optional[str] = None
+
+class StockDeliveryResult(BaseModel):
+    updated: List[IngredientStock]
+    back_on_menu: List[MenuItemRef]  # stok geldiği için tekrar satışa açılan ürünler
+    off_menu: List[MenuItemRef]  # sayım sonrası stoğu yetmeyen ürünler
@@ -1,16 +1,20 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from enum import Enum
+
+from app.schemas.pagination import Page
 
 
 class OrderItemIn(BaseModel):
     menu_item_id: int
-    quantity: int
+    quantity: int = Field(gt=0)  # sıfır/negatif adet stoğu ve tutarları tersine çevirir
     note: Optional[str] = None
 
 
 class OrderCreate(BaseModel):
     table_id: int
-    items: List[OrderItemIn]
+    items: List[OrderItemIn] = Field(..., min_length=1)
 
 
 class OrderItemOut(BaseModel):
@@ -26,10 +30,18 @@ class OrderOut(BaseModel):
     table_id: int
     status: str
     items: List[OrderItemOut]
+    version: int = 0
 
     class Config:
         orm_mode = True
 
+
+class KitchenQueueDelta(BaseModel):
+    cursor: str
+    reset: bool = False  # True ise `orders` tam kuyruktur, istemci listesini değiştirmeli
+    orders: List[OrderOut]
+    removed: List[int] = []
+
 from typing import Optional
 
 class OrderItemUpdate(BaseModel):
@@ -48,12 +60,53 @@ class OrderSummary(BaseModel):
     id: int
     table_id: int
     status: str
+    created_at: Optional[datetime] = None
+    total_amount: Optional[float] = None
     items: list[OrderItemSummary]
 
     class Config:
         from_attributes = True
 
+class FavouriteItem(BaseModel):
+    menu_item_id: int
+    name: Optional[str] = None
+    quantity: int
+
+class CustomerStatsOut(BaseModel):
+    orders_count: int = 0
+    items_count: int = 0
+    lifetime_spend: float = 0
+    first_order_at: Optional[datetime] = None
+    last_order_at: Optional[datetime] = None
+    favourite_items: list[FavouriteItem] = []
+
+class OrderHistoryPage(Page[OrderSummary]):
+    stats: Optional[CustomerStatsOut] = None  # sadece include_stats=true ise
+
 class OrderPaymentUpdate(BaseModel):
     payment_method: str  # örnek: "cash", "credit", "online"
 
 
+class OrderStatusEnum(str, Enum):
+    RECEIVED = "RECEIVED"
+    PREPARING = "PREPARING"
+    READY = "READY"
+    PAID = "PAID"
+
+
+class OrderVersionRef(BaseModel):
+    id: int
+    version: int
+
+
+class OrderStatusBulkUpdate(BaseModel):
+    status: OrderStatusEnum
+    orders: List[OrderVersionRef] = Field(..., min_length=1, max_length=200)
+
+
+class OrderTransitionResult(BaseModel):
+    id: int
+    success: bool
+    status: Optional[str] = None
+    version: Optional[int] = None
+    reason: Optional[str] = None  # "not_found", "version_conflict", "invalid_transition"
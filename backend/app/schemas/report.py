@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List, Optional
 
 class PopularItem(BaseModel):
     name: str
@@ -16,6 +17,61 @@ class PaymentSummary(BaseModel):
     total_revenue: float
     payment_method_breakdown: Dict[str, int]
 
+class TrendingItem(BaseModel):
+    menu_item_id: int
+    name: str
+    quantity: int
+
+class LatencyStats(BaseModel):
+    key: int  # saat (0-23), masa id veya menü öğesi id
+    name: Optional[str] = None
+    count: int
+    p50: float  # saniye
+    p90: float
+    p99: float
+
+class PrepLatencyReport(BaseModel):
+    start: datetime
+    end: datetime
+    orders: int
+    overall: Optional[LatencyStats]
+    by_hour: List[LatencyStats]
+    by_table: List[LatencyStats]
+    by_menu_item: List[LatencyStats]
+
+class TableTurnoverStats(BaseModel):
+    table_id: Optional[int] = None  # genel satırda None
+    table_number: Optional[int] = None
+    sessions: int
+    turnover_per_day: float  # günlük oturum sayısı (genelde masa başına)
+    dwell_p50: float  # dakika
+    dwell_p90: float
+    dwell_p99: float
+    avg_spend: float
+
+class TableTurnoverReport(BaseModel):
+    start: datetime
+    end: datetime
+    sessions: int
+    overall: Optional[TableTurnoverStats]
+    by_table: List[TableTurnoverStats]
+
+class StaffingSlot(BaseModel):
+    weekday: int  # 0 = pazartesi
+    hour: int  # UTC
+    expected_orders: float
+    waiters: int
+    kitchen: int
+
+class StaffingForecast(BaseModel):
+    week_start: datetime  # tahmin edilen hafta
+    history_start: datetime
+    history_weeks: int
+    alpha: float
+    waiter_hours: int  # haftalık önerilen toplam personel-saat
+    kitchen_hours: int
+    slots: List[StaffingSlot]
+
 class DailySummary(BaseModel):
     date: str  # yyyy-mm-dd
     total_orders: int
@@ -0,0 +1,48 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.table import TableOut
+
+
+class ReservationStatus(str, Enum):
+    BOOKED = "BOOKED"
+    CANCELLED = "CANCELLED"
+
+
+class ReservationCreate(BaseModel):
+    table_id: Optional[int] = None  # verilmezse en iyi uyan boş masa seçilir
+    party_size: int = Field(..., ge=1)
+    starts_at: datetime  # UTC
+    duration_minutes: int = Field(120, ge=15, le=480)
+    guest_name: Optional[str] = None
+
+
+class ReservationOut(BaseModel):
+    id: int
+    table_id: int
+    customer_id: Optional[int] = None
+    guest_name: Optional[str] = None
+    party_size: int
+    starts_at: datetime
+    ends_at: datetime
+    status: ReservationStatus
+
+    class Config:
+        from_attributes = True
+
+
+class SlotSuggestion(BaseModel):
+    starts_at: datetime
+    ends_at: datetime
+    table: TableOut
+
+
+class AvailabilitySearch(BaseModel):
+    party_size: int
+    starts_at: datetime
+    ends_at: datetime
+    tables: List[TableOut]  # en iyi uyan önce
+    suggestions: List[SlotSuggestion]  # istenen saatte masa yoksa en yakın boş saatler
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date, time
+from typing import List, Optional
 
 class ScheduleCreate(BaseModel):
     user_id: int
@@ -12,3 +13,24 @@ class ScheduleOut(ScheduleCreate):
 
     class Config:
         from_attributes = True
+
+# Toplu haftalık plan: tek transaction, tek INSERT
+MAX_ROSTER_SHIFTS = 2000
+
+class RosterCreate(BaseModel):
+    week_start: date
+    shifts: List[ScheduleCreate] = Field(..., min_length=1, max_length=MAX_ROSTER_SHIFTS)
+    replace: bool = False  # bu personelin haftadaki mevcut vardiyalarını sil ve yeniden oluştur
+
+class RosterResult(BaseModel):
+    week_start: date
+    created: int
+    replaced: int
+
+class ShiftRef(ScheduleCreate):
+    id: Optional[int] = None  # kayıtlı vardiyalarda dolu
+
+class ScheduleConflict(BaseModel):
+    user_id: int
+    first: ShiftRef
+    second: ShiftRef
@@ -0,0 +1,51 @@
+import asyncio
+
+from sqlalchemy import select, func
+
+from app.core.database import replica_router
+from app.dependencies.pagination import PageParams, paginate
+from app.models.user import User
+from app.models.menu_item import MenuItem
+from app.models.ingredient import Ingredient
+from app.models.table import DiningTable
+from app.models.schedule import Schedule
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+
+# Bölüm → (id kolonu, döndürülen kolonlar). Şifre gibi alanlar hiçbir zaman seçilmez.
+DASHBOARD_SECTIONS = {
+    "users": (User.id, (User.id, User.email, User.name, User.role)),
+    "menu_items": (MenuItem.id, (MenuItem.id, MenuItem.name, MenuItem.price, MenuItem.is_available)),
+    "ingredients": (Ingredient.id, (
+        Ingredient.id, Ingredient.name, Ingredient.stock_quantity, Ingredient.low_stock_threshold
+    )),
+    "tables": (DiningTable.id, (
+        DiningTable.id, DiningTable.number, DiningTable.seats, DiningTable.status, DiningTable.current_user_id
+    )),
+    "schedules": (Schedule.id, (
+        Schedule.id, Schedule.user_id, Schedule.work_date, Schedule.start_time, Schedule.end_time
+    )),
+}
+
+
+async def section_page(db, section: str, page: PageParams) -> dict:
+    """id üzerinde keyset sayfalama; devamı için `next_cursor` döner."""
+    id_column, columns = DASHBOARD_SECTIONS[section]
+    return await paginate(db, select(*columns), page, keys=(id_column,))
+
+
+async def _section_summary(section: str, limit: int) -> dict:
+    # Her bölüm kendi session'ında (havuzdan ayrı bir bağlantı) çalışır
+    id_column, _ = DASHBOARD_SECTIONS[section]
+    factory = await replica_router.pick()
+    async with factory() as db:
+        count = (await db.execute(select(func.count(id_column)))).scalar()
+        page = await section_page(db, section, PageParams(cursor=None, limit=limit))
+    return {"count": count, **page}
+
+
+async def load_dashboard(sections: tuple[str, ...], limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    """Bölümlerin sayısını ve ilk sayfasını eşzamanlı sorgular."""
+    summaries = await asyncio.gather(*[_section_summary(section, limit) for section in sections])
+    return dict(zip(sections, summaries))
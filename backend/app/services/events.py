@@ -0,0 +1,80 @@
+import asyncio
+import json
+from typing import AsyncIterator, Iterable
+
+from fastapi import Request
+
+HEARTBEAT_SECONDS = 15
+
+
+class Broadcaster:
+    """
+    Süreç içi (in-process) basit yayın/abone mekanizması.
+
+    Her abone sınırlı bir asyncio.Queue alır. Yetişemeyen abonenin kuyruğu
+    dolarsa bağlantısı kapatılır; istemci yeniden bağlanıp güncel durumu alır.
+    Not: Olaylar sadece bu süreçteki abonelere gider (tek worker varsayımı).
+    """
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Yavaş abone: kuyruğu boşaltıp kapanış sinyali bırak
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+def format_sse(event: dict) -> str:
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append("data: " + json.dumps(event.get("data"), ensure_ascii=False, default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse_stream(
+    request: Request,
+    broadcaster: Broadcaster,
+    queue: asyncio.Queue,
+    initial_events: Iterable[dict] = (),
+) -> AsyncIterator[str]:
+    """Önce başlangıç olaylarını, sonra kuyruğa gelen olayları SSE formatında üretir."""
+    try:
+        for event in initial_events:
+            yield format_sse(event)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+
+            if event is None:  # abonelik sunucu tarafından kapatıldı
+                break
+            yield format_sse(event)
+    finally:
+        broadcaster.unsubscribe(queue)
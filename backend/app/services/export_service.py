@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select, func
+
+from app.core.database import replica_router
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.menu_item import MenuItem
+
+# Sunucu tarafı cursor'dan her seferde çekilen satır sayısı
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_COLUMNS = (
+    "order_id", "created_at", "table_id", "customer_id", "status", "is_paid", "payment_method",
+    "order_item_id", "menu_item_id", "menu_item_name", "quantity", "unit_price", "line_total", "note",
+)
+
+
+# Sipariş anındaki fiyat; eski satırlarda güncel menü fiyatı
+LINE_UNIT_PRICE = func.coalesce(OrderItem.unit_price, MenuItem.price)
+
+
+def order_lines_query(
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    status: OrderStatus | None = None,
+    is_paid: bool | None = None,
+):
+    stmt = (
+        select(
+            Order.id, Order.created_at, Order.table_id, Order.customer_id, Order.status,
+            Order.is_paid, Order.payment_method,
+            OrderItem.id, OrderItem.menu_item_id, MenuItem.name, OrderItem.quantity,
+            LINE_UNIT_PRICE, OrderItem.quantity * LINE_UNIT_PRICE, OrderItem.note,
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .order_by(Order.id, OrderItem.id)
+    )
+    if start_date:
+        stmt = stmt.where(Order.created_at >= start_date)
+    if end_date:
+        stmt = stmt.where(Order.created_at <= end_date)
+    if status:
+        stmt = stmt.where(Order.status == status)
+    if is_paid is not None:
+        stmt = stmt.where(Order.is_paid == is_paid)
+    return stmt
+
+
+async def stream_order_lines(stmt):
+    """
+    Satırları sunucu tarafı cursor ile EXPORT_BATCH_SIZE'lık parçalar halinde üretir;
+    bellek kullanımı toplam satır sayısından bağımsızdır.
+
+    Session burada açılır: yield'li dependency'lerin session'ı yanıt gövdesi
+    gönderilmeden kapanır. Ağır bir okuma olduğu için replika tercih edilir.
+    """
+    factory = await replica_router.pick()
+    async with factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield rows
+
+
+def _plain(value):
+    if isinstance(value, OrderStatus):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def iter_csv(stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in stream_order_lines(stmt):
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def iter_ndjson(stmt):
+    async for rows in stream_order_lines(stmt):
+        # Decimal tutarlar hassasiyet kaybı olmasın diye string yazılır
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain, row))), default=str, ensure_ascii=False) + "\n"
+            for row in rows
+        )
@@ -0,0 +1,95 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import run_after_commit
+from app.models.table import DiningTable
+from app.services.events import Broadcaster
+
+# Kat planında tutulan (ve masa yazan sorguların RETURNING ile döndürdüğü) kolonlar
+TABLE_STATE_COLUMNS = (
+    DiningTable.id, DiningTable.number, DiningTable.seats, DiningTable.status, DiningTable.current_user_id
+)
+
+
+def table_state(row) -> dict:
+    """TABLE_STATE_COLUMNS satırından (veya DiningTable nesnesinden) kat planı kaydı."""
+    return {
+        "id": row.id,
+        "number": row.number,
+        "seats": row.seats,
+        "status": row.status.value if row.status is not None else None,
+        "current_user_id": row.current_user_id,
+    }
+
+
+class FloorPlan:
+    """
+    Masa → durum/oturan müşteri eşlemesinin bellekteki kopyası.
+
+    İlk kullanımda bir kez veritabanından yüklenir; sonrasında sadece masayı yazan
+    işlemler commit edildikçe (RETURNING ile dönen satırla) güncellenir ve değişiklik
+    garson ekranlarına yayınlanır. Masa listeleri veritabanına sorgu atmaz.
+    Not: Tek worker varsayımı (Broadcaster ile aynı).
+    """
+
+    def __init__(self):
+        self.broadcaster = Broadcaster()
+        self._tables: dict[int, dict] = {}
+        self.is_loaded = False
+        # Yükleme sürerken gelen değişiklikler; yükleme bitince tekrar uygulanır
+        self._backlog: list[tuple[int, dict | None]] | None = None
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.is_loaded:
+            return
+        async with self._lock:
+            if self.is_loaded:
+                return
+            self._backlog = []
+            try:
+                result = await db.execute(select(*TABLE_STATE_COLUMNS).order_by(DiningTable.id))
+                self._tables = {row.id: table_state(row) for row in result.all()}
+                for table_id, state in self._backlog:
+                    self._apply(table_id, state)
+                self.is_loaded = True
+            finally:
+                self._backlog = None
+
+    def snapshot(self) -> list[dict]:
+        return sorted(self._tables.values(), key=lambda state: state["id"])
+
+    def get(self, table_id: int) -> dict | None:
+        return self._tables.get(table_id)
+
+    def _apply(self, table_id: int, state: dict | None) -> None:
+        if state is None:
+            self._tables.pop(table_id, None)
+        else:
+            self._tables[table_id] = state
+
+    def _record(self, table_id: int, state: dict | None) -> None:
+        if self.is_loaded:
+            self._apply(table_id, state)
+        elif self._backlog is not None:
+            self._backlog.append((table_id, state))
+
+    def table_changed(self, state: dict) -> None:
+        self._record(state["id"], state)
+        self.broadcaster.publish({"type": "table_changed", "data": state})
+
+    def table_removed(self, table_id: int) -> None:
+        self._record(table_id, None)
+        self.broadcaster.publish({"type": "table_removed", "data": {"id": table_id}})
+
+    # Değişiklikler sadece işlem commit edildikten sonra uygulanır (aynı masa için son yazılan geçerli)
+    def changed_after_commit(self, session, state: dict) -> None:
+        run_after_commit(session, lambda: self.table_changed(state), key=("floor_plan", state["id"]))
+
+    def removed_after_commit(self, session, table_id: int) -> None:
+        run_after_commit(session, lambda: self.table_removed(table_id), key=("floor_plan", table_id))
+
+
+floor_plan = FloorPlan()
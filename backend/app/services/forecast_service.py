@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.models.sales_rollup import HourlySales
+
+HOURS_PER_WEEK = 7 * 24
+DEFAULT_HISTORY_WEEKS = 104
+DEFAULT_ALPHA = 0.3
+
+# Bir personelin saatte karşılayabileceği sipariş sayısı (yönetici ihtiyaca göre değiştirir)
+ORDERS_PER_WAITER_HOUR = 12
+ORDERS_PER_KITCHEN_HOUR = 15
+# Bu değerin altındaki saatler kapalı kabul edilir (personel önerilmez)
+MIN_EXPECTED_ORDERS = 0.5
+
+
+def week_start(moment: datetime) -> datetime:
+    """İçinde bulunulan haftanın pazartesi 00:00'ı."""
+    return (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def weekly_matrix(hours: np.ndarray, counts: np.ndarray, origin: datetime, weeks: int) -> np.ndarray:
+    """
+    Saatlik sipariş sayılarını [hafta × 168] matrise yerleştirir (satır: origin'den itibaren
+    hafta, sütun: pazartesi 00:00'dan itibaren saat). Kaydı olmayan saatler 0'dır.
+    `hours`: datetime64[h] dizisi.
+    """
+    offsets = (hours - np.datetime64(origin, "h")).astype(np.int64)
+    inside = (offsets >= 0) & (offsets < weeks * HOURS_PER_WEEK)
+    flat = np.bincount(offsets[inside], weights=counts[inside], minlength=weeks * HOURS_PER_WEEK)
+    return flat.reshape(weeks, HOURS_PER_WEEK)
+
+
+def smooth_weekly(matrix: np.ndarray, alpha: float = DEFAULT_ALPHA) -> np.ndarray:
+    """
+    Her hafta-saat dilimi için haftalar boyunca basit üstel düzeltme (L0 = x0,
+    Lt = α·xt + (1-α)·Lt-1) ve son seviye tahmin olarak döner. Özyineleme kapalı
+    formdaki ağırlıklara açılır; tüm dilimler tek bir matris çarpımıyla hesaplanır.
+
+    Sipariş kaydı başlamadan önceki boş haftalar tahmini aşağı çekmesin diye atlanır.
+    """
+    active = np.flatnonzero(matrix.any(axis=1))
+    if active.size == 0:
+        return np.zeros(matrix.shape[1])
+    matrix = matrix[active[0]:]
+    n = matrix.shape[0]
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1, dtype=float)
+    weights[0] = (1 - alpha) ** (n - 1)
+    return weights @ matrix
+
+
+def staffing(expected: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Beklenen saatlik siparişten önerilen garson ve mutfak personeli sayısı."""
+    open_hours = expected >= MIN_EXPECTED_ORDERS
+    waiters = np.where(open_hours, np.maximum(np.ceil(expected / ORDERS_PER_WAITER_HOUR), 1), 0)
+    kitchen = np.where(open_hours, np.maximum(np.ceil(expected / ORDERS_PER_KITCHEN_HOUR), 1), 0)
+    return waiters.astype(np.int64), kitchen.astype(np.int64)
+
+
+async def staffing_forecast(
+    db: AsyncSession,
+    now: datetime,
+    history_weeks: int = DEFAULT_HISTORY_WEEKS,
+    alpha: float = DEFAULT_ALPHA,
+) -> dict:
+    """
+    Son `history_weeks` tamamlanmış haftanın saatlik sipariş sayılarından (sales_hourly
+    rollup'ı; iki yıl için ~17.5 bin satır) gelecek hafta için gün × saat (UTC) bazında
+    beklenen sipariş ve önerilen WAITER/KITCHEN sayısı.
+    """
+    end = week_start(now)
+    origin = end - timedelta(weeks=history_weeks)
+    rows = (await db.execute(
+        select(HourlySales.hour, HourlySales.orders_count)
+        .where(HourlySales.hour >= origin, HourlySales.hour < end)
+    )).all()
+
+    if rows:
+        hours, counts = zip(*rows)
+        hours = np.asarray(hours, dtype="datetime64[h]")
+        counts = np.asarray(counts, dtype=float)
+    else:
+        hours, counts = np.empty(0, dtype="datetime64[h]"), np.empty(0)
+
+    matrix = weekly_matrix(hours, counts, origin, history_weeks)
+    expected = smooth_weekly(matrix, alpha)
+    waiters, kitchen = staffing(expected)
+
+    slots = [
+        {
+            "weekday": slot // 24,  # 0 = pazartesi
+            "hour": slot % 24,
+            "expected_orders": round(float(expected[slot]), 1),
+            "waiters": int(waiters[slot]),
+            "kitchen": int(kitchen[slot]),
+        }
+        for slot in range(HOURS_PER_WEEK)
+    ]
+    return {
+        "week_start": end,
+        "history_start": origin,
+        "history_weeks": history_weeks,
+        "alpha": alpha,
+        "waiter_hours": int(waiters.sum()),
+        "kitchen_hours": int(kitchen.sum()),
+        "slots": slots,
+    }
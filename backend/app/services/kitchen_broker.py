@@ -0,0 +1,187 @@
+import asyncio
+import uuid
+from collections import deque
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_
+
+from app.core.database import run_after_commit
+from app.models.order import Order, OrderItem, OrderStatus
+from app.schemas.order import OrderOut, OrderItemOut, KitchenQueueDelta
+from app.services.events import Broadcaster
+from app.services.menu_cache import menu_names
+
+# Mutfak kuyruğunda gösterilen sipariş durumları
+KITCHEN_QUEUE_STATUSES = (OrderStatus.RECEIVED,)
+# Tek durumda `status = 'RECEIVED'` üretir; IN (...) yerine bu biçim kısmi indeksle
+# (ix_orders_received) eşleşir
+KITCHEN_QUEUE_FILTER = or_(*(Order.status == status for status in KITCHEN_QUEUE_STATUSES))
+
+# Delta isteklerine cevap verebilmek için saklanan son değişiklik sayısı
+CHANGE_LOG_SIZE = 5000
+
+
+async def load_kitchen_queue(db: AsyncSession) -> list[OrderOut]:
+    # 1. RECEIVED durumundaki siparişleri getir
+    order_stmt = select(Order).where(KITCHEN_QUEUE_FILTER).order_by(Order.id)
+    orders_result = await db.execute(order_stmt)
+    orders = orders_result.scalars().all()
+
+    # 2. Sipariş ID'lerini topla
+    order_ids = [o.id for o in orders]
+
+    # 3. Tüm OrderItem'ları tek seferde çek
+    item_stmt = select(OrderItem).where(OrderItem.order_id.in_(order_ids))
+    item_result = await db.execute(item_stmt)
+    all_items = item_result.scalars().all()
+
+    # 4. Menü isimlerini getir (sadece bilinmeyenler sorgulanır)
+    menu_map = await menu_names.get_many(db, {i.menu_item_id for i in all_items})
+
+    # 5. Siparişleri birleştir
+    items_by_order: dict[int, list[OrderItem]] = {}
+    for item in all_items:
+        items_by_order.setdefault(item.order_id, []).append(item)
+
+    return [
+        OrderOut(
+            id=order.id,
+            table_id=order.table_id,
+            status=order.status.value,
+            items=[
+                OrderItemOut(name=menu_map[i.menu_item_id], quantity=i.quantity)
+                for i in items_by_order.get(order.id, [])
+            ],
+            version=order.version
+        )
+        for order in orders
+    ]
+
+
+class KitchenQueueBroker:
+    """
+    Mutfak kuyruğunun bellekteki kopyasını tutar ve değişiklikleri abonelere yayınlar.
+
+    Kuyruk ilk abonede bir kez veritabanından yüklenir; sonrasında sadece
+    commit edilmiş sipariş olaylarıyla güncellenir. Kuyruk boştayken ekranlar
+    veritabanına hiç sorgu atmaz.
+    """
+
+    def __init__(self):
+        self.broadcaster = Broadcaster()
+        self._orders: dict[int, OrderOut] = {}
+        self.is_loaded = False
+        # Yükleme sürerken gelen değişiklikler; yükleme bitince tekrar uygulanır
+        self._backlog: list[tuple] | None = None
+        self._lock = asyncio.Lock()
+
+        # Değişiklik imleci: "<epoch>.<seq>". Epoch her süreç başlangıcında değişir,
+        # böylece yeniden başlatmadan önce alınmış imleçler tam yenilemeye düşer.
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self._changes: deque[tuple[int, int]] = deque(maxlen=CHANGE_LOG_SIZE)
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.is_loaded:
+            return
+        async with self._lock:
+            if self.is_loaded:
+                return
+            self._backlog = []
+            try:
+                orders = await load_kitchen_queue(db)
+                self._orders = {order.id: order for order in orders}
+                for change in self._backlog:
+                    self._apply(*change)
+                self.is_loaded = True
+            finally:
+                self._backlog = None
+
+    def snapshot(self) -> list[OrderOut]:
+        return list(self._orders.values())
+
+    def _apply(self, kind: str, order_id: int, payload) -> None:
+        if kind == "added":
+            self._orders[order_id] = payload
+        elif payload[0] in {s.value for s in KITCHEN_QUEUE_STATUSES}:
+            status, version = payload
+            order = self._orders.get(order_id)
+            if order is not None:
+                self._orders[order_id] = order.model_copy(update={"status": status, "version": version})
+        else:
+            self._orders.pop(order_id, None)
+
+    @property
+    def cursor(self) -> str:
+        return f"{self.epoch}.{self.seq}"
+
+    def _parse_cursor(self, cursor: str) -> int | None:
+        epoch, _, seq = cursor.partition(".")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self.seq:
+            return None
+        # Log kesilmişse aradaki değişiklikler bilinmiyor
+        if self._changes and seq < self._changes[0][0] - 1:
+            return None
+        return seq
+
+    def changes_since(self, cursor: str) -> KitchenQueueDelta | None:
+        """
+        İmleçten bu yana eklenen/değişen siparişleri döndürür.
+        Değişiklik yoksa None döner. İmleç geçersiz/eskiyse tam kuyruk (reset=True) döner.
+        """
+        since = self._parse_cursor(cursor)
+        if since is None:
+            return KitchenQueueDelta(cursor=self.cursor, reset=True, orders=self.snapshot())
+        if since == self.seq:
+            return None
+
+        changed_ids = []
+        for seq, order_id in reversed(self._changes):
+            if seq <= since:
+                break
+            changed_ids.append(order_id)
+
+        orders, removed = [], []
+        for order_id in dict.fromkeys(reversed(changed_ids)):
+            order = self._orders.get(order_id)
+            if order is None:
+                removed.append(order_id)
+            else:
+                orders.append(order)
+        return KitchenQueueDelta(cursor=self.cursor, orders=orders, removed=removed)
+
+    def _record(self, kind: str, order_id: int, payload) -> None:
+        self.seq += 1
+        self._changes.append((self.seq, order_id))
+        if self.is_loaded:
+            self._apply(kind, order_id, payload)
+        elif self._backlog is not None:
+            self._backlog.append((kind, order_id, payload))
+
+    def _publish(self, event_type: str, data: dict) -> None:
+        self.broadcaster.publish({"id": self.cursor, "type": event_type, "data": data})
+
+    def order_added(self, order: OrderOut) -> None:
+        self._record("added", order.id, order)
+        self._publish("order_added", order.model_dump())
+
+    def status_changed(self, order_id: int, status: str, version: int) -> None:
+        self._record("status", order_id, (status, version))
+        self._publish("status_changed", {"id": order_id, "status": status, "version": version})
+
+    # Olaylar sadece işlem commit edildikten sonra yayınlanır
+    def order_added_after_commit(self, session, order: OrderOut) -> None:
+        run_after_commit(session, lambda: self.order_added(order), key=("kitchen_order_added", order.id))
+
+    def status_changed_after_commit(self, session, order_id: int, status: str, version: int) -> None:
+        run_after_commit(
+            session,
+            lambda: self.status_changed(order_id, status, version),
+            key=("kitchen_status_changed", order_id),
+        )
+
+
+kitchen_broker = KitchenQueueBroker()
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.models.order import Order, OrderItem
+from app.services.menu_cache import menu_names
+
+PERCENTILES = (0.50, 0.90, 0.99)
+
+
+def grouped_percentiles(keys: np.ndarray, values: np.ndarray, qs=PERCENTILES):
+    """
+    Her anahtar grubu için yüzdelikleri tek seferde (döngüsüz) hesaplar.
+    Değerler (anahtar, değer) sırasına dizilir; her grubun başlangıcı ve boyu
+    bilindiğinden q yüzdeliğinin sıradaki konumu doğrudan bulunur ve
+    np.percentile(method="linear") ile aynı şekilde iki komşu arasında enterpolasyon yapılır.
+
+    Dönüş: (benzersiz anahtarlar, grup boyları, [grup sayısı × len(qs)] matris)
+    """
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    unique_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    positions = starts[:, None] + (counts[:, None] - 1) * np.asarray(qs)[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+    fraction = positions - lower
+    result = values[lower] + (values[upper] - values[lower]) * fraction
+    return unique_keys, counts, result
+
+
+def _stats(keys, counts, matrix, names: dict | None = None) -> list[dict]:
+    return [
+        {
+            "key": int(key),
+            "name": names.get(int(key)) if names is not None else None,
+            "count": int(count),
+            "p50": round(float(row[0]), 1),
+            "p90": round(float(row[1]), 1),
+            "p99": round(float(row[2]), 1),
+        }
+        for key, count, row in zip(keys, counts, matrix)
+    ]
+
+
+async def prep_latency_report(db: AsyncSession, start: datetime, end: datetime) -> dict:
+    """
+    [start, end] aralığında alınıp READY olan siparişler için alındı → hazır
+    süresinin (saniye) p50/p90/p99 değerleri: genel, günün saatine (UTC), masaya
+    ve menü öğesine göre. Menü öğesi bazında, siparişin süresi içindeki her ürüne yazılır.
+    """
+    window = (
+        Order.created_at >= start,
+        Order.created_at <= end,
+        Order.received_at.is_not(None),
+        Order.ready_at.is_not(None),
+    )
+    order_rows = (await db.execute(
+        select(Order.id, Order.table_id, Order.received_at, Order.ready_at).where(*window).order_by(Order.id)
+    )).all()
+
+    report = {"start": start, "end": end, "orders": len(order_rows), "overall": None,
+              "by_hour": [], "by_table": [], "by_menu_item": []}
+    if not order_rows:
+        return report
+
+    order_ids, table_ids, received, ready = zip(*order_rows)
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    table_ids = np.asarray(table_ids, dtype=np.int64)
+    received = np.asarray(received, dtype="datetime64[us]")
+    ready = np.asarray(ready, dtype="datetime64[us]")
+    latency = (ready - received) / np.timedelta64(1, "s")
+    hours = received.astype("datetime64[h]").astype(np.int64) % 24
+
+    report["overall"] = _stats(*grouped_percentiles(np.zeros(len(latency), dtype=np.int64), latency))[0]
+    report["by_hour"] = _stats(*grouped_percentiles(hours, latency))
+    report["by_table"] = _stats(*grouped_percentiles(table_ids, latency))
+
+    line_rows = (await db.execute(
+        select(OrderItem.order_id, OrderItem.menu_item_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*window)
+    )).all()
+    if line_rows:
+        line_order_ids, menu_item_ids = (np.asarray(column, dtype=np.int64) for column in zip(*line_rows))
+        # İki sorgu arasında READY olan siparişlerin satırlarını at
+        known = np.isin(line_order_ids, order_ids)
+        line_order_ids, menu_item_ids = line_order_ids[known], menu_item_ids[known]
+        # order_ids sıralı: her satırın siparişini ikili arama ile bul
+        line_latency = latency[np.searchsorted(order_ids, line_order_ids)]
+        names = await menu_names.get_many(db, set(menu_item_ids.tolist()))
+        report["by_menu_item"] = _stats(*grouped_percentiles(menu_item_ids, line_latency), names=names)
+
+    return report
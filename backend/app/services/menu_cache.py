@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import run_after_commit
+from app.models.menu_item import MenuItem
+from app.schemas.menu import MenuItemOut
+from app.schemas.pagination import Page
+from app.dependencies.pagination import PageParams, paginate_list
+
+_menu_adapter = TypeAdapter(list[MenuItemOut])
+_menu_page_adapter = TypeAdapter(Page[MenuItemOut])
+
+# Sayfalı /testmenu yanıtları (filtre + cursor + limit başına) için üst sınır
+MAX_CACHED_PAGES = 256
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class MenuSnapshotCache:
+    """
+    Menünün önceden JSON'a çevrilmiş anlık görüntülerini (bytes + güçlü ETag) tutar.
+
+    Görünümler:
+    - "available": /menu/ (sadece mevcut ürünler)
+    - "all": /testmenu (tüm ürünler; sayfalı, ETag'i bu görünümün ETag'inden türetilir)
+    - "manager": /manager/menu (fiyat float olarak)
+
+    Menü değiştiğinde `invalidate` ile versiyon artırılır. Yükleme sırasında
+    invalidation olursa eski veri cache'e yazılmaz.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._items: list[MenuItemOut] | None = None
+        self._views: dict[str, tuple[bytes, str]] = {}
+        self._pages: dict[tuple, bytes] = {}
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._items = None
+        self._views = {}
+        self._pages = {}
+
+    def invalidate_after_commit(self, session) -> None:
+        # Commit'ten önce temizlenirse eşzamanlı bir okuma eski veriyi tekrar cache'leyebilir
+        run_after_commit(session, self.invalidate, key="menu_cache")
+
+    @staticmethod
+    def _serialize(items: list[MenuItemOut]) -> dict[str, tuple[bytes, str]]:
+        available_body = _menu_adapter.dump_json([i for i in items if i.is_available])
+        all_body = _menu_adapter.dump_json(items)
+        manager_body = json.dumps([
+            {
+                "id": item.id,
+                "name": item.name,
+                "price": float(item.price),
+                "is_available": item.is_available,
+                "img_url": item.img_url,
+                "tags": item.tags,
+                "allergens": item.allergens
+            }
+            for item in items
+        ], ensure_ascii=False).encode("utf-8")
+
+        return {
+            "available": (available_body, _etag(available_body)),
+            "all": (all_body, _etag(all_body)),
+            "manager": (manager_body, _etag(manager_body)),
+        }
+
+    async def _load(self, db: AsyncSession) -> None:
+        async with self._lock:
+            if self._items is not None:
+                return
+            version = self.version
+            result = await db.execute(select(MenuItem).order_by(MenuItem.id))
+            items = [MenuItemOut.model_validate(m) for m in result.scalars().all()]
+            views = self._serialize(items)
+            if version == self.version:
+                self._items, self._views = items, views
+                for item in items:
+                    menu_names.set(item.id, item.name)
+
+    @staticmethod
+    async def _fresh_items(db: AsyncSession) -> list[MenuItemOut]:
+        result = await db.execute(select(MenuItem).order_by(MenuItem.id))
+        return [MenuItemOut.model_validate(m) for m in result.scalars().all()]
+
+    async def get_items(self, db: AsyncSession) -> list[MenuItemOut]:
+        items = self._items
+        if items is None:
+            await self._load(db)
+            items = self._items
+        return items if items is not None else []
+
+    async def get_view(self, db: AsyncSession, view: str) -> tuple[bytes, str]:
+        cached = self._views.get(view)
+        if cached is None:
+            await self._load(db)
+            cached = self._views.get(view)
+        if cached is None:
+            # Yükleme sırasında invalidation oldu; bu isteğe taze veriyi doğrudan ver
+            cached = self._serialize(await self._fresh_items(db))[view]
+        return cached
+
+    async def _page_body(self, db: AsyncSession, key: tuple, page: PageParams, is_available: bool | None) -> bytes:
+        cached = self._pages.get(key)
+        if cached is not None:
+            return cached
+        items = self._items
+        from_snapshot = items is not None
+        if not from_snapshot:
+            items = await self._fresh_items(db)
+        if is_available is not None:
+            items = [item for item in items if item.is_available == is_available]
+        body = _menu_page_adapter.dump_json(paginate_list(items, page, key=lambda item: (item.id,)))
+        # Sadece cache'teki snapshot'tan üretilen sayfalar saklanır (snapshot değişince hepsi silinir)
+        if from_snapshot and len(self._pages) < MAX_CACHED_PAGES:
+            self._pages[key] = body
+        return body
+
+    async def response(
+        self,
+        request: Request,
+        db: AsyncSession,
+        view: str,
+        page: PageParams | None = None,
+        is_available: bool | None = None,
+    ) -> Response:
+        """
+        Görünümü ETag ile döner; If-None-Match eşleşirse 304. `page` verilirse görünümün
+        o sayfası döner: ETag görünümün ETag'i + filtre + cursor + limit'ten türetildiği için
+        304 kararı sayfa serileştirilmeden verilir.
+        """
+        body, etag = await self.get_view(db, view)
+        if page is not None:
+            key = (etag, is_available, page.cursor, page.limit)
+            etag = _etag(repr(key).encode("utf-8"))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        if page is not None:
+            body = await self._page_body(db, key, page, is_available)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+menu_cache = MenuSnapshotCache()
+
+
+class MenuNameLookup:
+    """
+    menu_item_id → isim eşlemesi. Sadece bilinmeyen id'ler veritabanından
+    çekilir; menü öğesi oluşturma/güncelleme sonrası `set` ile güncel tutulur.
+    """
+
+    def __init__(self):
+        self._names: dict[int, str] = {}
+
+    def set(self, menu_item_id: int, name: str) -> None:
+        self._names[menu_item_id] = name
+
+    async def get_many(self, db: AsyncSession, menu_item_ids) -> dict[int, str]:
+        wanted = set(menu_item_ids)
+        missing = wanted - self._names.keys()
+        if missing:
+            result = await db.execute(
+                select(MenuItem.id, MenuItem.name).where(MenuItem.id.in_(missing))
+            )
+            self._names.update(dict(result.all()))
+        return {menu_item_id: self._names[menu_item_id] for menu_item_id in wanted if menu_item_id in self._names}
+
+
+menu_names = MenuNameLookup()
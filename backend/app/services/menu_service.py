@@ -1,60 +1,172 @@
+from collections import defaultdict
+from typing import Iterable
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func, case
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models.menu_item import MenuItem
 from app.models.ingredient import Ingredient
 from app.models.menu_item_ingredient import MenuItemIngredient
+from app.services.menu_cache import menu_cache
+
+
+class MenuAvailabilityEngine:
+    """
+    Malzeme → menü öğesi ters indeksini bellekte tutar ve stok değişikliklerinden
+    etkilenen menü öğelerinin uygunluğunu toplu olarak yeniden hesaplar.
+
+    - `rebuild`: indeksi veritabanından yeniden kurar (uygulama başlangıcında çağrılır).
+    - `recompute`: etkilenen kümenin uygunluğunu tek sorguda hesaplar, sadece
+      değişenleri tek bir UPDATE ile yazar. Commit yapmaz; çağıranın işlemi içinde çalışır.
+    - `verify`: bellekteki indeksi ve is_available değerlerini veritabanıyla karşılaştırır.
+    """
+
+    def __init__(self):
+        self._items_by_ingredient: dict[int, set[int]] = defaultdict(set)
+        self._ingredients_by_item: dict[int, set[int]] = defaultdict(set)
+        self.is_loaded = False
+
+    @staticmethod
+    def _build_index(rows: Iterable[tuple[int, int]]) -> tuple[dict[int, set[int]], dict[int, set[int]]]:
+        items_by_ingredient: dict[int, set[int]] = defaultdict(set)
+        ingredients_by_item: dict[int, set[int]] = defaultdict(set)
+        for menu_item_id, ingredient_id in rows:
+            if menu_item_id is None or ingredient_id is None:
+                continue
+            items_by_ingredient[ingredient_id].add(menu_item_id)
+            ingredients_by_item[menu_item_id].add(ingredient_id)
+        return items_by_ingredient, ingredients_by_item
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        result = await db.execute(
+            select(MenuItemIngredient.menu_item_id, MenuItemIngredient.ingredient_id)
+        )
+        self._items_by_ingredient, self._ingredients_by_item = self._build_index(result.all())
+        self.is_loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if not self.is_loaded:
+            await self.rebuild(db)
+
+    def menu_items_for_ingredients(self, ingredient_ids: Iterable[int]) -> set[int]:
+        affected = set()
+        for ingredient_id in ingredient_ids:
+            affected |= self._items_by_ingredient.get(ingredient_id, set())
+        return affected
+
+    def ingredients_for_menu_items(self, menu_item_ids: Iterable[int]) -> set[int]:
+        ingredients = set()
+        for menu_item_id in menu_item_ids:
+            ingredients |= self._ingredients_by_item.get(menu_item_id, set())
+        return ingredients
+
+    @staticmethod
+    def _availability_query(menu_item_ids=None):
+        # Stoğu yetmeyen malzeme sayısı 0 ise ürün uygundur; malzemesiz ürünler de uygundur.
+        short_count = func.coalesce(
+            func.sum(case((Ingredient.stock_quantity < MenuItemIngredient.amount_used, 1), else_=0)),
+            0,
+        )
+        stmt = (
+            select(MenuItem.id, MenuItem.is_available, (short_count == 0).label("should_be_available"))
+            .outerjoin(MenuItemIngredient, MenuItemIngredient.menu_item_id == MenuItem.id)
+            .outerjoin(Ingredient, Ingredient.id == MenuItemIngredient.ingredient_id)
+            .group_by(MenuItem.id, MenuItem.is_available)
+        )
+        if menu_item_ids is not None:
+            stmt = stmt.where(MenuItem.id.in_(menu_item_ids))
+        return stmt
+
+    async def recompute(
+        self,
+        db: AsyncSession,
+        ingredient_ids: Iterable[int] = (),
+        menu_item_ids: Iterable[int] = (),
+    ) -> dict[int, bool]:
+        """
+        Verilen malzemelere bağlı ve/veya doğrudan verilen menü öğelerinin
+        uygunluğunu yeniden hesaplar. Dönüş: {menu_item_id: yeni is_available}
+        (sadece değişenler).
+        """
+        await self.ensure_loaded(db)
+
+        affected = self.menu_items_for_ingredients(ingredient_ids) | set(menu_item_ids)
+        if not affected:
+            return {}
+
+        result = await db.execute(self._availability_query(affected))
+        flips = {
+            menu_item_id: bool(should_be_available)
+            for menu_item_id, is_available, should_be_available in result.all()
+            if bool(is_available) != bool(should_be_available)
+        }
+        if not flips:
+            return {}
+
+        now_available = [menu_item_id for menu_item_id, available in flips.items() if available]
+        await db.execute(
+            update(MenuItem)
+            .where(MenuItem.id.in_(list(flips)))
+            .values(is_available=MenuItem.id.in_(now_available))
+            .execution_options(synchronize_session=False)
+        )
+        # Oturumda yüklü MenuItem nesneleri varsa yeni değeri yansıt
+        for menu_item_id, available in flips.items():
+            loaded = db.sync_session.identity_map.get(identity_key(MenuItem, menu_item_id))
+            if loaded is not None:
+                set_committed_value(loaded, "is_available", available)
+
+        menu_cache.invalidate_after_commit(db)
+
+        print(f"DEBUG: {len(flips)} menü öğesinin uygunluğu değişti: {flips}")
+        return flips
+
+    async def verify(self, db: AsyncSession) -> dict[str, list[int]]:
+        """
+        Bellekteki ters indeksi ve menu_items.is_available değerlerini veritabanıyla
+        karşılaştırır. Boş listeler tutarlı olduğu anlamına gelir.
+        """
+        result = await db.execute(
+            select(MenuItemIngredient.menu_item_id, MenuItemIngredient.ingredient_id)
+        )
+        _, db_ingredients_by_item = self._build_index(result.all())
+
+        index_mismatches = sorted(
+            menu_item_id
+            for menu_item_id in set(db_ingredients_by_item) | set(self._ingredients_by_item)
+            if db_ingredients_by_item.get(menu_item_id, set())
+            != self._ingredients_by_item.get(menu_item_id, set())
+        )
+
+        availability_result = await db.execute(self._availability_query())
+        availability_mismatches = sorted(
+            menu_item_id
+            for menu_item_id, is_available, should_be_available in availability_result.all()
+            if bool(is_available) != bool(should_be_available)
+        )
+
+        return {
+            "index_mismatches": index_mismatches,
+            "availability_mismatches": availability_mismatches,
+        }
+
+
+availability_engine = MenuAvailabilityEngine()
 
 
 async def check_and_update_menu_item_availability(db: AsyncSession, menu_item_id: int) -> bool:
     """
     Belirtilen menü öğesinin tüm malzemelerinin stok durumunu kontrol eder
     ve MenuItem.is_available flag'ini günceller.
+    Commit yapmaz; değişiklik çağıranın işlemiyle birlikte kaydedilir.
     """
-    menu_item_result = await db.execute(select(MenuItem).where(MenuItem.id == menu_item_id))
-    menu_item = menu_item_result.scalar_one_or_none()
+    await availability_engine.recompute(db, menu_item_ids=[menu_item_id])
 
-    if not menu_item:
+    result = await db.execute(select(MenuItem.is_available).where(MenuItem.id == menu_item_id))
+    is_available = result.scalar_one_or_none()
+    if is_available is None:
         print(f"WARNING: MenuItem with ID {menu_item_id} not found.")
         return False
-
-    # Bu menü öğesinin tüm malzemelerini ve gereken miktarlarını al
-    # Gerekli malzeme miktarını ve mevcut stok miktarını karşılaştıracağız.
-    required_ingredients_query = await db.execute(
-        select(MenuItemIngredient, Ingredient.stock_quantity, Ingredient.low_stock_threshold)
-        .join(Ingredient, MenuItemIngredient.ingredient_id == Ingredient.id)
-        .where(MenuItemIngredient.menu_item_id == menu_item_id)
-    )
-    required_ingredients_data = required_ingredients_query.all()
-
-    # Eğer menü öğesi için hiç malzeme tanımlanmamışsa, varsayılan olarak mevcut kabul et (veya değil, iş modelinize göre)
-    if not required_ingredients_data:
-        # Menü öğesi malzemesizse ve is_available true ise devam et
-        if not menu_item.is_available:
-            menu_item.is_available = True
-            db.add(menu_item)
-            await db.commit()
-            await db.refresh(menu_item)
-            print(f"DEBUG: MenuItem '{menu_item.name}' has no ingredients, set to available.")
-        return True
-
-    is_currently_available = True
-    for menu_item_ingredient_rel, current_stock, low_stock_threshold in required_ingredients_data:
-        required_amount_per_item = menu_item_ingredient_rel.amount_used
-
-        # Eğer mevcut stok, menü öğesi için gereken miktardan az ise, ürün mevcut değildir.
-        # İsterseniz burada low_stock_threshold'u da kullanabilirsiniz.
-        # Örneğin: if current_stock < required_amount_per_item * SOME_BUFFER:
-        if current_stock < required_amount_per_item:
-            is_currently_available = False
-            break  # Bir malzeme bile eksikse, ürün mevcut değildir
-
-    # MenuItem'ın is_available durumunu güncelle
-    if menu_item.is_available != is_currently_available:
-        menu_item.is_available = is_currently_available
-        db.add(menu_item)  # SQLAlchemy'nin değişikliği izlemesi için ekle
-        await db.commit()  # Değişikliği veritabanına kaydet
-        await db.refresh(menu_item)  # En son haliyle objeyi yenile
-        print(f"DEBUG: MenuItem '{menu_item.name}' availability changed to {menu_item.is_available}")
-
-    return is_currently_available
\ No newline at end of file
+    return is_available
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, values, column, Integer
+
+from app.models.order import Order, OrderStatus, ORDER_STATUS_TRANSITIONS, ORDER_STATUS_TIMESTAMPS
+from app.schemas.order import OrderTransitionResult
+from app.services.rollup_service import record_orders_paid
+from app.services.table_service import settle_session_orders
+
+
+def allowed_previous_statuses(target: OrderStatus) -> list[OrderStatus]:
+    return [status for status, targets in ORDER_STATUS_TRANSITIONS.items() if target in targets]
+
+
+async def bulk_transition_orders(
+    db: AsyncSession,
+    target: OrderStatus,
+    refs: list[tuple[int, int]],
+) -> list[OrderTransitionResult]:
+    """
+    (order_id, version) çiftlerini tek bir koşullu UPDATE ile `target` durumuna taşır.
+
+    Satır sadece versiyonu eşleşiyorsa ve mevcut durumdan `target`a geçiş izinliyse
+    güncellenir; başarılı satırların versiyonu bir artar. Böylece iki mutfak ekranı
+    birbirinin değişikliğini ezemez. Commit yapmaz.
+    """
+    # Aynı sipariş iki kez gönderildiyse ilki geçerli
+    requested: dict[int, int] = {}
+    for order_id, version in refs:
+        requested.setdefault(order_id, version)
+
+    previous = allowed_previous_statuses(target)
+    results: dict[int, OrderTransitionResult] = {}
+
+    # PAID'e geçişte daha önce ödenmemiş olanlar rollup'lara eklenir (satırlar kilitlenir
+    # ki aynı anda müşteri ödemesiyle iki kez sayılmasın)
+    unpaid_ids: set[int] = set()
+    if target == OrderStatus.PAID:
+        unpaid = await db.execute(
+            select(Order.id)
+            .where(Order.id.in_(list(requested)), Order.is_paid == False)
+            .with_for_update()
+        )
+        unpaid_ids = set(unpaid.scalars().all())
+
+    if previous:
+        req = values(
+            column("id", Integer),
+            column("version", Integer),
+            name="req",
+        ).data(list(requested.items()))
+
+        changes = {
+            "status": target,
+            "version": Order.version + 1,
+            ORDER_STATUS_TIMESTAMPS[target]: datetime.utcnow(),
+        }
+        if target == OrderStatus.PAID:
+            changes["is_paid"] = True
+
+        updated = await db.execute(
+            update(Order)
+            .where(
+                Order.id == req.c.id,
+                Order.version == req.c.version,
+                Order.status.in_(previous),
+            )
+            .values(**changes)
+            .returning(Order.id, Order.version)
+            .execution_options(synchronize_session=False)
+        )
+        for order_id, new_version in updated.all():
+            results[order_id] = OrderTransitionResult(
+                id=order_id, success=True, status=target.value, version=new_version
+            )
+
+    newly_paid = [order_id for order_id in results if order_id in unpaid_ids]
+    # Önce oturum, sonra rollup (kilit sırası: table_service.release_table üstündeki not)
+    await settle_session_orders(db, newly_paid)
+    await record_orders_paid(db, newly_paid)
+
+    # Başarısız olanların nedenini tek sorguyla bul
+    failed_ids = [order_id for order_id in requested if order_id not in results]
+    if failed_ids:
+        current = await db.execute(
+            select(Order.id, Order.status, Order.version).where(Order.id.in_(failed_ids))
+        )
+        current_by_id = {order_id: (status, version) for order_id, status, version in current.all()}
+        for order_id in failed_ids:
+            if order_id not in current_by_id:
+                results[order_id] = OrderTransitionResult(id=order_id, success=False, reason="not_found")
+                continue
+            status, version = current_by_id[order_id]
+            reason = "version_conflict" if version != requested[order_id] else "invalid_transition"
+            results[order_id] = OrderTransitionResult(
+                id=order_id, success=False, status=status.value, version=version, reason=reason
+            )
+
+    return [results[order_id] for order_id in requested]
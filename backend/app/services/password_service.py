@@ -0,0 +1,86 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# scrypt parametreleri (~50 ms, ~16 MB bellek / hash)
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+HASH_PREFIX = "scrypt"
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text.encode("ascii"))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=64 * 1024 * 1024)
+
+
+def hash_password_sync(password: str) -> str:
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{HASH_PREFIX}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(HASH_PREFIX + "$")
+
+
+def verify_password_sync(password: str, stored: str) -> tuple[bool, bool]:
+    """
+    Dönüş: (şifre doğru mu, yeniden hashlenmeli mi).
+    Hash formatında olmayan kayıtlar eski düz metin şifre kabul edilir.
+    """
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")), True
+
+    try:
+        _, n, r, p, salt, expected = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        digest = _scrypt(password, _b64decode(salt), n, r, p)
+    except ValueError:
+        return False, False
+
+    ok = hmac.compare_digest(digest, _b64decode(expected))
+    needs_rehash = (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return ok, needs_rehash
+
+
+class PasswordHasher:
+    """
+    Şifre hashleme/doğrulamayı event loop dışında, sınırlı bir thread havuzunda çalıştırır.
+    hashlib.scrypt çalışırken GIL'i bırakır; semaphore aynı anda bekleyen iş sayısını sınırlar
+    ki vardiya değişimindeki giriş dalgası havuzu ve belleği tüketmesin.
+    """
+
+    def __init__(self, max_workers: int = 4, max_concurrency: int = 16):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Olmayan kullanıcıda da aynı süre harcansın (kullanıcı var mı bilgisini sızdırmamak için)
+        self._dummy_hash = hash_password_sync(os.urandom(16).hex())
+
+    async def _run(self, func, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password_sync, password)
+
+    async def verify(self, password: str, stored: str | None) -> tuple[bool, bool]:
+        if stored is None:
+            await self._run(verify_password_sync, password, self._dummy_hash)
+            return False, False
+        return await self._run(verify_password_sync, password, stored)
+
+
+password_hasher = PasswordHasher()
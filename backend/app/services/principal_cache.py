@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.core.database import run_after_commit
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    """İstek boyunca kullanılan kimlik bilgisi (şifre alanı taşımaz)."""
+    id: int
+    email: str
+    name: str | None
+    role: UserRole
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, name=user.name, role=user.role)
+
+
+class PrincipalCache:
+    """
+    user_id → Principal için sınırlı boyutlu TTL/LRU cache.
+
+    Cache'teki kayıt yetkilidir: kullanıcı veya rolü değiştiğinde `invalidate`
+    ile silinir ve bir sonraki istekte veritabanından yeniden okunur.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Principal | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return principal
+
+    def put(self, principal: Principal) -> None:
+        self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+# Kullanıcı güncellenir/silinirse cache'ten düşür. Commit sonrası tekrar silinir ki
+# commit'ten önce eski veriyle yeniden doldurulmuş kayıt kalmasın.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        user_id = target.id
+        run_after_commit(session, lambda: principal_cache.invalidate(user_id), key=("principal", user_id))
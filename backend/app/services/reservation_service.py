@@ -0,0 +1,237 @@
+import asyncio
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+
+from app.core.database import run_after_commit
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.table import DiningTable, TableStatus
+
+# Alternatif saat önerileri: istenen saatin etrafında bu adımlarla, bu genişlikte aranır
+SUGGESTION_STEP = timedelta(minutes=15)
+SUGGESTION_SPAN = timedelta(hours=2)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Saat dilimli değerleri veritabanındaki gibi saat dilimsiz UTC'ye çevirir."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class ReservationIndex:
+    """
+    Masa başına başlangıca göre sıralı, çakışmayan rezervasyon aralıkları.
+
+    Aralıklar çakışmadığı için başlangıca göre sıralı liste bitişe göre de sıralıdır;
+    [start, end) ile çakışan bir kayıt varsa bu, başlangıcı `end`'den küçük olan son
+    kayıttır. Böylece çakışma kontrolü masa başına tek bir ikili aramadır (O(log n)).
+
+    Başlangıçta veritabanından bir kez yüklenir (bitmemiş BOOKED rezervasyonlar);
+    sonrasında rezervasyon oluşturma/iptal işlemleri commit edildikçe güncellenir.
+    Not: Tek worker varsayımı; asıl çakışma garantisi veritabanı kontrolündedir (book).
+    """
+
+    def __init__(self):
+        self._starts: dict[int, list[datetime]] = {}
+        self._slots: dict[int, list[tuple[datetime, datetime, int]]] = {}  # (start, end, rezervasyon id)
+        self._by_id: dict[int, tuple[int, datetime, datetime]] = {}
+        self.is_loaded = False
+        # Yükleme sürerken gelen değişiklikler; yükleme bitince tekrar uygulanır
+        self._backlog: list[tuple] | None = None
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.is_loaded:
+            return
+        async with self._lock:
+            if self.is_loaded:
+                return
+            self._backlog = []
+            try:
+                result = await db.execute(
+                    select(Reservation.id, Reservation.table_id, Reservation.starts_at, Reservation.ends_at)
+                    .where(Reservation.status == ReservationStatus.BOOKED, Reservation.ends_at > datetime.utcnow())
+                )
+                self.clear()
+                for reservation_id, table_id, starts_at, ends_at in result.all():
+                    self.add(reservation_id, table_id, starts_at, ends_at)
+                for change in self._backlog:
+                    self._apply(*change)
+                self.is_loaded = True
+            finally:
+                self._backlog = None
+
+    def clear(self) -> None:
+        self._starts, self._slots, self._by_id = {}, {}, {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, reservation_id: int, table_id: int, start: datetime, end: datetime) -> None:
+        if reservation_id in self._by_id:
+            return
+        slots = self._slots.setdefault(table_id, [])
+        starts = self._starts.setdefault(table_id, [])
+        position = bisect_left(starts, start)
+        starts.insert(position, start)
+        slots.insert(position, (start, end, reservation_id))
+        self._by_id[reservation_id] = (table_id, start, end)
+
+    def remove(self, reservation_id: int) -> None:
+        entry = self._by_id.pop(reservation_id, None)
+        if entry is None:
+            return
+        table_id, start, _ = entry
+        starts, slots = self._starts[table_id], self._slots[table_id]
+        position = bisect_left(starts, start)
+        while slots[position][2] != reservation_id:
+            position += 1
+        del starts[position], slots[position]
+
+    def conflict(self, table_id: int, start: datetime, end: datetime) -> int | None:
+        """[start, end) ile çakışan rezervasyonun id'si; yoksa None."""
+        starts = self._starts.get(table_id)
+        if not starts:
+            return None
+        position = bisect_left(starts, end)
+        if position and self._slots[table_id][position - 1][1] > start:
+            return self._slots[table_id][position - 1][2]
+        return None
+
+    def find_tables(self, tables: list[dict], party_size: int, start: datetime, end: datetime, limit: int = 5) -> list[dict]:
+        """
+        [start, end) için boş ve yeterli kapasitedeki masalar, en iyi uyan (en az boş
+        sandalye bırakan) önce. `tables`: kat planı kayıtları ({"id", "number", "seats", ...}).
+        """
+        candidates = sorted(
+            (table for table in tables if (table["seats"] or 0) >= party_size),
+            key=lambda table: (table["seats"], table["number"]),
+        )
+        found = []
+        for table in candidates:
+            if self.conflict(table["id"], start, end) is None:
+                found.append(table)
+                if len(found) == limit:
+                    break
+        return found
+
+    def suggest(
+        self,
+        tables: list[dict],
+        party_size: int,
+        around: datetime,
+        duration: timedelta,
+        step: timedelta = SUGGESTION_STEP,
+        span: timedelta = SUGGESTION_SPAN,
+        limit: int = 5,
+    ) -> list[tuple[datetime, dict]]:
+        """İstenen saate en yakın, en iyi uyan masası boş olan başlangıç saatleri."""
+        offsets = [step * i for i in range(1, int(span / step) + 1)]
+        suggestions = []
+        for offset in (delta for pair in zip(offsets, (-o for o in offsets)) for delta in pair):
+            start = around + offset
+            best = self.find_tables(tables, party_size, start, start + duration, limit=1)
+            if best:
+                suggestions.append((start, best[0]))
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+    def _apply(self, kind: str, *args) -> None:
+        if kind == "added":
+            self.add(*args)
+        else:
+            self.remove(*args)
+
+    def _record(self, kind: str, *args) -> None:
+        if self.is_loaded:
+            self._apply(kind, *args)
+        elif self._backlog is not None:
+            self._backlog.append((kind, *args))
+
+    # İndeks sadece işlem commit edildikten sonra güncellenir
+    def added_after_commit(self, session, reservation: Reservation) -> None:
+        args = (reservation.id, reservation.table_id, reservation.starts_at, reservation.ends_at)
+        run_after_commit(session, lambda: self._record("added", *args), key=("reservation", reservation.id))
+
+    def removed_after_commit(self, session, reservation_id: int) -> None:
+        run_after_commit(session, lambda: self._record("removed", reservation_id), key=("reservation", reservation_id))
+
+
+reservation_index = ReservationIndex()
+
+
+async def book(
+    db: AsyncSession,
+    table_id: int,
+    party_size: int,
+    starts_at: datetime,
+    ends_at: datetime,
+    customer_id: int | None = None,
+    guest_name: str | None = None,
+) -> tuple[Reservation | None, str | None]:
+    """
+    Masayı [starts_at, ends_at) için ayırır. Masa satırı FOR UPDATE ile kilitlenir; aynı
+    masaya eşzamanlı rezervasyonlar sıraya girer ve çakışma kontrolü veritabanında tekrar
+    yapılır (bellekteki indeks sadece hızlı arama içindir).
+
+    Dönüş: (rezervasyon, None) veya (None, neden). Nedenler: "table_not_found", "closed",
+    "too_small", "conflict". Commit yapmaz.
+    """
+    table = (await db.execute(
+        select(DiningTable.id, DiningTable.seats, DiningTable.status)
+        .where(DiningTable.id == table_id)
+        .with_for_update()
+    )).first()
+    if table is None:
+        return None, "table_not_found"
+    # Aramada gizlenen kapalı masalar doğrudan id ile de ayrılamaz
+    if table.status == TableStatus.CLOSED:
+        return None, "closed"
+    if (table.seats or 0) < party_size:
+        return None, "too_small"
+
+    overlapping = (await db.execute(
+        select(Reservation.id)
+        .where(
+            Reservation.table_id == table_id,
+            Reservation.status == ReservationStatus.BOOKED,
+            Reservation.starts_at < ends_at,
+            Reservation.ends_at > starts_at,
+        )
+        .limit(1)
+    )).scalar()
+    if overlapping is not None:
+        return None, "conflict"
+
+    reservation = Reservation(
+        table_id=table_id,
+        customer_id=customer_id,
+        guest_name=guest_name,
+        party_size=party_size,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        status=ReservationStatus.BOOKED,
+    )
+    db.add(reservation)
+    await db.flush()
+    reservation_index.added_after_commit(db, reservation)
+    return reservation, None
+
+
+async def cancel(db: AsyncSession, reservation_id: int) -> bool:
+    """BOOKED rezervasyonu iptal eder; iptal edilecek kayıt yoksa False. Commit yapmaz."""
+    cancelled = (await db.execute(
+        update(Reservation)
+        .where(Reservation.id == reservation_id, Reservation.status == ReservationStatus.BOOKED)
+        .values(status=ReservationStatus.CANCELLED)
+        .returning(Reservation.id)
+        .execution_options(synchronize_session=False)
+    )).scalar()
+    if cancelled is None:
+        return False
+    reservation_index.removed_after_commit(db, reservation_id)
+    return True
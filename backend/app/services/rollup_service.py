@@ -0,0 +1,237 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, case
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.order import Order, OrderItem
+from app.models.menu_item import MenuItem
+from app.models.sales_rollup import HourlySales, DailyItemSales, DailyPaymentSales
+from app.models.customer_stats import CustomerStats, CustomerItemStats
+
+UNKNOWN_PAYMENT_METHOD = "unknown"
+REBUILD_CHUNK = 5000
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _insert(db: AsyncSession):
+    # ON CONFLICT DO UPDATE hem PostgreSQL hem SQLite'ta aynı API ile var
+    if db.bind.dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+def _extreme(column, new, later: bool):
+    # LEAST/GREATEST SQLite'ta yok; NULL'u da ele alan taşınabilir CASE
+    return case((column.is_(None) | (new > column if later else new < column), new), else_=column)
+
+
+async def _increment(
+    db: AsyncSession,
+    model,
+    keys: tuple[str, ...],
+    rows: list[dict],
+    earliest: tuple[str, ...] = (),
+    latest: tuple[str, ...] = (),
+) -> None:
+    """
+    Satırları ekler; anahtar zaten varsa sayaçları üzerine toplar (tek upsert).
+    `earliest`/`latest` kolonları toplanmaz, en küçük/en büyük değer tutulur.
+    Satırlar anahtara göre sıralı yazılır ki eşzamanlı siparişler kilitleri aynı
+    sırada alsın (deadlock olmasın).
+    """
+    if not rows:
+        return
+    rows = sorted(rows, key=lambda row: tuple(row[k] for k in keys))
+    stmt = _insert(db)(model).values(rows)
+    set_ = {}
+    for name in rows[0]:
+        column, new = getattr(model, name), stmt.excluded[name]
+        if name in keys:
+            continue
+        if name in earliest or name in latest:
+            set_[name] = _extreme(column, new, later=name in latest)
+        else:
+            set_[name] = column + new
+    stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=set_)
+    await db.execute(stmt)
+
+
+async def add_placed(
+    db: AsyncSession,
+    orders: list[tuple[datetime, list[tuple[int, int, Decimal]]]],
+) -> None:
+    """orders: [(created_at, [(menu_item_id, quantity, unit_price), ...]), ...]"""
+    hourly = defaultdict(lambda: {"orders_count": 0, "items_sold": 0, "revenue": Decimal(0)})
+    items = defaultdict(lambda: {"quantity": 0, "revenue": Decimal(0)})
+
+    for created_at, lines in orders:
+        bucket = hourly[hour_bucket(created_at)]
+        bucket["orders_count"] += 1
+        for menu_item_id, quantity, unit_price in lines:
+            line_total = Decimal(unit_price) * quantity
+            bucket["items_sold"] += quantity
+            bucket["revenue"] += line_total
+            item = items[(created_at.date(), menu_item_id)]
+            item["quantity"] += quantity
+            item["revenue"] += line_total
+
+    await _increment(db, HourlySales, ("hour",), [
+        {"hour": hour, "paid_orders": 0, "paid_revenue": Decimal(0), **counters}
+        for hour, counters in hourly.items()
+    ])
+    await _increment(db, DailyItemSales, ("day", "menu_item_id"), [
+        {"day": day, "menu_item_id": menu_item_id, **counters}
+        for (day, menu_item_id), counters in items.items()
+    ])
+
+
+async def add_paid(
+    db: AsyncSession,
+    orders: list[tuple[datetime, str | None, Decimal]],
+) -> None:
+    """orders: [(created_at, payment_method, order_total), ...]"""
+    hourly = defaultdict(lambda: {"paid_orders": 0, "paid_revenue": Decimal(0)})
+    methods = defaultdict(lambda: {"paid_orders": 0, "revenue": Decimal(0)})
+
+    for created_at, payment_method, total in orders:
+        total = Decimal(total or 0)
+        bucket = hourly[hour_bucket(created_at)]
+        bucket["paid_orders"] += 1
+        bucket["paid_revenue"] += total
+        method = methods[(created_at.date(), payment_method or UNKNOWN_PAYMENT_METHOD)]
+        method["paid_orders"] += 1
+        method["revenue"] += total
+
+    await _increment(db, HourlySales, ("hour",), [
+        {"hour": hour, "orders_count": 0, "items_sold": 0, "revenue": Decimal(0), **counters}
+        for hour, counters in hourly.items()
+    ])
+    await _increment(db, DailyPaymentSales, ("day", "payment_method"), [
+        {"day": day, "payment_method": method, **counters}
+        for (day, method), counters in methods.items()
+    ])
+
+
+async def add_customer_orders(
+    db: AsyncSession,
+    orders: list[tuple[int, datetime, list[tuple[int, int, Decimal]]]],
+) -> None:
+    """orders: [(customer_id, created_at, [(menu_item_id, quantity, unit_price), ...]), ...]"""
+    customers = {}
+    items = defaultdict(lambda: {"quantity": 0, "spend": Decimal(0)})
+
+    for customer_id, created_at, lines in orders:
+        customer = customers.setdefault(customer_id, {
+            "orders_count": 0, "items_count": 0, "lifetime_spend": Decimal(0),
+            "first_order_at": created_at, "last_order_at": created_at,
+        })
+        customer["orders_count"] += 1
+        customer["first_order_at"] = min(customer["first_order_at"], created_at)
+        customer["last_order_at"] = max(customer["last_order_at"], created_at)
+        for menu_item_id, quantity, unit_price in lines:
+            line_total = Decimal(unit_price) * quantity
+            customer["items_count"] += quantity
+            customer["lifetime_spend"] += line_total
+            item = items[(customer_id, menu_item_id)]
+            item["quantity"] += quantity
+            item["spend"] += line_total
+
+    await _increment(db, CustomerStats, ("customer_id",), [
+        {"customer_id": customer_id, **counters} for customer_id, counters in customers.items()
+    ], earliest=("first_order_at",), latest=("last_order_at",))
+    await _increment(db, CustomerItemStats, ("customer_id", "menu_item_id"), [
+        {"customer_id": customer_id, "menu_item_id": menu_item_id, **counters}
+        for (customer_id, menu_item_id), counters in items.items()
+    ])
+
+
+async def record_order_placed(
+    db: AsyncSession,
+    created_at: datetime,
+    lines: list[tuple[int, int, Decimal]],
+    customer_id: int | None = None,
+) -> None:
+    """Sipariş verilirken, aynı transaction içinde çağrılır. Commit yapmaz."""
+    await add_placed(db, [(created_at, lines)])
+    if customer_id is not None:
+        await add_customer_orders(db, [(customer_id, created_at, lines)])
+
+
+async def record_orders_paid(db: AsyncSession, order_ids: list[int]) -> None:
+    """
+    Ödendi olarak işaretlenen (is_paid false → true) siparişleri rollup'lara ekler.
+    Aynı siparişi iki kez saymamak için sadece gerçekten durumu değişen id'ler verilmelidir.
+    Commit yapmaz.
+    """
+    if not order_ids:
+        return
+    result = await db.execute(
+        select(
+            Order.id,
+            Order.created_at,
+            Order.payment_method,
+            # Sabitlenmiş toplam; yoksa (eski siparişler) satırlardan
+            func.coalesce(
+                Order.total_amount,
+                func.sum(OrderItem.quantity * func.coalesce(OrderItem.unit_price, MenuItem.price)),
+                0,
+            ),
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .where(Order.id.in_(order_ids))
+        .group_by(Order.id, Order.created_at, Order.payment_method, Order.total_amount)
+    )
+    await add_paid(db, [(created_at, method, total) for _, created_at, method, total in result.all()])
+
+
+async def rebuild_rollups(db: AsyncSession) -> int:
+    """
+    Rollup tablolarını sipariş geçmişinden baştan hesaplar (backfill). Siparişler
+    id sırasıyla parçalar halinde okunur. Commit yapmaz; işlenen sipariş sayısını döner.
+    """
+    for model in (HourlySales, DailyItemSales, DailyPaymentSales, CustomerStats, CustomerItemStats):
+        await db.execute(delete(model))
+
+    processed = 0
+    last_id = 0
+    while True:
+        order_rows = (await db.execute(
+            select(Order.id, Order.created_at, Order.is_paid, Order.customer_id)
+            .where(Order.id > last_id, Order.created_at.is_not(None))
+            .order_by(Order.id)
+            .limit(REBUILD_CHUNK)
+        )).all()
+        if not order_rows:
+            return processed
+        last_id = order_rows[-1].id
+        order_ids = [row.id for row in order_rows]
+
+        lines_by_order: dict[int, list[tuple[int, int, Decimal]]] = defaultdict(list)
+        line_rows = await db.execute(
+            select(
+                OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity,
+                func.coalesce(OrderItem.unit_price, MenuItem.price),
+            )
+            .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            .where(OrderItem.order_id.in_(order_ids))
+        )
+        for order_id, menu_item_id, quantity, price in line_rows.all():
+            lines_by_order[order_id].append((menu_item_id, quantity, price))
+
+        await add_placed(db, [(row.created_at, lines_by_order[row.id]) for row in order_rows])
+        await add_customer_orders(db, [
+            (row.customer_id, row.created_at, lines_by_order[row.id]) for row in order_rows
+        ])
+
+        paid_ids = [row.id for row in order_rows if row.is_paid]
+        if paid_ids:
+            await record_orders_paid(db, paid_ids)
+
+        processed += len(order_rows)
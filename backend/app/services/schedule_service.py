@@ -0,0 +1,99 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete
+
+from app.models.schedule import Schedule
+
+
+def shift_interval(work_date: date, start_time: time, end_time: time) -> tuple[datetime, datetime]:
+    """Vardiyanın [başlangıç, bitiş) aralığı; bitiş başlangıçtan önceyse ertesi gün biter (gece vardiyası)."""
+    start = datetime.combine(work_date, start_time)
+    end = datetime.combine(work_date, end_time)
+    if end <= start:
+        end += timedelta(days=1)
+    return start, end
+
+
+def find_overlaps(shifts: list[dict]) -> list[tuple[dict, dict]]:
+    """
+    Personel başına çakışan vardiya çiftleri. Vardiyalar (personel, başlangıç) sırasıyla
+    bir kez taranır; o ana kadar en geç biten vardiyadan önce başlayan vardiya onunla
+    çakışır (O(n log n)). Her vardiya en fazla bir çiftte raporlanır.
+
+    `shifts`: {"user_id", "work_date", "start_time", "end_time", ...} sözlükleri.
+    """
+    keyed = sorted(
+        ((shift["user_id"], *shift_interval(shift["work_date"], shift["start_time"], shift["end_time"]), shift)
+         for shift in shifts),
+        key=lambda entry: entry[:3],
+    )
+    overlaps = []
+    latest = None  # (user_id, bitiş, vardiya): o ana kadar en geç biten
+    for user_id, start, end, shift in keyed:
+        if latest is not None and latest[0] == user_id and start < latest[1]:
+            overlaps.append((latest[2], shift))
+        if latest is None or latest[0] != user_id or end > latest[1]:
+            latest = (user_id, end, shift)
+    return overlaps
+
+
+async def find_conflicts(db: AsyncSession, shifts: list[dict]) -> list[tuple[dict, dict]]:
+    """
+    Yeni vardiyaların aynı personelin kayıtlı vardiyalarıyla ve birbirleriyle çakışmaları.
+    Kayıtlı vardiyalar tek sorguda okunur (ix_schedules_user_date); gece vardiyaları için
+    aralık bir gün geniş tutulur. Çakışmalarda kayıtlı vardiyalar "id" taşır.
+    Kontrol ile INSERT'in arasına eşzamanlı ekleme girmemesi için çağıran ilgili personel
+    satırlarını (users) id sırasıyla FOR UPDATE kilitlemiş olmalıdır.
+    """
+    if not shifts:
+        return []
+    user_ids = sorted({shift["user_id"] for shift in shifts})
+    first_day = min(shift["work_date"] for shift in shifts)
+    last_day = max(shift["work_date"] for shift in shifts)
+    existing = (await db.execute(
+        select(Schedule.id, Schedule.user_id, Schedule.work_date, Schedule.start_time, Schedule.end_time)
+        .where(
+            Schedule.user_id.in_(user_ids),
+            Schedule.work_date.between(first_day - timedelta(days=1), last_day + timedelta(days=1)),
+        )
+    )).all()
+
+    overlaps = find_overlaps([dict(row._mapping) for row in existing] + shifts)
+    # Sadece yeni bir vardiyayı içeren çakışmalar (kayıtlı veride önceden kalmış çakışmalar hariç)
+    return [pair for pair in overlaps if "id" not in pair[0] or "id" not in pair[1]]
+
+
+async def create_roster(
+    db: AsyncSession, week_start: date, shifts: list[dict], replace: bool = False
+) -> tuple[int, int, list[tuple[dict, dict]]]:
+    """
+    Vardiyaları tek transaction'da, tek çok satırlı INSERT ile ekler. Çakışma varsa
+    hiçbir şey eklenmez (çağıran rollback yapmalıdır). `replace` ise bu personelin
+    haftadaki (week_start .. week_start + 6) tüm mevcut vardiyaları önce silinir
+    (haftalık planı yeniden oluşturma).
+
+    Dönüş: (eklenen, silinen, çakışmalar). Commit yapmaz.
+    """
+    if not shifts:
+        return 0, 0, []
+
+    removed = 0
+    if replace:
+        user_ids = sorted({shift["user_id"] for shift in shifts})
+        week_end = week_start + timedelta(days=6)
+        result = await db.execute(
+            delete(Schedule)
+            .where(Schedule.user_id.in_(user_ids), Schedule.work_date.between(week_start, week_end))
+            .execution_options(synchronize_session=False)
+        )
+        removed = result.rowcount
+
+    overlaps = await find_conflicts(db, shifts)
+    if overlaps:
+        return 0, removed, overlaps
+
+    columns = ("user_id", "work_date", "start_time", "end_time")
+    # INSERT ... VALUES (...), (...), ...
+    await db.execute(insert(Schedule).values([{column: shift[column] for column in columns} for shift in shifts]))
+    return len(shifts), removed, []
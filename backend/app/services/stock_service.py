@@ -0,0 +1,133 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, values, column, func, case, Integer, Float, Boolean
+
+from app.models.ingredient import Ingredient
+from app.models.menu_item_ingredient import MenuItemIngredient
+
+
+async def _lock_ingredients(db: AsyncSession, ingredient_ids) -> None:
+    """
+    Güncellenecek malzeme satırlarını id sırasıyla kilitler (SELECT ... ORDER BY id FOR UPDATE).
+    UPDATE ... FROM satırları join planının gezdiği sırada kilitler; ortak malzemeli iki
+    eşzamanlı işlem ters sırada kilitleyip deadlock'a girebilir. Kilitler hep aynı sırada
+    alınınca ikinci işlem sadece bekler. `ingredient_ids`: id listesi veya alt sorgu.
+    """
+    await db.execute(
+        select(Ingredient.id)
+        .where(Ingredient.id.in_(ingredient_ids))
+        .order_by(Ingredient.id)
+        .with_for_update()
+    )
+
+
+async def deduct_stock_for_order(db: AsyncSession, lines: list[tuple[int, int]]) -> tuple[list[int], list[int]]:
+    """
+    Sipariş satırlarının (menu_item_id, quantity) tükettiği malzemeleri tek bir
+    set-based ifadeyle stoktan düşer.
+
+    Sipariş satırları × tarifler birleştirilir, malzeme bazında toplanır ve
+    `UPDATE ... FROM ... RETURNING` ile düşülür. Her satırdaki
+    `stock_quantity >= gereken` koşulu eşzamanlı siparişlerde de satır kilidi
+    alındıktan sonra yeniden değerlendirildiği için stok hiçbir zaman eksiye düşmez.
+
+    Dönüş: (düşülen malzeme id'leri, stoğu yetmeyen malzeme id'leri).
+    Yetersiz malzeme varsa çağıran taraf işlemi rollback etmelidir; böylece
+    kısmen yapılan düşümler de geri alınır.
+    """
+    if not lines:
+        return [], []
+
+    order_lines = values(
+        column("menu_item_id", Integer),
+        column("quantity", Integer),
+        name="order_lines",
+    ).data(lines)
+
+    await _lock_ingredients(
+        db,
+        select(MenuItemIngredient.ingredient_id)
+        .where(MenuItemIngredient.menu_item_id.in_(sorted({menu_item_id for menu_item_id, _ in lines}))),
+    )
+
+    # Malzeme başına toplam ihtiyaç
+    need = (
+        select(
+            MenuItemIngredient.ingredient_id.label("ingredient_id"),
+            func.sum(MenuItemIngredient.amount_used * order_lines.c.quantity).label("amount"),
+        )
+        .join(order_lines, order_lines.c.menu_item_id == MenuItemIngredient.menu_item_id)
+        .group_by(MenuItemIngredient.ingredient_id)
+        .cte("need")
+    )
+
+    # Koşullu düşüm: stoğu yetmeyen malzeme satırı güncellenmez
+    deducted = (
+        update(Ingredient)
+        .where(
+            Ingredient.id == need.c.ingredient_id,
+            Ingredient.stock_quantity >= need.c.amount,
+        )
+        .values(stock_quantity=Ingredient.stock_quantity - need.c.amount)
+        .returning(Ingredient.id)
+        .cte("deducted")
+    )
+
+    # Her ihtiyaç satırı için güncellenip güncellenmediğini tek seferde döndür
+    result = await db.execute(
+        select(need.c.ingredient_id, deducted.c.id)
+        .select_from(need.outerjoin(deducted, deducted.c.id == need.c.ingredient_id))
+    )
+
+    deducted_ids, short_ids = [], []
+    for ingredient_id, updated_id in result.all():
+        if updated_id is None:
+            short_ids.append(ingredient_id)
+        else:
+            deducted_ids.append(ingredient_id)
+    return deducted_ids, short_ids
+
+
+async def apply_stock_changes(
+    db: AsyncSession, changes: list[tuple[int, float | None, float | None]]
+) -> tuple[list, list[int]]:
+    """
+    Teslimat/sayım: (ingredient_id, delta, mutlak miktar) satırlarını tek bir
+    `UPDATE ... FROM (VALUES ...) RETURNING` ile uygular. Mutlak miktar verilmişse stok
+    ona eşitlenir, delta verilmişse eklenir (fire için negatif). Stoğu eksiye düşürecek
+    satırlar güncellenmez. Malzeme id'leri benzersiz olmalıdır.
+
+    Dönüş: (güncellenen (id, name, stock_quantity) satırları, güncellenmeyen id'ler —
+    bulunamayan veya eksiye düşecek). Güncellenmeyen varsa çağıran taraf rollback etmelidir.
+    """
+    if not changes:
+        return [], []
+
+    # NULL yerine (miktar, mutlak mı) çifti: tamamen NULL bir VALUES kolonu PostgreSQL'de text olurdu
+    delivery = values(
+        column("ingredient_id", Integer),
+        column("amount", Float),
+        column("is_absolute", Boolean),
+        name="delivery",
+    ).data([
+        (ingredient_id, absolute if absolute is not None else delta, absolute is not None)
+        for ingredient_id, delta, absolute in changes
+    ])
+
+    # Teslimat, sipariş düşümleriyle aynı malzemelere dokunur: kilitler aynı (id) sırayla alınır
+    await _lock_ingredients(db, sorted(ingredient_id for ingredient_id, _, _ in changes))
+
+    new_quantity = case(
+        (delivery.c.is_absolute, delivery.c.amount),
+        else_=func.coalesce(Ingredient.stock_quantity, 0) + delivery.c.amount,
+    )
+    result = await db.execute(
+        update(Ingredient)
+        .where(Ingredient.id == delivery.c.ingredient_id, new_quantity >= 0)
+        .values(stock_quantity=new_quantity)
+        .returning(Ingredient.id, Ingredient.name, Ingredient.stock_quantity)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.all()
+    updated_ids = {row.id for row in updated}
+    rejected = sorted(ingredient_id for ingredient_id, _, _ in changes if ingredient_id not in updated_ids)
+    return updated, rejected
@@ -0,0 +1,252 @@
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, exists, func
+from sqlalchemy.exc import IntegrityError
+
+from app.models.order import Order
+from app.models.table import DiningTable, TableStatus
+from app.models.table_session import TableSession
+from app.services.floor_plan import floor_plan, table_state, TABLE_STATE_COLUMNS
+from app.services.latency_service import grouped_percentiles
+
+
+async def open_session(db: AsyncSession, table_id: int, customer_id: int | None) -> int:
+    """Masaya oturulduğunda çağrılır; oturumu açar ve masaya bağlar. Commit yapmaz."""
+    session = TableSession(table_id=table_id, customer_id=customer_id, opened_at=datetime.utcnow())
+    db.add(session)
+    await db.flush()
+    await db.execute(
+        update(DiningTable)
+        .where(DiningTable.id == table_id)
+        .values(current_session_id=session.id)
+        .execution_options(synchronize_session=False)
+    )
+    return session.id
+
+
+async def close_session(db: AsyncSession, session_id: int | None) -> None:
+    """Masadan kalkıldığında çağrılır. Commit yapmaz."""
+    if session_id is not None:
+        await db.execute(
+            update(TableSession)
+            .where(TableSession.id == session_id)
+            .values(closed_at=datetime.utcnow())
+        )
+
+
+async def has_unpaid_orders(
+    db: AsyncSession, table_id: int, session_id: int | None, for_update: bool = False
+) -> bool:
+    """
+    Açık oturum varsa tek satırlık okuma. Oturumu olmayan (bu özellikten önce
+    oturulmuş) masalarda ödenmemiş sipariş aranır (ix_orders_unpaid).
+
+    `for_update`: oturum satırı işlem sonuna kadar kilitlenir; eşzamanlı sipariş
+    (add_order_to_session) kontrol ile sonraki yazma arasına giremez.
+    """
+    if session_id is not None:
+        stmt = select(TableSession.unpaid_count).where(TableSession.id == session_id)
+        if for_update:
+            stmt = stmt.with_for_update()
+        unpaid_count = (await db.execute(stmt)).scalar()
+        if unpaid_count is not None:
+            return unpaid_count > 0
+    return bool((await db.execute(
+        select(exists().where(Order.table_id == table_id, Order.is_paid == False))
+    )).scalar())
+
+
+async def _seat_failure(db: AsyncSession, table_number: int, customer_id: int) -> str:
+    # CAS tutmadıysa nedenini tek satırdan bul
+    row = (await db.execute(
+        select(DiningTable.status, DiningTable.current_user_id).where(DiningTable.number == table_number)
+    )).first()
+    if row is None:
+        return "not_found"
+    if row.current_user_id == customer_id:
+        return "already_here"
+    if row.current_user_id is not None:
+        return "occupied"
+    return "unavailable"
+
+
+async def seat_customer(db: AsyncSession, table_number: int, customer_id: int) -> tuple[dict | None, str | None]:
+    """
+    Masayı tek bir compare-and-set UPDATE ile alır: sadece AVAILABLE ve boş masa
+    OCCUPIED olur. Aynı anda oturmaya çalışan iki müşteriden yalnızca birinin UPDATE'i
+    satır döndürür. Başarılıysa masa oturumu açılır ve kat planı commit sonrası güncellenir.
+
+    Dönüş: (masa durumu, None) veya (None, neden). Nedenler: "not_found", "already_here",
+    "occupied", "unavailable", "already_seated" (müşteri başka bir masada). Commit yapmaz;
+    "already_seated" durumunda işlem geri alınmıştır.
+    """
+    try:
+        result = await db.execute(
+            update(DiningTable)
+            .where(
+                DiningTable.number == table_number,
+                DiningTable.status == TableStatus.AVAILABLE,
+                DiningTable.current_user_id.is_(None),
+            )
+            .values(status=TableStatus.OCCUPIED, current_user_id=customer_id)
+            .returning(*TABLE_STATE_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    except IntegrityError:
+        # uq_tables_current_user_id: müşteri aynı anda başka bir masaya oturdu
+        await db.rollback()
+        return None, "already_seated"
+
+    row = result.first()
+    if row is None:
+        return None, await _seat_failure(db, table_number, customer_id)
+
+    state = table_state(row)
+    await open_session(db, state["id"], customer_id)
+    floor_plan.changed_after_commit(db, state)
+    return state, None
+
+
+# Kilit sırası: sipariş ve ödeme yolları önce oturum satırını (table_sessions), sonra
+# rollup satırlarını (sales_hourly vb.) günceller. place_order add_order_to_session →
+# record_order_placed; ödemeler settle_session_orders → record_orders_paid sırasıyla
+# çağırır. Ters sıra, aynı masada eşzamanlı sipariş ve ödemede deadlock'a yol açar.
+async def release_table(
+    db: AsyncSession, customer_id: int, table_number: int | None = None
+) -> tuple[dict | None, str | None]:
+    """
+    Müşterinin oturduğu masayı (verilmişse `table_number` numaralı masayı) boşaltır ve
+    oturumu kapatır. Ödenmemiş sipariş varsa boşaltmaz: oturum satırı FOR UPDATE ile
+    kilitlenip kontrol edilir, böylece kontrol ile boşaltma arasında sipariş eklenemez
+    (bekleyen sipariş kapanmış oturuma eklenemez ve reddedilir). UPDATE sadece masa
+    hâlâ bu müşterideyse satır döndürür.
+
+    Dönüş: (masa durumu, None) veya (None, neden). Nedenler: "not_found", "not_seated", "unpaid".
+    Commit yapmaz.
+    """
+    stmt = select(DiningTable.id, DiningTable.current_user_id, DiningTable.current_session_id)
+    if table_number is not None:
+        stmt = stmt.where(DiningTable.number == table_number)
+    else:
+        stmt = stmt.where(DiningTable.current_user_id == customer_id)
+    table = (await db.execute(stmt)).first()
+    if table is None:
+        return None, "not_found" if table_number is not None else "not_seated"
+    if table.current_user_id != customer_id:
+        return None, "not_seated"
+    if await has_unpaid_orders(db, table.id, table.current_session_id, for_update=True):
+        return None, "unpaid"
+
+    result = await db.execute(
+        update(DiningTable)
+        .where(DiningTable.id == table.id, DiningTable.current_user_id == customer_id)
+        .values(status=TableStatus.AVAILABLE, current_user_id=None, current_session_id=None)
+        .returning(*TABLE_STATE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.first()
+    if row is None:
+        return None, "not_seated"
+
+    state = table_state(row)
+    await close_session(db, table.current_session_id)
+    floor_plan.changed_after_commit(db, state)
+    return state, None
+
+
+async def add_order_to_session(db: AsyncSession, session_id: int, amount: Decimal) -> bool:
+    """
+    Sipariş verildiğinde, aynı transaction içinde. Sayaçlar atomik olarak artırılır.
+    Oturum bu arada kapandıysa (müşteri masadan kalktı) False döner; çağıran rollback yapmalıdır.
+    """
+    result = await db.execute(
+        update(TableSession)
+        .where(TableSession.id == session_id, TableSession.closed_at.is_(None))
+        .values(
+            orders_count=TableSession.orders_count + 1,
+            unpaid_count=TableSession.unpaid_count + 1,
+            total_amount=TableSession.total_amount + amount,
+            open_balance=TableSession.open_balance + amount,
+        )
+    )
+    return result.rowcount == 1
+
+
+async def settle_session_orders(db: AsyncSession, order_ids: list[int]) -> None:
+    """
+    Ödendi olarak işaretlenen (is_paid false → true) siparişleri oturumların açık
+    bakiyesinden düşer (oturum başına tek satır güncellenir). Aynı siparişin iki kez
+    düşülmemesi için sadece gerçekten durumu değişen id'ler verilmelidir. Commit yapmaz.
+    """
+    if not order_ids:
+        return
+    totals = (await db.execute(
+        select(Order.session_id, func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0))
+        .where(Order.id.in_(order_ids), Order.session_id.is_not(None))
+        .group_by(Order.session_id)
+    )).all()
+
+    # Genelde tek oturum (müşteri ödemesi); sıralı güncelleme kilitleri hep aynı sırada alır
+    for session_id, count, amount in sorted(totals):
+        await db.execute(
+            update(TableSession)
+            .where(TableSession.id == session_id)
+            .values(
+                unpaid_count=TableSession.unpaid_count - count,
+                open_balance=TableSession.open_balance - amount,
+            )
+        )
+
+
+async def turnover_report(db: AsyncSession, start: datetime, end: datetime) -> dict:
+    """
+    [start, end] aralığında kapanan oturumlar: masa başına oturum sayısı, günlük devir
+    (oturum / gün), oturma süresi (dakika) p50/p90/p99 ve oturum başına ortalama tutar.
+    """
+    rows = (await db.execute(
+        select(TableSession.table_id, TableSession.opened_at, TableSession.closed_at, TableSession.total_amount)
+        .where(TableSession.closed_at >= start, TableSession.closed_at <= end)
+    )).all()
+
+    days = max((end - start).total_seconds() / 86400, 1 / 24)
+    report = {"start": start, "end": end, "sessions": len(rows), "overall": None, "by_table": []}
+    if not rows:
+        return report
+
+    table_ids, opened, closed, amounts = zip(*rows)
+    table_ids = np.asarray(table_ids, dtype=np.int64)
+    dwell = (
+        np.asarray(closed, dtype="datetime64[us]") - np.asarray(opened, dtype="datetime64[us]")
+    ) / np.timedelta64(1, "m")
+    amounts = np.asarray([float(amount or 0) for amount in amounts])
+
+    numbers = dict((await db.execute(select(DiningTable.id, DiningTable.number))).all())
+
+    def stats(keys, counts, matrix, spend):
+        return [
+            {
+                "table_id": int(key),
+                "table_number": numbers.get(int(key)),
+                "sessions": int(count),
+                "turnover_per_day": round(int(count) / days, 2),
+                "dwell_p50": round(float(row[0]), 1),
+                "dwell_p90": round(float(row[1]), 1),
+                "dwell_p99": round(float(row[2]), 1),
+                "avg_spend": round(float(total) / int(count), 2),
+            }
+            for key, count, row, total in zip(keys, counts, matrix, spend)
+        ]
+
+    keys, counts, matrix = grouped_percentiles(table_ids, dwell)
+    spend = np.bincount(np.searchsorted(keys, table_ids), weights=amounts, minlength=len(keys))
+    report["by_table"] = stats(keys, counts, matrix, spend)
+
+    overall = stats(*grouped_percentiles(np.zeros(len(dwell), dtype=np.int64), dwell), [amounts.sum()])[0]
+    overall.update(table_id=None, table_number=None)
+    # Genel devir: masa başına günlük ortalama oturum
+    overall["turnover_per_day"] = round(len(rows) / days / max(len(numbers), 1), 2)
+    report["overall"] = overall
+    return report
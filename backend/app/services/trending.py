@@ -0,0 +1,113 @@
+import heapq
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import run_after_commit
+from app.models.order import Order, OrderItem
+
+BUCKET_SECONDS = 60
+DAY_SECONDS = 24 * 60 * 60
+
+# Kayan pencereler (saniye); "today" UTC gece yarısından itibarendir
+ROLLING_WINDOWS = {"15m": 15 * 60, "1h": 60 * 60}
+WINDOWS = (*ROLLING_WINDOWS, "today")
+
+
+class TrendingCounter:
+    """
+    Dakikalık kovalardan oluşan halka + pencere başına yürüyen toplamlar.
+
+    Her satış kendi dakika kovasına ve kapsadığı pencerelerin toplamına eklenir;
+    zaman ilerledikçe pencereden çıkan kovalar toplamdan düşülür. Okuma sadece
+    pencere toplamı üzerinde top-K heap'tir (menü boyutunda, sorgu yok).
+    """
+
+    def __init__(self):
+        self._buckets: dict[int, Counter] = {}  # kova no → menu_item_id → adet (artan sırada)
+        self._totals = {window: Counter() for window in WINDOWS}
+        self._floors = {window: 0 for window in WINDOWS}  # pencereye dahil ilk kova
+
+    @staticmethod
+    def _bucket(ts: float) -> int:
+        return int(ts // BUCKET_SECONDS)
+
+    @staticmethod
+    def _floor(window: str, now_bucket: int) -> int:
+        if window == "today":
+            return now_bucket - now_bucket % (DAY_SECONDS // BUCKET_SECONDS)
+        return now_bucket - ROLLING_WINDOWS[window] // BUCKET_SECONDS + 1
+
+    def _advance(self, now: float) -> None:
+        now_bucket = self._bucket(now)
+        for window, totals in self._totals.items():
+            new_floor = self._floor(window, now_bucket)
+            old_floor = self._floors[window]
+            if new_floor <= old_floor:
+                continue
+            if new_floor - old_floor > len(self._buckets):
+                expired = [b for b in self._buckets if old_floor <= b < new_floor]
+            else:
+                expired = [b for b in range(old_floor, new_floor) if b in self._buckets]
+            for bucket in expired:
+                totals.subtract(self._buckets[bucket])
+            self._totals[window] = +totals  # sıfırlanan ürünleri at
+            self._floors[window] = new_floor
+
+        # Hiçbir pencerede kalmayan kovaları sil
+        oldest = min(self._floors.values())
+        while self._buckets and next(iter(self._buckets)) < oldest:
+            del self._buckets[next(iter(self._buckets))]
+
+    def add(self, lines: list[tuple[int, int]], ts: float | None = None, now: float | None = None) -> None:
+        """lines: [(menu_item_id, quantity), ...]; ts: satış zamanı (epoch saniye)."""
+        now = time.time() if now is None else now
+        ts = now if ts is None else ts
+        self._advance(now)
+
+        bucket = self._bucket(ts)
+        if bucket < min(self._floors.values()) or bucket > self._bucket(now):
+            return
+        if bucket not in self._buckets:
+            self._buckets[bucket] = Counter()
+            if next(reversed(self._buckets)) != bucket:
+                # Geç gelen (sıra dışı) kova: artan sırayı koru
+                self._buckets = dict(sorted(self._buckets.items()))
+        counts = self._buckets[bucket]
+
+        for menu_item_id, quantity in lines:
+            counts[menu_item_id] += quantity
+            for window, totals in self._totals.items():
+                if bucket >= self._floors[window]:
+                    totals[menu_item_id] += quantity
+
+    def top(self, window: str, k: int = 10, now: float | None = None) -> list[tuple[int, int]]:
+        self._advance(time.time() if now is None else now)
+        return heapq.nlargest(k, self._totals[window].items(), key=itemgetter(1))
+
+    def record_after_commit(self, session, lines: list[tuple[int, int]]) -> None:
+        run_after_commit(session, lambda: self.add(lines))
+
+    async def warm(self, db: AsyncSession) -> None:
+        """Başlangıçta bugünün ve son saatin satışlarını veritabanından yükler."""
+        now = time.time()
+        since = datetime.utcfromtimestamp(min(
+            now - max(ROLLING_WINDOWS.values()),
+            self._floor("today", self._bucket(now)) * BUCKET_SECONDS,
+        ))
+        result = await db.execute(
+            select(Order.created_at, OrderItem.menu_item_id, OrderItem.quantity)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .where(Order.created_at >= since)
+            .order_by(Order.created_at)
+        )
+        epoch = datetime(1970, 1, 1)
+        for created_at, menu_item_id, quantity in result.all():
+            self.add([(menu_item_id, quantity)], ts=(created_at - epoch) / timedelta(seconds=1), now=now)
+
+
+trending = TrendingCounter()
@@ -0,0 +1,30 @@
+"""
+Rapor rollup tablolarını (sales_hourly, sales_item_daily, sales_payment_daily) ve
+müşteri özetlerini (customer_stats, customer_item_stats) sipariş geçmişinden baştan oluşturur. İlk kurulumda veya rollup'lar şüpheli
+olduğunda çalıştırılır; tek transaction'da silip yeniden yazar.
+
+    cd backend
+    python -m scripts.backfill_rollups
+"""
+import asyncio
+import time
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.services.rollup_service import rebuild_rollups
+
+
+async def main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        processed = await rebuild_rollups(db)
+        await db.commit()
+    print(f"{processed} sipariş işlendi ({time.perf_counter() - started:.1f} s)")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
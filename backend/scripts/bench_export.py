@@ -0,0 +1,67 @@
+"""
+Sipariş satırı dökümü (/reports/export/order-lines) bellek benchmark'ı.
+
+Gerekirse veritabanını --lines kadar sipariş satırına tamamlar (check_query_plans ile
+aynı örnek veri), ardından CSV/NDJSON akışını uçtan uca tüketir ve her partide
+işlemin RSS değerini örnekler. RSS artışı --max-growth-mb'yi aşarsa sıfırdan
+farklı kodla çıkar.
+
+DİKKAT: Veritabanına örnek veri yazar, sadece test veritabanında çalıştırın.
+
+    cd backend
+    python -m scripts.bench_export --lines 1000000 --format csv
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+
+from app.core.database import engine
+from app.services.export_service import order_lines_query, iter_csv, iter_ndjson
+from scripts.check_query_plans import seed
+
+
+def rss_mb() -> float:
+    # Anlık RSS (Linux); yoksa tepe değer
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main(lines: int, fmt: str, max_growth_mb: float) -> int:
+    await seed(lines // 3)  # örnek veride sipariş başına 3 satır
+
+    iterator = iter_ndjson if fmt == "ndjson" else iter_csv
+    baseline = rss_mb()
+    peak = baseline
+    total_bytes = 0
+    chunks = 0
+
+    started = time.perf_counter()
+    async for chunk in iterator(order_lines_query()):
+        total_bytes += len(chunk.encode("utf-8"))
+        chunks += 1
+        peak = max(peak, rss_mb())
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    growth = peak - baseline
+    print(f"{fmt}: {total_bytes / 1024 / 1024:.1f} MB, {chunks} parça, {elapsed:.1f} s")
+    print(f"RSS başlangıç: {baseline:.1f} MB  tepe: {peak:.1f} MB  artış: {growth:.1f} MB")
+    if growth > max_growth_mb:
+        print(f"HATA: RSS artışı {max_growth_mb:.0f} MB sınırını aştı")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--max-growth-mb", type=float, default=64)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.lines, args.format, args.max_growth_mb)))
@@ -0,0 +1,119 @@
+"""
+Talep tahmini (forecast_service) benchmark'ı.
+
+İki yıllık sentetik saatlik sipariş verisi üretir (gün × saat profili, yavaş büyüme ve
+Poisson gürültüsü), NumPy ile hafta × saat matrisini kurup üstel düzeltme ve personel
+önerisini hesaplar; aynı hesabı saf Python döngüsüyle de yapıp sonuçları karşılaştırır.
+--db ile veri sales_hourly tablosuna yazılır ve staffing_forecast uçtan uca ölçülür.
+Süre --max-ms'yi aşarsa sıfırdan farklı kodla çıkar.
+
+DİKKAT: --db veritabanına örnek rollup verisi yazar, sadece test veritabanında çalıştırın.
+
+    cd backend
+    python -m scripts.bench_forecast --weeks 104 --db
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, insert
+
+from app.core.database import engine, AsyncSessionLocal
+from app.models.sales_rollup import HourlySales
+from app.services.forecast_service import (
+    HOURS_PER_WEEK, DEFAULT_ALPHA, week_start, weekly_matrix, smooth_weekly, staffing, staffing_forecast
+)
+
+
+def synthetic_history(weeks: int, now: datetime, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    origin = week_start(now) - timedelta(weeks=weeks)
+    hour = np.arange(24)
+    # Öğle ve akşam yoğunluğu, hafta sonu daha kalabalık; 10:00-23:00 arası açık
+    daily = 6 * np.exp(-((hour - 12.5) ** 2) / 2) + 9 * np.exp(-((hour - 19.5) ** 2) / 3)
+    daily[(hour < 10) | (hour > 23)] = 0
+    profile = np.concatenate([daily * (1.4 if day >= 5 else 1.0) for day in range(7)])
+    growth = np.linspace(0.8, 1.2, weeks)[:, None]
+    counts = rng.poisson(profile[None, :] * growth).reshape(-1).astype(float)
+
+    hours = np.datetime64(origin, "h") + np.arange(weeks * HOURS_PER_WEEK)
+    nonzero = counts > 0  # rollup'ta sadece siparişli saatler satır olarak bulunur
+    return hours[nonzero], counts[nonzero]
+
+
+def python_forecast(hours, counts, origin: datetime, weeks: int, alpha: float) -> list[float]:
+    # Karşılaştırma için döngülü hesap: dilim başına haftalar üzerinde özyineleme
+    grid = [[0.0] * HOURS_PER_WEEK for _ in range(weeks)]
+    for moment, count in zip(hours.astype(datetime), counts):
+        offset = int((moment - origin).total_seconds() // 3600)
+        grid[offset // HOURS_PER_WEEK][offset % HOURS_PER_WEEK] += count
+    first = next(i for i, row in enumerate(grid) if any(row))
+    levels = list(grid[first])
+    for row in grid[first + 1:]:
+        levels = [alpha * value + (1 - alpha) * level for value, level in zip(row, levels)]
+    return levels
+
+
+async def seed_rollup(hours: np.ndarray, counts: np.ndarray) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(HourlySales.__table__.create, checkfirst=True)
+    rows = [
+        {"hour": moment, "orders_count": int(count), "items_sold": int(count) * 3, "revenue": 0, "paid_orders": 0, "paid_revenue": 0}
+        for moment, count in zip(hours.astype(datetime), counts)
+    ]
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(HourlySales).where(HourlySales.hour >= rows[0]["hour"], HourlySales.hour <= rows[-1]["hour"]))
+        await db.execute(insert(HourlySales), rows)
+        await db.commit()
+
+
+async def main(weeks: int, use_db: bool, max_ms: float, seed: int) -> int:
+    now = datetime.utcnow()
+    origin = week_start(now) - timedelta(weeks=weeks)
+    hours, counts = synthetic_history(weeks, now, seed)
+    print(f"{weeks} hafta, {len(hours)} saatlik satır")
+
+    started = time.perf_counter()
+    expected = smooth_weekly(weekly_matrix(hours, counts, origin, weeks), DEFAULT_ALPHA)
+    waiters, kitchen = staffing(expected)
+    vectorized_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    reference = python_forecast(hours, counts, origin, weeks, DEFAULT_ALPHA)
+    python_ms = (time.perf_counter() - started) * 1000
+
+    print(f"NumPy: {vectorized_ms:.2f} ms   saf Python: {python_ms:.1f} ms")
+    print(f"haftalık öneri: {waiters.sum()} garson-saat, {kitchen.sum()} mutfak-saat")
+    failed = False
+    if not np.allclose(expected, reference):
+        print("HATA: NumPy ve döngülü hesap farklı")
+        failed = True
+
+    elapsed_ms = vectorized_ms
+    if use_db:
+        try:
+            await seed_rollup(hours, counts)
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                forecast = await staffing_forecast(db, now, history_weeks=weeks)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+        finally:
+            await engine.dispose()
+        print(f"staffing_forecast (veritabanı dahil): {elapsed_ms:.1f} ms, {forecast['waiter_hours']} garson-saat")
+
+    if elapsed_ms > max_ms:
+        print(f"HATA: {elapsed_ms:.1f} ms, {max_ms:.0f} ms sınırını aştı")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=104)
+    parser.add_argument("--db", action="store_true", help="sales_hourly'e yazıp uçtan uca ölç")
+    parser.add_argument("--max-ms", type=float, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.weeks, args.db, args.max_ms, args.seed)))
@@ -0,0 +1,71 @@
+"""
+Vardiya değişimi giriş dalgası benchmark'ı.
+
+Aynı anda N giriş (şifre doğrulama) yapılırken event loop üzerinde 5 ms'de bir
+çalışan bir "sipariş" görevi simüle edilir ve bu görevin gecikmesi ölçülür.
+Satır içi (inline) doğrulama ile thread havuzundaki `password_hasher` karşılaştırılır.
+Veritabanı gerekmez.
+
+    cd backend
+    python -m scripts.bench_login_burst --logins 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.password_service import (
+    password_hasher, hash_password_sync, verify_password_sync
+)
+
+TICK_SECONDS = 0.005
+
+
+async def order_ticker(stop: asyncio.Event, delays: list[float]) -> None:
+    # Sipariş isteklerini temsil eder: her tikte planlanandan ne kadar geç uyandığını ölç
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        delays.append((time.perf_counter() - started - TICK_SECONDS) * 1000)
+
+
+async def inline_login(password: str, stored: str) -> None:
+    verify_password_sync(password, stored)  # event loop'u bloklar
+
+
+async def pooled_login(password: str, stored: str) -> None:
+    await password_hasher.verify(password, stored)
+
+
+async def run(label: str, login, logins: int, stored: str) -> None:
+    stop = asyncio.Event()
+    delays: list[float] = []
+    ticker = asyncio.create_task(order_ticker(stop, delays))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login("parola123", stored) for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    delays.sort()
+    worst = delays[-1] if delays else 0.0
+    p99 = delays[int(len(delays) * 0.99) - 1] if delays else 0.0
+    print(f"{label:<8} {logins} giriş {elapsed:.2f} s | sipariş görevi gecikmesi "
+          f"p50: {statistics.median(delays):.1f} ms  p99: {p99:.1f} ms  en kötü: {worst:.1f} ms  "
+          f"(tik sayısı: {len(delays)})")
+
+
+async def main(logins: int):
+    stored = hash_password_sync("parola123")
+    await run("inline", inline_login, logins, stored)
+    await run("havuz", pooled_login, logins, stored)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
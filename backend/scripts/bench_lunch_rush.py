@@ -0,0 +1,136 @@
+"""
+Öğle yoğunluğu benchmark'ı: 200 müşteri aynı anda sipariş verir.
+
+`place_order` endpoint fonksiyonu doğrudan çağrılır (HTTP katmanı hariç) ve
+saniyedeki sipariş sayısı ile stok tutarlılığı (eksiye düşen malzeme yok) raporlanır.
+
+DİKKAT: Veritabanına test verisi yazar, sadece test veritabanında çalıştırın.
+
+    cd backend
+    python -m scripts.bench_lunch_rush --customers 200 --lines 6
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.exc import DBAPIError
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.models.user import User, UserRole
+from app.models.table import DiningTable, TableStatus
+from app.models.menu_item import MenuItem
+from app.models.ingredient import Ingredient
+from app.models.menu_item_ingredient import MenuItemIngredient
+from app.schemas.order import OrderCreate, OrderItemIn
+from app.api.orders import place_order
+
+INGREDIENTS = 30
+MENU_ITEMS = 20
+INGREDIENTS_PER_ITEM = 5
+
+
+async def seed(customers: int, stock: float):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    run_id = int(time.time())
+    async with AsyncSessionLocal() as db:
+        ingredients = [
+            Ingredient(name=f"bench-{run_id}-ing-{i}", stock_quantity=stock)
+            for i in range(INGREDIENTS)
+        ]
+        menu_items = [
+            MenuItem(name=f"bench-{run_id}-item-{i}", price=10, is_available=True)
+            for i in range(MENU_ITEMS)
+        ]
+        db.add_all(ingredients + menu_items)
+        await db.flush()
+
+        for mi in menu_items:
+            for ing in random.sample(ingredients, INGREDIENTS_PER_ITEM):
+                db.add(MenuItemIngredient(menu_item_id=mi.id, ingredient_id=ing.id, amount_used=1.0))
+
+        users = [
+            User(email=f"bench-{run_id}-{i}@example.com", password="x", role=UserRole.CUSTOMER)
+            for i in range(customers)
+        ]
+        db.add_all(users)
+        await db.flush()
+
+        table_number_base = run_id * 1000
+        for i, user in enumerate(users):
+            db.add(DiningTable(
+                number=table_number_base + i,
+                status=TableStatus.OCCUPIED,
+                current_user_id=user.id,
+            ))
+        await db.commit()
+
+        tables = await db.execute(
+            select(DiningTable.current_user_id, DiningTable.id)
+            .where(DiningTable.current_user_id.in_([u.id for u in users]))
+        )
+        table_by_user = dict(tables.all())
+
+    return users, [table_by_user[u.id] for u in users], [mi.id for mi in menu_items], [i.id for i in ingredients]
+
+
+async def customer(user: User, table_id: int, menu_item_ids: list[int], lines: int) -> str:
+    payload = OrderCreate(
+        table_id=table_id,
+        items=[
+            OrderItemIn(menu_item_id=mi_id, quantity=random.randint(1, 2))
+            for mi_id in random.sample(menu_item_ids, lines)
+        ],
+    )
+    async with AsyncSessionLocal() as db:
+        try:
+            await place_order(payload, db=db, current_user=user)
+            return "accepted"
+        except HTTPException:
+            return "rejected"
+        except DBAPIError:
+            # Deadlock vb. veritabanı hatası: tüm koşuyu durdurmaz, başarısız sipariş sayılır
+            await db.rollback()
+            return "failed"
+
+
+async def main(customers: int, lines: int, stock: float):
+    users, table_ids, menu_item_ids, ingredient_ids = await seed(customers, stock)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        customer(user, table_id, menu_item_ids, lines)
+        for user, table_id in zip(users, table_ids)
+    ])
+    elapsed = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as db:
+        negative = await db.execute(
+            select(func.count())
+            .select_from(Ingredient)
+            .where(Ingredient.id.in_(ingredient_ids), Ingredient.stock_quantity < 0)
+        )
+        negative_count = negative.scalar()
+
+    accepted = results.count("accepted")
+    failed = results.count("failed")
+    print(f"müşteri: {customers}, satır/sipariş: {lines}")
+    print(f"kabul edilen: {accepted}, reddedilen: {results.count('rejected')}, hata (deadlock vb.): {failed}")
+    print(f"süre: {elapsed:.2f} s, {accepted / elapsed:.1f} sipariş/s")
+    print(f"eksiye düşen malzeme: {negative_count}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=6)
+    parser.add_argument("--stock", type=float, default=500.0,
+                        help="Düşük verilirse reddedilen siparişler ve oversell koruması görülür")
+    args = parser.parse_args()
+    asyncio.run(main(args.customers, args.lines, args.stock))
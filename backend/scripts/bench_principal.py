@@ -0,0 +1,76 @@
+"""
+Kimlik çözümleme benchmark'ı: `get_current_user` cache isabeti ile
+veritabanı sorgusu (cache boş) arasındaki istek başı gecikme farkını ölçer.
+
+DİKKAT: Veritabanına bir test kullanıcısı yazar, sadece test veritabanında çalıştırın.
+
+    cd backend
+    python -m scripts.bench_principal --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.models.user import User, UserRole
+from app.api.auth import create_access_token
+from app.dependencies.auth import get_current_user
+from app.services.principal_cache import principal_cache
+
+
+async def ensure_user() -> User:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.email == "bench-principal@example.com"))
+        user = result.scalar_one_or_none()
+        if user is None:
+            user = User(email="bench-principal@example.com", password="x", role=UserRole.CUSTOMER)
+            db.add(user)
+            await db.commit()
+        return user
+
+
+async def measure(token: str, requests: int, cached: bool) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        if not cached:
+            principal_cache.clear()
+        # Her istek kendi session'ını açar (get_async_session ile aynı)
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await get_current_user(token=token, db=db)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{label:<22} ort: {statistics.mean(timings):.3f} ms  p50: {statistics.median(timings):.3f} ms  p99: {p99:.3f} ms")
+
+
+async def main(requests: int):
+    user = await ensure_user()
+    token = create_access_token(data={"sub": user.email, "uid": user.id, "role": user.role.value})
+
+    uncached = await measure(token, requests, cached=False)
+    async with AsyncSessionLocal() as db:
+        await get_current_user(token=token, db=db)  # cache'i ısıt
+    cached = await measure(token, requests, cached=True)
+
+    report("DB sorgusu (cache yok)", uncached)
+    report("cache isabeti", cached)
+    print(f"istek başı kazanç: {statistics.mean(uncached) - statistics.mean(cached):.3f} ms")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,97 @@
+"""
+Rezervasyon müsaitlik araması benchmark'ı: masa başına sıralı aralık indeksi
+(ReservationIndex) ile tüm rezervasyonları tarayan naif kontrol karşılaştırılır.
+
+Bir aylık örnek rezervasyon üretilir (her masa için her akşam 17:00-23:30 arası,
+çakışmayan 1.5-2.5 saatlik rezervasyonlar), ardından akşam saatlerinde rastgele
+"N kişi, saat X, Y saat" aramaları iki yöntemle yapılır ve sonuçların aynı olduğu
+doğrulanır. Veritabanı kullanmaz.
+
+    cd backend
+    python -m scripts.bench_reservations --tables 40 --days 30 --searches 5000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.services.reservation_service import ReservationIndex
+
+
+def month_of_bookings(tables: list[dict], days: int, rng: random.Random) -> list[tuple]:
+    bookings = []
+    first_day = datetime(2026, 1, 1)
+    for day in range(days):
+        evening = first_day + timedelta(days=day, hours=17)
+        for table in tables:
+            cursor = evening + timedelta(minutes=15 * rng.randint(0, 4))
+            while cursor < evening + timedelta(hours=6):
+                length = timedelta(minutes=rng.choice((90, 120, 150)))
+                bookings.append((len(bookings) + 1, table["id"], cursor, cursor + length))
+                cursor += length + timedelta(minutes=15 * rng.randint(0, 6))
+    return bookings
+
+
+def naive_find(bookings: list[tuple], tables: list[dict], party_size: int, start: datetime, end: datetime) -> list[dict]:
+    # İndekssiz: her arama tüm rezervasyonları tarar
+    busy = {table_id for _, table_id, booked_start, booked_end in bookings if booked_start < end and booked_end > start}
+    candidates = sorted(
+        (table for table in tables if table["seats"] >= party_size),
+        key=lambda table: (table["seats"], table["number"]),
+    )
+    return [table for table in candidates if table["id"] not in busy][:5]
+
+
+def report(label: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    print(
+        f"{label:<22} ort: {statistics.mean(timings) * 1000:8.3f} ms  "
+        f"p99: {timings[int(len(timings) * 0.99) - 1] * 1000:8.3f} ms"
+    )
+
+
+def main(table_count: int, days: int, searches: int, seed: int) -> int:
+    rng = random.Random(seed)
+    tables = [{"id": i, "number": i, "seats": rng.choice((2, 2, 4, 4, 4, 6, 8))} for i in range(1, table_count + 1)]
+    bookings = month_of_bookings(tables, days, rng)
+
+    index = ReservationIndex()
+    started = time.perf_counter()
+    for booking in bookings:
+        index.add(*booking)
+    print(f"{len(bookings)} rezervasyon, {table_count} masa; indeks kurulumu: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    queries = []
+    for _ in range(searches):
+        start = datetime(2026, 1, 1) + timedelta(days=rng.randrange(days), hours=rng.randint(17, 22), minutes=15 * rng.randint(0, 3))
+        queries.append((rng.randint(1, 8), start, start + timedelta(minutes=rng.choice((60, 90, 120)))))
+
+    indexed, naive, mismatches = [], [], 0
+    for party_size, start, end in queries:
+        t0 = time.perf_counter()
+        fast = index.find_tables(tables, party_size, start, end)
+        t1 = time.perf_counter()
+        slow = naive_find(bookings, tables, party_size, start, end)
+        t2 = time.perf_counter()
+        indexed.append(t1 - t0)
+        naive.append(t2 - t1)
+        mismatches += fast != slow
+
+    report("aralık indeksi", indexed)
+    report("naif tarama", naive)
+    print(f"hızlanma: {statistics.mean(naive) / statistics.mean(indexed):.0f}x")
+    if mismatches:
+        print(f"HATA: {mismatches} aramada sonuçlar farklı")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=40)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--searches", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    raise SystemExit(main(args.tables, args.days, args.searches, args.seed))
@@ -0,0 +1,315 @@
+"""
+Sıcak sorguların plan kontrolü.
+
+Veritabanını (gerekirse) gerçekçi hacimde örnek veriyle doldurur, her sıcak sorgu için
+EXPLAIN çalıştırır ve sıcak tablolardan birinde sıralı tarama (Seq Scan / SCAN) varsa
+sıfırdan farklı kodla çıkar. İndeks planı bozulduğunda CI'da yakalamak için.
+
+DİKKAT: Veritabanına örnek veri yazar, sadece test veritabanında çalıştırın.
+
+    cd backend
+    DATABASE_URL=postgresql+asyncpg://.../restorant_plans python -m scripts.check_query_plans
+    DATABASE_URL=sqlite+aiosqlite:///./plans.db python -m scripts.check_query_plans
+"""
+import argparse
+import asyncio
+import random
+import sys
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import select, func, insert, update, and_, text
+
+from app.core.database import engine, Base, create_missing_indexes
+from app.models.user import User, UserRole
+from app.models.table import DiningTable, TableStatus
+from app.models.menu_item import MenuItem
+from app.models.ingredient import Ingredient
+from app.models.menu_item_ingredient import MenuItemIngredient
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.table_session import TableSession
+from app.models.schedule import Schedule
+from app.services.kitchen_broker import KITCHEN_QUEUE_FILTER
+
+# Bu tablolarda tam tarama kabul edilmez
+HOT_TABLES = {"orders", "order_items", "menu_item_ingredients", "tables", "table_sessions", "schedules"}
+CHUNK = 5000
+SESSIONS_PER_TABLE_DAY = 2
+STAFF = 40
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def chunks(rows: list[dict]):
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+
+async def seed_reference_data(conn, rng: random.Random) -> None:
+    customers, tables, items, ingredients = 2000, 60, 120, 300
+
+    await conn.execute(insert(User), [
+        {"email": f"plan-{i}@example.com", "password": "x", "role": UserRole.CUSTOMER}
+        for i in range(customers)
+    ])
+    user_ids = (await conn.execute(select(User.id).where(User.email.like("plan-%")))).scalars().all()
+
+    await conn.execute(insert(DiningTable), [
+        {"number": 10_000 + i, "seats": 4, "status": TableStatus.AVAILABLE,
+         "current_user_id": user_ids[i] if i % 3 == 0 else None}
+        for i in range(tables)
+    ])
+
+    await conn.execute(insert(MenuItem), [
+        {"name": f"Plan yemeği {i}", "price": 100 + i, "is_available": True} for i in range(items)
+    ])
+    item_ids = (await conn.execute(select(MenuItem.id).where(MenuItem.name.like("Plan yemeği %")))).scalars().all()
+
+    await conn.execute(insert(Ingredient), [
+        {"name": f"Plan malzemesi {i}", "stock_quantity": 1000} for i in range(ingredients)
+    ])
+    ingredient_ids = (
+        await conn.execute(select(Ingredient.id).where(Ingredient.name.like("Plan malzemesi %")))
+    ).scalars().all()
+
+    await conn.execute(insert(MenuItemIngredient), [
+        {"menu_item_id": item_id, "ingredient_id": ingredient_id, "amount_used": 1}
+        for item_id in item_ids
+        for ingredient_id in rng.sample(ingredient_ids, 5)
+    ])
+
+
+async def seed_sessions_and_schedules(conn, rng: random.Random) -> None:
+    # Bir yıllık masa oturumu ve vardiya geçmişi; oturulan masaların açık oturumu var
+    if (await conn.execute(select(TableSession.id).limit(1))).first():
+        return
+    user_ids = (await conn.execute(select(User.id).where(User.email.like("plan-%")))).scalars().all()
+    tables = (await conn.execute(
+        select(DiningTable.id, DiningTable.current_user_id).where(DiningTable.number >= 10_000)
+    )).all()
+
+    session_rows = []
+    for table_id, _ in tables:
+        for day in range(365):
+            for _ in range(SESSIONS_PER_TABLE_DAY):
+                opened_at = NOW - timedelta(days=day, hours=rng.randint(1, 12))
+                session_rows.append({
+                    "table_id": table_id, "customer_id": rng.choice(user_ids),
+                    "opened_at": opened_at, "closed_at": opened_at + timedelta(minutes=rng.randint(20, 150)),
+                    "orders_count": 2, "unpaid_count": 0, "total_amount": 400, "open_balance": 0,
+                })
+    for rows in chunks(session_rows):
+        await conn.execute(insert(TableSession), rows)
+
+    for table_id, customer_id in tables:
+        if customer_id is None:
+            continue
+        session_id = (await conn.execute(
+            insert(TableSession).values(
+                table_id=table_id, customer_id=customer_id, opened_at=NOW,
+                orders_count=1, unpaid_count=1, total_amount=200, open_balance=200,
+            ).returning(TableSession.id)
+        )).scalar()
+        await conn.execute(update(DiningTable).where(DiningTable.id == table_id).values(current_session_id=session_id))
+
+    schedule_rows = [
+        {"user_id": user_id, "work_date": (NOW - timedelta(days=day)).date(),
+         "start_time": time(9), "end_time": time(17)}
+        for user_id in user_ids[:STAFF]
+        for day in range(365)
+    ]
+    for rows in chunks(schedule_rows):
+        await conn.execute(insert(Schedule), rows)
+
+
+async def seed_orders(conn, rng: random.Random, count: int) -> None:
+    user_ids = (await conn.execute(select(User.id).where(User.email.like("plan-%")))).scalars().all()
+    table_ids = (await conn.execute(select(DiningTable.id).where(DiningTable.number >= 10_000))).scalars().all()
+    item_ids = (await conn.execute(select(MenuItem.id).where(MenuItem.name.like("Plan yemeği %")))).scalars().all()
+
+    # Siparişlerin çoğu ödenmiş; açık hesaplar ve mutfak kuyruğu küçük
+    order_rows = []
+    for _ in range(count):
+        age = rng.random()
+        recent = age < 0.01
+        order_rows.append({
+            "table_id": rng.choice(table_ids),
+            "customer_id": rng.choice(user_ids),
+            "status": OrderStatus.RECEIVED if recent else OrderStatus.PAID,
+            "is_paid": not (recent or age < 0.05),
+            "created_at": NOW - timedelta(days=365 * age),
+            "version": 0,
+        })
+    for rows in chunks(order_rows):
+        await conn.execute(insert(Order), rows)
+
+    # Sadece yeni eklenen (kalemi olmayan) siparişlere kalem ekle
+    order_ids = (await conn.execute(
+        select(Order.id).outerjoin(OrderItem, OrderItem.order_id == Order.id).where(OrderItem.id.is_(None))
+    )).scalars().all()
+    item_rows = [
+        {"order_id": order_id, "menu_item_id": rng.choice(item_ids), "quantity": 1}
+        for order_id in order_ids
+        for _ in range(3)
+    ]
+    for rows in chunks(item_rows):
+        await conn.execute(insert(OrderItem), rows)
+
+    print(f"{len(order_rows)} sipariş eklendi")
+
+
+async def seed(orders: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+
+        rng = random.Random(42)
+        if not (await conn.execute(select(User.id).where(User.email.like("plan-%")).limit(1))).first():
+            await seed_reference_data(conn, rng)
+        await seed_sessions_and_schedules(conn, rng)
+
+        existing = (await conn.execute(select(func.count()).select_from(Order))).scalar()
+        if existing >= orders:
+            print(f"{existing} sipariş mevcut, veri ekleme atlandı")
+        else:
+            await seed_orders(conn, rng, orders - existing)
+
+    # İstatistikleri güncelle ki planlayıcı gerçek hacmi görsün
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+async def hot_queries() -> dict[str, object]:
+    async with engine.connect() as conn:
+        table_id, customer_id = (await conn.execute(
+            select(Order.table_id, Order.customer_id).where(Order.is_paid == False).limit(1)
+        )).one()
+        seated_id, seated_table_number, session_id = (await conn.execute(
+            select(DiningTable.current_user_id, DiningTable.number, DiningTable.current_session_id)
+            .where(DiningTable.current_session_id.is_not(None))
+            .limit(1)
+        )).one()
+        staff_id = (await conn.execute(select(Schedule.user_id).limit(1))).scalar()
+        order_ids = (await conn.execute(select(Order.id).limit(50))).scalars().all()
+        item_ids = (await conn.execute(select(MenuItem.id).limit(5))).scalars().all()
+        ingredient_ids = (await conn.execute(select(Ingredient.id).limit(5))).scalars().all()
+
+    # Endpoint'lerdeki sorguların aynısı
+    return {
+        "müşteri hesabı (customer/bill)": select(Order).where(
+            Order.table_id == table_id,
+            Order.customer_id == customer_id,
+            Order.is_paid == False,
+        ).order_by(Order.created_at),
+        "masanın siparişleri": select(Order).where(Order.table_id == table_id, Order.customer_id == customer_id),
+        "sipariş geçmişi (orders/my-orders)": select(Order)
+            .where(Order.customer_id == customer_id)
+            .order_by(Order.created_at.desc()),
+        "mutfak kuyruğu": select(Order).where(KITCHEN_QUEUE_FILTER).order_by(Order.id),
+        "sipariş kalemleri": select(OrderItem).where(OrderItem.order_id.in_(order_ids)),
+        "malzeme → menü öğesi": select(MenuItemIngredient.menu_item_id)
+            .where(MenuItemIngredient.ingredient_id.in_(ingredient_ids)),
+        "menü öğesi → malzeme": select(MenuItemIngredient.ingredient_id, MenuItemIngredient.amount_used)
+            .where(MenuItemIngredient.menu_item_id.in_(item_ids)),
+        "kullanıcının masası": select(DiningTable).where(DiningTable.current_user_id == customer_id),
+        "günlük rapor aralığı": select(func.count(Order.id)).where(
+            Order.created_at >= NOW - timedelta(days=1), Order.created_at <= NOW
+        ),
+        # Tek sorguluk hesap: masa → ödenmemiş siparişler → kalemler (customer/my-orders)
+        "hesap (customer/my-orders)": select(
+            DiningTable.number, Order.id, Order.total_amount,
+            OrderItem.id, OrderItem.quantity, func.coalesce(OrderItem.unit_price, MenuItem.price),
+        )
+            .select_from(DiningTable)
+            .outerjoin(Order, and_(
+                Order.table_id == DiningTable.id, Order.customer_id == seated_id, Order.is_paid == False
+            ))
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            .where(DiningTable.current_user_id == seated_id)
+            .order_by(Order.created_at, Order.id, OrderItem.id),
+        # Masa oturumu: kalk/öde kontrolü ve sipariş sayaçları (table_service)
+        "açık oturum (release_table)": select(TableSession.unpaid_count)
+            .where(TableSession.id == session_id)
+            .with_for_update(),
+        "oturum sayacı (add_order_to_session)": update(TableSession)
+            .where(TableSession.id == session_id, TableSession.closed_at.is_(None))
+            .values(orders_count=TableSession.orders_count + 1, unpaid_count=TableSession.unpaid_count + 1),
+        # Oturma/kalkma (CAS ve müşterinin masası)
+        "masaya oturma (seat_customer)": update(DiningTable)
+            .where(
+                DiningTable.number == seated_table_number,
+                DiningTable.status == TableStatus.AVAILABLE,
+                DiningTable.current_user_id.is_(None),
+            )
+            .values(status=TableStatus.OCCUPIED, current_user_id=seated_id),
+        "oturulan masa (release_table)": select(
+            DiningTable.id, DiningTable.current_user_id, DiningTable.current_session_id
+        ).where(DiningTable.current_user_id == seated_id),
+        # Vardiyalar: personel + tarih aralığı (ix_schedules_user_date)
+        "vardiyalarım (schedule/me)": select(Schedule)
+            .where(Schedule.user_id == staff_id, Schedule.work_date.between(NOW.date(), NOW.date() + timedelta(days=13)))
+            .order_by(Schedule.work_date, Schedule.start_time),
+        "vardiya çakışma kontrolü": select(Schedule.id, Schedule.user_id, Schedule.work_date)
+            .where(
+                Schedule.user_id.in_([staff_id]),
+                Schedule.work_date.between(NOW.date() - timedelta(days=1), NOW.date() + timedelta(days=7)),
+            ),
+    }
+
+
+def seq_scans_postgres(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans_postgres(child))
+    return found
+
+
+def seq_scans_sqlite(rows) -> list[str]:
+    # "SCAN orders" tam taramadır; "SCAN orders USING INDEX ..." ve "SEARCH ..." değildir
+    found = []
+    for row in rows:
+        detail = row[-1]
+        parts = detail.split()
+        if len(parts) >= 2 and parts[0] == "SCAN" and parts[1] in HOT_TABLES and "USING" not in parts:
+            found.append(parts[1])
+    return found
+
+
+async def explain(stmt) -> tuple[list[str], str]:
+    async with engine.connect() as conn:
+        # Sabitleri gömerek derle ki kısmi indeks koşulları planlayıcı tarafından görülebilsin
+        sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        if conn.dialect.name == "postgresql":
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar()[0]["Plan"]
+            return seq_scans_postgres(plan), plan["Node Type"]
+        if conn.dialect.name == "sqlite":
+            rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+            return seq_scans_sqlite(rows), " / ".join(row[-1] for row in rows)
+        raise SystemExit(f"Desteklenmeyen veritabanı: {conn.dialect.name}")
+
+
+async def main(orders: int) -> int:
+    failures = 0
+    try:
+        await seed(orders)
+        for label, stmt in (await hot_queries()).items():
+            scans, summary = await explain(stmt)
+            status = "HATA" if scans else "ok"
+            if scans:
+                failures += 1
+            print(f"[{status:>4}] {label:<36} {summary}" + (f"  (tam tarama: {', '.join(scans)})" if scans else ""))
+    finally:
+        await engine.dispose()
+
+    if failures:
+        print(f"{failures} sorgu sıralı taramaya düştü")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=50_000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.orders)))
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import useAuth from '../auth/useAuth';
 
+// Her bölüm { count, items, next_cursor } olarak gelir; devamı /manager/dashboard/{section} ile sayfalanır
 const ManagerDashboard = () => {
   const { token } = useAuth();
   const [data, setData] = useState(null);
@@ -30,58 +31,55 @@ const ManagerDashboard = () => {
     }
   }, [token]);
 
+  const loadMore = async (section) => {
+    try {
+      const res = await axios.get(`http://localhost:8000/manager/dashboard/${section}`, {
+        params: { cursor: data[section].next_cursor },
+        headers: {
+          Authorization: `Bearer ${token}`
+        }
+      });
+      setData((prev) => ({
+        ...prev,
+        [section]: {
+          ...prev[section],
+          items: [...prev[section].items, ...res.data.items],
+          next_cursor: res.data.next_cursor
+        }
+      }));
+    } catch (err) {
+      console.error('Dashboard Error:', err);
+      setError("Veri alınamadı. Yetkisiz giriş olabilir.");
+    }
+  };
+
   if (loading) return <div>Yükleniyor...</div>;
   if (error) return <div style={{ color: "red" }}>{error}</div>;
   if (!data) return <div>Veri bulunamadı.</div>;
 
+  const renderSection = (section, title, renderItem) => (
+    <section>
+      <h3>{title} ({data[section].count})</h3>
+      <ul>
+        {data[section].items.map((item, index) => (
+          <li key={item.id || index}>{renderItem(item)}</li>
+        ))}
+      </ul>
+      {data[section].next_cursor && (
+        <button onClick={() => loadMore(section)}>Daha fazla göster</button>
+      )}
+    </section>
+  );
+
   return (
     <div style={{ maxWidth: '800px', margin: 'auto', padding: '2rem' }}>
       <h2>📊 Yönetici Paneli</h2>
 
-      <section>
-        <h3>👥 Kullanıcılar</h3>
-        <ul>
-          {data.users.map((u, index) => (
-            <li key={u.id || index}>{u.email} ({u.role})</li>
-          ))}
-        </ul>
-      </section>
-
-      <section>
-        <h3>📋 Menü</h3>
-        <ul>
-          {data.menu_items.map((m, index) => (
-            <li key={m.id || index}>{m.name} - {m.price}₺</li>
-          ))}
-        </ul>
-      </section>
-
-      <section>
-        <h3>🍅 Malzemeler</h3>
-        <ul>
-          {data.ingredients.map((i, index) => (
-            <li key={i.id || index}>{i.name} ({i.stock_quantity} stok)</li>
-          ))}
-        </ul>
-      </section>
-
-      <section>
-        <h3>🍽️ Masalar</h3>
-        <ul>
-          {data.tables.map((t, index) => (
-            <li key={t.id || index}>Masa {t.number} ({t.status})</li>
-          ))}
-        </ul>
-      </section>
-
-      <section>
-        <h3>🕒 Vardiyalar</h3>
-        <ul>
-          {data.schedules.map((s, index) => (
-            <li key={s.id || index}>User ID {s.user_id} - {s.work_date}</li>
-          ))}
-        </ul>
-      </section>
+      {renderSection('users', '👥 Kullanıcılar', (u) => `${u.email} (${u.role})`)}
+      {renderSection('menu_items', '📋 Menü', (m) => `${m.name} - ${m.price}₺`)}
+      {renderSection('ingredients', '🍅 Malzemeler', (i) => `${i.name} (${i.stock_quantity} stok)`)}
+      {renderSection('tables', '🍽️ Masalar', (t) => `Masa ${t.number} (${t.status})`)}
+      {renderSection('schedules', '🕒 Vardiyalar', (s) => `User ID ${s.user_id} - ${s.work_date}`)}
     </div>
   );
 };